@@ -1,11 +1,28 @@
-from flask import Flask, request, render_template, redirect, flash, jsonify, session, url_for
-from pdf_parser import extract_text_from_pdf, parse_invoice_data, parse_address, parse_line_items
+from flask import Flask, request, render_template, redirect, flash, jsonify, session, url_for, Response, stream_with_context
+from pdf_parser import ParseBudgetExceeded, parse_address
+from parse_worker import parse_invoice_pdf, parse_stats
+from uploads import UploadRequest, upload_size, pdf_source
 from db import (
     insert_invoice_with_line_items, check_invoice_exists, get_invoice_by_number,
-    get_all_invoices, create_indexes, get_all_suppliers, get_all_items
+    get_all_invoices, create_indexes, get_all_suppliers, get_all_items, invalidate_reference_cache,
+    get_connection as get_invoice_db_connection
+)
+from db_backend import get_dialect
+from date_normalizer import format_date, normalize_date_column
+from config import SECRET_KEY, MAX_UPLOAD_BYTES
+from forecast import DEFAULT_ENGINE, SNAPSHOT_ENGINE
+from forecast_service import get_forecast
+from forecast_snapshots import get_forecast_snapshot
+from dashboard import normalize_filters, get_dashboard_data
+from result_cache import cache_stats
+from index_manager import apply_indexes
+from order_stream import subscribe, event_stream, stream_stats, STREAM_POLL_INTERVAL
+from health import liveness, readiness
+from maintenance import start_runner, last_result, run_task, run_in_background, maintenance_status
+from data_export import (
+    EXPORT_FORMATS, INVOICE_EXPORT_COLUMNS, AGGREGATE_EXPORT_COLUMNS,
+    invoice_batches, aggregate_batches, parquet_available, stream_export
 )
-from config import SECRET_KEY, DB_CONNECTION_STRING
-import pyodbc
 import uuid
 import time
 import traceback
@@ -14,14 +31,17 @@ from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
-# Enable pyodbc connection pooling
-pyodbc.pooling = True
+@app.errorhandler(413)
+def upload_too_large(e):
+    return jsonify({'success': False, 'error': f'Upload exceeds the {round(MAX_UPLOAD_BYTES / (1024 * 1024), 1):g} MB limit'}), 413
 
 def get_connection():
-    """Get a SQL Server connection"""
+    """Get an invoice database connection on the configured engine"""
     try:
-        conn = pyodbc.connect(DB_CONNECTION_STRING)
+        conn = get_invoice_db_connection()
         print("Database connection established successfully")
         return conn
     except Exception as e:
@@ -53,20 +73,28 @@ def upload_invoice():
                 conn.close()
 
                 # Validate file size before processing
-                file.seek(0, 2)
-                file_size = file.tell()
-                if file_size == 0:
+                if upload_size(file) == 0:
                     return jsonify({'success': False, 'error': 'Uploaded file is empty'}), 400
-                file.seek(0)
 
-                text = extract_text_from_pdf(file)
-                company, gstin, address, invoice_no, terms, shipping_method, subtotal, discount, tax, total, invoice_date, due_date, po_number = parse_invoice_data(text, company_key)
+                try:
+                    # Spooled uploads are parsed by path, small ones from their buffer; no copy is made here
+                    with pdf_source(file) as source:
+                        parsed = parse_invoice_pdf(source, company_key)
+                except ParseBudgetExceeded as e:
+                    return jsonify({
+                        'success': False,
+                        'error': f'Invoice could not be parsed within its budget: {str(e)}',
+                        'stage': e.stage,
+                        'detail': e.detail,
+                        'partial': e.partial
+                    }), 422
+                company, gstin, address, invoice_no, terms, shipping_method, subtotal, discount, tax, total, invoice_date, due_date, po_number = parsed['header']
 
                 if not company or not gstin or not invoice_no:
                     return jsonify({'success': False, 'error': 'Missing required fields. Please verify the PDF format.'}), 400
 
                 street, city, state, zipcode, country = parse_address(address)
-                line_items = parse_line_items(text, invoice_no, company_key)
+                line_items = parsed['line_items']
 
                 # Set key_code for line items
                 for item in line_items:
@@ -145,42 +173,12 @@ def list_invoices():
         saved_invoices = get_all_invoices()
         temp_invoices = session.get('temp_invoices', {})
 
-        invoices = []
-        for invoice in saved_invoices:
-            print(f"Invoice {invoice[0]}: invoice_date={invoice[4]}, type={type(invoice[4])}, due_date={invoice[5]}, type={type(invoice[5])}")
-            
-            invoice_date = invoice[4]
-            if isinstance(invoice_date, str) and invoice_date:
-                try:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d-%b-%Y'):
-                        try:
-                            invoice_date = datetime.strptime(invoice_date, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        invoice_date = None
-                except Exception as e:
-                    print(f"Error parsing invoice_date '{invoice_date}': {e}")
-                    invoice_date = None
-            invoice_date_str = invoice_date.strftime('%d-%m-%Y') if invoice_date else 'N/A'
-
-            due_date = invoice[5]
-            if isinstance(due_date, str) and due_date:
-                try:
-                    for fmt in ('%Y-%m-%d', '%d-%m-%Y', '%d-%b-%Y'):
-                        try:
-                            due_date = datetime.strptime(due_date, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        due_date = None
-                except Exception as e:
-                    print(f"Error parsing due_date '{due_date}': {e}")
-                    due_date = None
-            due_date_str = due_date.strftime('%d-%m-%Y') if due_date else 'N/A'
+        # Dates come back as date objects or strings depending on the engine; parse each distinct value once
+        invoice_dates = normalize_date_column((invoice[4] for invoice in saved_invoices), fmt='%d-%m-%Y', default='N/A')
+        due_dates = normalize_date_column((invoice[5] for invoice in saved_invoices), fmt='%d-%m-%Y', default='N/A')
 
+        invoices = []
+        for invoice, invoice_date_str, due_date_str in zip(saved_invoices, invoice_dates, due_dates):
             invoices.append({
                 'invoice_no': invoice[0],
                 'company_name': invoice[1],
@@ -427,17 +425,11 @@ def update_invoice():
             if item_result:
                 item_code = item_result[0]
             else:
-                cursor.execute('''
-                    INSERT INTO items (item_no, description, unit, default_unit_price)
-                    OUTPUT INSERTED.item_code
-                    VALUES (?, ?, ?, ?)
-                ''', (
-                    item_no,
-                    item.get('description', ''),
-                    item.get('unit', 'Piece'),
-                    item.get('unit_price', 0.0)
-                ))
-                item_code = cursor.fetchone()[0]
+                item_code = get_dialect().insert_returning_id(
+                    cursor, 'items', ('item_no', 'description', 'unit', 'default_unit_price'),
+                    (item_no, item.get('description', ''), item.get('unit', 'Piece'), item.get('unit_price', 0.0)),
+                    'item_code'
+                )
 
             cursor.execute('''
                 INSERT INTO invoice_line_items
@@ -453,6 +445,7 @@ def update_invoice():
                 index
             ))
         conn.commit()
+        invalidate_reference_cache()
 
         cursor.execute('SELECT SUM(total_price) FROM invoice_line_items WHERE invoice_no = ?', (invoice_no,))
         subtotal = Decimal(str(cursor.fetchone()[0] or '0.00'))
@@ -505,18 +498,11 @@ def save_invoice():
         due_date = invoice['due_date']
         print(f"Raw dates from session for invoice {invoice_no}: invoice_date={invoice_date}, due_date={due_date}")
 
-        try:
-            invoice_date = datetime.strptime(invoice_date.replace('/', '-'), '%d-%m-%Y').strftime('%Y-%m-%d') if invoice_date else None
-            due_date = datetime.strptime(due_date.replace('/', '-'), '%d-%m-%Y').strftime('%Y-%m-%d') if due_date else None
-        except (ValueError, TypeError) as e:
-            print(f"Error parsing dates for invoice {invoice_no}: invoice_date={invoice_date}, due_date={due_date}, error={e}")
-            try:
-                invoice_date = datetime.strptime(invoice_date, '%d-%b-%Y').strftime('%Y-%m-%d') if invoice_date else None
-                due_date = datetime.strptime(due_date, '%d-%b-%Y').strftime('%Y-%m-%d') if due_date else None
-            except (ValueError, TypeError) as e2:
-                print(f"Error parsing DD-MMM-YYYY dates: {e2}")
-                invoice_date = None
-                due_date = None
+        # Session dates were normalized to DD-MM-YYYY by parse_date at upload time
+        invoice_date = format_date(invoice_date, '%Y-%m-%d', default=None)
+        due_date = format_date(due_date, '%Y-%m-%d', default=None)
+        if (invoice['invoice_date'] and not invoice_date) or (invoice['due_date'] and not due_date):
+            print(f"Error parsing dates for invoice {invoice_no}: invoice_date={invoice['invoice_date']}, due_date={invoice['due_date']}")
 
         print(f"Saving invoice {invoice_no}: invoice_date={invoice_date}, due_date={due_date}")
 
@@ -627,6 +613,121 @@ def update_invoice_totals(invoice_no, subtotal, tax, total):
     finally:
         conn.close()
 
+@app.route('/api/sales-trend')
+def sales_trend():
+    period_type = request.args.get('period_type', 'MS')
+    if period_type not in ('MS', 'QS', 'YS', 'D'):
+        return jsonify({'error': f'Invalid period_type: {period_type}'}), 400
+    params = {
+        'period_type': period_type,
+        'start_date': request.args.get('start_date'),
+        'end_date': request.args.get('end_date'),
+        'forecast_start': request.args.get('forecast_start')
+    }
+    engine = request.args.get('engine')
+    try:
+        # Serve the materialized snapshot (Prophet unless an engine is named) unless a live fit
+        # is requested; live fits default to a fast NumPy baseline
+        if request.args.get('live') != '1':
+            snapshot = get_forecast_snapshot(engine=engine or SNAPSHOT_ENGINE, **params)
+            if snapshot:
+                return jsonify(snapshot)
+
+        payload, status = get_forecast(engine=engine or DEFAULT_ENGINE, **params)
+        return jsonify({**payload, **status})
+    except TimeoutError as e:
+        return jsonify({'error': f'{str(e)}, please retry shortly'}), 503
+    except Exception as e:
+        print(f"Error in sales_trend: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard')
+def dashboard_data():
+    """All dashboard charts and cards for one shared filter in a single response"""
+    try:
+        filters = normalize_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        return jsonify(get_dashboard_data(filters))
+    except Exception as e:
+        print(f"Error in dashboard_data: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/dashboard-cache')
+def dashboard_cache():
+    return jsonify(cache_stats())
+
+@app.route('/api/dashboard-stream')
+def dashboard_stream():
+    """Server-sent events with new orders since the last poll, shared by every open dashboard"""
+    subscriber = subscribe()
+    if subscriber is None:
+        response = jsonify({'error': 'Too many open dashboard streams, retry shortly'})
+        response.headers['Retry-After'] = str(STREAM_POLL_INTERVAL * 6)
+        return response, 503
+    response = Response(
+        stream_with_context(event_stream(subscriber, request.headers.get('Last-Event-ID'))),
+        mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/parse-stats')
+def get_parse_stats():
+    return jsonify(parse_stats())
+
+@app.route('/api/dashboard-stream/stats')
+def dashboard_stream_stats():
+    return jsonify(stream_stats())
+
+def _export_response(export_format, filename, columns, batches):
+    """Stream an export as an attachment; the body is produced batch by batch"""
+    response = Response(
+        stream_with_context(stream_export(export_format, columns, batches)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+def _export_format():
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format: {export_format}")
+    if export_format == 'parquet' and not parquet_available():
+        raise ValueError("Parquet export requires pyarrow")
+    return export_format
+
+@app.route('/api/export/invoices')
+def export_invoices():
+    """Invoices with their line items as CSV or Parquet, optionally limited by invoice_date"""
+    try:
+        export_format = _export_format()
+        start_date = request.args.get('start_date') or None
+        end_date = request.args.get('end_date') or None
+        for value in (start_date, end_date):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filename = f"invoices_{start_date or 'all'}_{end_date or 'all'}"
+    return _export_response(export_format, filename, INVOICE_EXPORT_COLUMNS,
+                            invoice_batches(start_date, end_date))
+
+@app.route('/api/export/sales-aggregates')
+def export_sales_aggregates():
+    """Dashboard aggregates per period, region, category and salesperson for the shared filter"""
+    try:
+        export_format = _export_format()
+        filters = normalize_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    filename = f"sales_{filters['period_type']}_{filters['start_date']}_{filters['end_date']}"
+    return _export_response(export_format, filename, AGGREGATE_EXPORT_COLUMNS, aggregate_batches(filters))
+
 @app.route('/api/debug-routes')
 def debug_routes():
     routes = []
@@ -638,117 +739,54 @@ def debug_routes():
         })
     return jsonify(routes)
 
+@app.route('/healthz')
+def healthz():
+    return jsonify(liveness())
+
+@app.route('/readyz')
+def readyz():
+    ready, status = readiness()
+    return jsonify(status), 200 if ready else 503
+
 @app.route('/api/check-database-health')
 def check_database_health():
-    try:
-        test_connection()
-        check_for_hanging_transactions()
-        fix_orphaned_line_items()
-        debug_database_state()
-        return jsonify({
-            'success': True,
-            'message': 'Database health check completed successfully'
-        })
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+    """
+    Last background diagnostics result; ?refresh=1 also starts a new run in the
+    background unless one is already running (the cached result is returned either way)
+    """
+    start_runner()
+    refreshing = request.args.get('refresh') == '1' and run_in_background('diagnostics')
+    result = last_result('diagnostics')
+    if result is None:
+        return jsonify({'success': True, 'message': 'Diagnostics are running; try again shortly',
+                        'diagnostics': None, 'refreshing': refreshing}), 202
+    return jsonify({
+        'success': result['ok'],
+        'message': 'Database health check completed successfully' if result['ok'] else 'Database health check found problems',
+        'diagnostics': result,
+        'refreshing': refreshing
+    })
+
+@app.route('/api/maintenance-status')
+def get_maintenance_status():
+    """Maintenance task schedule and the duration and rows affected of recent runs (read-only)"""
+    status = maintenance_status()
+    return jsonify({'success': status['error'] is None, **status}), 200 if status['error'] is None else 503
 
 def rebuild_indexes():
+    """Run the invoice index maintenance task now, with its time limit and lock timeout, and record the run"""
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        print("Rebuilding indexes...")
-        cursor.execute('''
-            IF EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoice_line_items_invoice_no')
-            ALTER INDEX IX_invoice_line_items_invoice_no ON invoice_line_items REBUILD
-        ''')
-        cursor.execute('''
-            IF EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoice_line_items_item_code')
-            ALTER INDEX IX_invoice_line_items_item_code ON invoice_line_items REBUILD
-        ''')
-        cursor.execute("UPDATE STATISTICS invoice_line_items WITH FULLSCAN")
-        cursor.execute("UPDATE STATISTICS invoices WITH FULLSCAN")
-        print("Indexes rebuilt successfully")
-        conn.commit()
+        print("Maintaining fragmented indexes...")
+        result = run_task('invoice_indexes', force=True)
+        print(f"Index maintenance {result['status']}: {result['rows_affected']} indexes touched")
+        return result
     except Exception as e:
         print(f"Error rebuilding indexes: {str(e)}")
         traceback.print_exc()
         return False
-    finally:
-        cursor.close()
-        conn.close()
-
-def test_connection():
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        print("Database connection test successful")
-    finally:
-        cursor.close()
-        conn.close()
-
-def check_for_hanging_transactions():
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT 
-                t.transaction_id,
-                t.name,
-                t.transaction_begin_time,
-                s.session_id,
-                s.host_name,
-                s.program_name,
-                s.login_name
-            FROM sys.dm_tran_active_transactions t
-            LEFT JOIN sys.dm_exec_sessions s ON t.transaction_id = s.transaction_id
-            WHERE t.transaction_begin_time < DATEADD(MINUTE, -5, GETDATE())
-        ''')
-        rows = cursor.fetchall()
-        if rows:
-            print(f"Found {len(rows)} hanging transactions:")
-            for row in rows:
-                print(f"Transaction ID: {row.transaction_id}, Name: {row.name}, Started: {row.transaction_begin_time}, Session: {row.session_id}")
-        else:
-            print("No hanging transactions found")
-    finally:
-        cursor.close()
-        conn.close()
-
-def fix_orphaned_line_items():
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute('''
-            DELETE FROM invoice_line_items
-            WHERE invoice_no NOT IN (SELECT invoice_no FROM invoices)
-        ''')
-        deleted = cursor.rowcount
-        conn.commit()
-        print(f"Deleted {deleted} orphaned line items")
-    finally:
-        cursor.close()
-        conn.close()
-
-def debug_database_state():
-    conn = get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM invoices")
-        invoice_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM invoice_line_items")
-        line_item_count = cursor.fetchone()[0]
-        cursor.execute("SELECT COUNT(*) FROM items")
-        item_count = cursor.fetchone()[0]
-        print(f"Database state: {invoice_count} invoices, {line_item_count} line items, {item_count} items")
-    finally:
-        cursor.close()
-        conn.close()
 
 if __name__ == '__main__':
+    # Development server with reloader and debugger; production runs wsgi.py
     create_indexes()
+    apply_indexes()
     app.run(port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,306 @@
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+import fitz  # PyMuPDF
+from pdf_parser import extract_pdf_content, parse_invoice_data, parse_line_items
+
+# Line counts benchmarked by default, from a one-line invoice to a 5,000-line one
+DEFAULT_LINE_COUNTS = (1, 10, 100, 1000, 5000)
+DEFAULT_SUPPLIERS = ('SUPPLIER1', 'SUPPLIER2', 'SUPPLIER3')
+LINES_PER_PAGE = 45
+
+# Page geometry (A4 points) and the x position of each line-item column
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+TOP_MARGIN, LINE_HEIGHT, FONT_SIZE = 60, 15, 9
+COLUMN_X = (40, 100, 355, 400, 440, 505)  # Description is wide enough for the longest catalogue entry
+
+# Header, item catalogue and units that each supplier's parser expects
+SUPPLIER_LAYOUTS = {
+    'SUPPLIER1': {
+        'header': [
+            'TAX INVOICE',
+            'From: Acme Infrastructure Pvt Ltd',
+            '12 Industrial Area, Pune, MH - 411001, India',
+            'GSTIN: 27ABCDE1234F1Z5',
+            'Invoice No: INV-{number}',
+            'Invoice Date: {invoice_date:%d-%m-%Y}',
+            'Due Date: {due_date:%d-%m-%Y}',
+            'PO Number: PO-{number}',
+            'Terms: Net 30',
+            'Shipping Method: Courier'
+        ],
+        'descriptions': (
+            'Server Rack with Cooling',
+            'Premium Server Rack with Cooling',
+            'Server Rack with Cooling and Cable Management',
+            'Premium Server Rack with Cooling and Cable Management'
+        ),
+        'units': ('Piece',)
+    },
+    'SUPPLIER2': {
+        'header': [
+            'Global Imports Inc.',
+            '456 Global Avenue, New York, NY, 10001, USA',
+            'GST ID: 29ABCDE1234F1Z5',
+            'Invoice #: GI-{number}',
+            'Invoice Date: {invoice_date:%Y-%m-%d}',
+            'Due Date: {due_date:%Y-%m-%d}',
+            'PO Number: GPO-{number}',
+            'Terms: Net 45',
+            'Shipping Method: Freight'
+        ],
+        'descriptions': ('Wireless Keyboard', 'USB-C Docking Station', 'LED Monitor 27 inch', 'Ergonomic Office Chair'),
+        'units': ('Piece', 'Unit', 'Box')
+    },
+    'SUPPLIER3': {
+        'header': [
+            'NexGen Enterprises',
+            '789 NexGen Road, Toronto, ON, M5V2T6, Canada',
+            'GSTIN: 33ABCDE1234F1Z5',
+            'Invoice Number: NX-{number}',
+            'Invoice Date: {invoice_date:%d-%b-%Y}',
+            'Due Date: {due_date:%d-%b-%Y}',
+            'PO Number: NPO-{number}',
+            'Terms: Net 15',
+            'Shipping Method: Air'
+        ],
+        'descriptions': ('Network Switch 24 Port', 'Cat6 Patch Cable', 'Rack Mount Kit', 'UPS Battery Pack'),
+        'units': ('Piece', 'Unit', 'Set')
+    }
+}
+
+def generate_line_items(company_key, line_count, seed=0):
+    """
+    Build deterministic line items in a supplier's catalogue.
+
+    Returns:
+        list: (item_no, description, unit, quantity, unit_price, total_price) tuples
+    """
+    layout = SUPPLIER_LAYOUTS[company_key]
+    rng = random.Random(f"{company_key}:{line_count}:{seed}")
+    items = []
+    for index in range(line_count):
+        quantity = rng.randint(1, 50)
+        unit_price = round(rng.uniform(5, 25000), 2)
+        items.append((
+            f"ITEM-{index % 9999 + 1:04d}",
+            rng.choice(layout['descriptions']),
+            rng.choice(layout['units']),
+            quantity,
+            unit_price,
+            round(quantity * unit_price, 2)
+        ))
+    return items
+
+def generate_invoice_pdf(company_key, line_count, lines_per_page=LINES_PER_PAGE, seed=0, invoice_number=None):
+    """
+    Render a synthetic invoice in the layout company_key's parser expects.
+
+    The first page carries the supplier header, line items are drawn as
+    separate column spans (as real invoice PDFs are), and the totals follow
+    the last item.
+
+    Args:
+        company_key (str): SUPPLIER1, SUPPLIER2 or SUPPLIER3
+        line_count (int): Number of line items
+        lines_per_page (int): Line items per page
+        seed (int): Random seed for quantities and prices
+        invoice_number (int, optional): Number used in the invoice and PO numbers
+
+    Returns:
+        tuple: (pdf bytes, page count, list of generated line items)
+    """
+    layout = SUPPLIER_LAYOUTS[company_key]
+    items = generate_line_items(company_key, line_count, seed)
+    invoice_date = date(2025, 1, 15)
+    fields = {'number': invoice_number or 1000 + line_count, 'invoice_date': invoice_date, 'due_date': invoice_date + timedelta(days=30)}
+
+    doc = fitz.open()
+    page, y = None, PAGE_HEIGHT
+
+    def new_page():
+        nonlocal page, y
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = TOP_MARGIN
+
+    def write_line(text, x=COLUMN_X[0]):
+        nonlocal y
+        page.insert_text((x, y), text, fontsize=FONT_SIZE)
+        y += LINE_HEIGHT
+
+    new_page()
+    for line in layout['header']:
+        write_line(line.format(**fields))
+    y += LINE_HEIGHT
+    for x, title in zip(COLUMN_X, ('Item No', 'Description', 'Unit', 'Qty', 'Unit Price', 'Amount')):
+        page.insert_text((x, y), title, fontsize=FONT_SIZE)
+    y += LINE_HEIGHT
+
+    rows_on_page = 0
+    for item in items:
+        if rows_on_page >= lines_per_page or y > PAGE_HEIGHT - TOP_MARGIN:
+            new_page()
+            rows_on_page = 0
+        item_no, description, unit, quantity, unit_price, total_price = item
+        values = (item_no, description, unit, str(quantity), f"{unit_price:,.2f}", f"{total_price:,.2f}")
+        for x, value in zip(COLUMN_X, values):
+            page.insert_text((x, y), value, fontsize=FONT_SIZE)
+        y += LINE_HEIGHT
+        rows_on_page += 1
+
+    subtotal = round(sum(item[5] for item in items), 2)
+    tax = round(subtotal * 0.18, 2)
+    if y > PAGE_HEIGHT - TOP_MARGIN - 5 * LINE_HEIGHT:
+        new_page()
+    y += LINE_HEIGHT
+    write_line(f"Subtotal: INR {subtotal:,.2f}", COLUMN_X[3])
+    write_line("Discount: INR 0.00", COLUMN_X[3])
+    write_line(f"Tax (18% GST): INR {tax:,.2f}", COLUMN_X[3])
+    write_line(f"Total: INR {subtotal + tax:,.2f}", COLUMN_X[3])
+
+    page_count = doc.page_count
+    pdf_bytes = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return pdf_bytes, page_count, items
+
+def _percentiles(timings):
+    """Return p50/p90/p95/p99/max/mean of a list of millisecond timings"""
+    ordered = sorted(timings)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)], 3)
+
+    return {
+        'p50_ms': pick(0.50),
+        'p90_ms': pick(0.90),
+        'p95_ms': pick(0.95),
+        'p99_ms': pick(0.99),
+        'max_ms': round(ordered[-1], 3),
+        'mean_ms': round(sum(ordered) / len(ordered), 3)
+    }
+
+def _process_peak_rss_mb():
+    """Peak resident set size of this process so far (all cases up to now, never decreases), in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def benchmark_case(company_key, line_count, repeats=5, warmup=1):
+    """
+    Time extraction and parsing of one synthetic invoice.
+
+    Parser debug output is written to os.devnull, so its formatting cost is
+    measured but the terminal is not. Memory is measured on one extra untimed
+    run under tracemalloc, which only sees Python allocations (not MuPDF's).
+
+    Returns:
+        dict: Per-stage latency percentiles, throughput, parse accuracy, this case's
+              peak Python allocation and the process peak RSS so far
+    """
+    pdf_bytes, page_count, items = generate_invoice_pdf(company_key, line_count)
+    stages = {'extract': [], 'parse_header': [], 'parse_lines': []}
+    parsed_lines = 0
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for run in range(warmup + repeats):
+            started = time.perf_counter()
+            text, page_words = extract_pdf_content(io.BytesIO(pdf_bytes))
+            extracted = time.perf_counter()
+            header = parse_invoice_data(text, company_key)
+            parsed = time.perf_counter()
+            line_items = parse_line_items(text, header[3], company_key, page_words)
+            finished = time.perf_counter()
+
+            if run >= warmup:
+                stages['extract'].append((extracted - started) * 1000)
+                stages['parse_header'].append((parsed - extracted) * 1000)
+                stages['parse_lines'].append((finished - parsed) * 1000)
+            parsed_lines = len(line_items)
+
+        tracemalloc.start()
+        text, page_words = extract_pdf_content(io.BytesIO(pdf_bytes))
+        parse_line_items(text, parse_invoice_data(text, company_key)[3], company_key, page_words)
+        del text, page_words
+        _, peak_allocated = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    totals = [sum(times) for times in zip(*stages.values())]
+    median_seconds = _percentiles(totals)['p50_ms'] / 1000
+    return {
+        'supplier': company_key,
+        'lines': line_count,
+        'pages': page_count,
+        'pdf_bytes': len(pdf_bytes),
+        'parsed_lines': parsed_lines,
+        'accurate': parsed_lines == len(items),
+        'stages': {name: _percentiles(times) for name, times in stages.items()},
+        'total': _percentiles(totals),
+        'pages_per_second': round(page_count / median_seconds, 1) if median_seconds else None,
+        'lines_per_second': round(line_count / median_seconds, 1) if median_seconds else None,
+        'peak_python_mb': round(peak_allocated / (1024 * 1024), 2),
+        'process_peak_rss_mb': _process_peak_rss_mb()
+    }
+
+def run_benchmark(line_counts=DEFAULT_LINE_COUNTS, suppliers=DEFAULT_SUPPLIERS, repeats=5, warmup=1):
+    """
+    Benchmark every supplier layout at every line count.
+
+    Args:
+        line_counts (iterable): Line items per generated invoice (1 to 5,000)
+        suppliers (iterable): Supplier keys to benchmark
+        repeats (int): Timed runs per case
+        warmup (int): Untimed runs per case before timing
+
+    Returns:
+        dict: Environment details and one result per (supplier, line count)
+    """
+    results = []
+    for company_key in suppliers:
+        for line_count in line_counts:
+            result = benchmark_case(company_key, line_count, repeats, warmup)
+            results.append(result)
+            print(f"{company_key} {line_count:5d} lines {result['pages']:4d} pages   "
+                  f"p50 {result['total']['p50_ms']:10.2f} ms   p95 {result['total']['p95_ms']:10.2f} ms   "
+                  f"{result['lines_per_second']} lines/s   python peak {result['peak_python_mb']} MB"
+                  f"{'' if result['accurate'] else '   PARSED ' + str(result['parsed_lines'])}", file=sys.stderr)
+
+    return {
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'pymupdf': fitz.VersionBind,
+        'repeats': repeats,
+        'warmup': warmup,
+        'results': results
+    }
+
+if __name__ == "__main__":
+    # python benchmark_parser.py [line_counts] [repeats] [output.json]
+    #     e.g. python benchmark_parser.py 1,100,5000 10 parser_before.json
+    # python benchmark_parser.py generate SUPPLIER2 500 sample.pdf
+    if len(sys.argv) > 1 and sys.argv[1] == 'generate':
+        key = sys.argv[2] if len(sys.argv) > 2 else 'SUPPLIER1'
+        count = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+        path = sys.argv[4] if len(sys.argv) > 4 else f"synthetic_{key.lower()}_{count}.pdf"
+        pdf, pages, _ = generate_invoice_pdf(key, count)
+        with open(path, 'wb') as f:
+            f.write(pdf)
+        print(f"Wrote {path}: {count} lines on {pages} pages")
+        sys.exit(0)
+
+    counts = [int(value) for value in sys.argv[1].split(',')] if len(sys.argv) > 1 else DEFAULT_LINE_COUNTS
+    repeat_count = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    report = run_benchmark(line_counts=counts, repeats=repeat_count)
+    output = json.dumps(report, indent=2)
+    if len(sys.argv) > 3:
+        with open(sys.argv[3], 'w') as f:
+            f.write(output)
+        print(f"Benchmark written to {sys.argv[3]}", file=sys.stderr)
+    else:
+        print(output)
@@ -0,0 +1,125 @@
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from sales_db import get_sales_db_connection
+from sales_storage import get_storage_status
+
+# Range-scan queries shaped like the dashboard, rollup and forecast workload.
+# Each runs over the full order history.
+BENCHMARK_QUERIES = {
+    'monthly_totals': '''
+        SELECT DATEADD(MONTH, DATEDIFF(MONTH, 0, order_date), 0) AS ds, SUM(total_amount)
+        FROM sales_orders
+        WHERE order_date >= ? AND order_date < ?
+        GROUP BY DATEADD(MONTH, DATEDIFF(MONTH, 0, order_date), 0)
+    ''',
+    'sales_by_region': '''
+        SELECT region_id, SUM(total_amount), COUNT(*)
+        FROM sales_orders
+        WHERE order_date >= ? AND order_date < ?
+        GROUP BY region_id
+    ''',
+    'sales_by_customer': '''
+        SELECT customer_id, SUM(total_amount)
+        FROM sales_orders
+        WHERE order_date >= ? AND order_date < ?
+        GROUP BY customer_id
+    ''',
+    'daily_rollup_grain': '''
+        SELECT CAST(order_date AS DATE), region_id, product_id, customer_id, salesperson_id, status,
+               SUM(total_amount), COUNT(*)
+        FROM sales_orders
+        WHERE order_date >= ? AND order_date < ?
+        GROUP BY CAST(order_date AS DATE), region_id, product_id, customer_id, salesperson_id, status
+    ''',
+    'status_counts': '''
+        SELECT status, COUNT(*), COUNT(DISTINCT customer_id)
+        FROM sales_orders
+        WHERE order_date >= ? AND order_date < ?
+        GROUP BY status
+    '''
+}
+
+# Query hint that forces the pre-migration (rowstore) plan for comparison
+ROWSTORE_HINT = ' OPTION (IGNORE_NONCLUSTERED_COLUMNSTORE_INDEX)'
+
+def _time_query(cursor, sql, params, repeats):
+    """Run a query repeats times and return per-run wall times in milliseconds and the row count"""
+    timings = []
+    rows = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        cursor.execute(sql, params)
+        rows = len(cursor.fetchall())
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, rows
+
+def _summarize(timings):
+    """Return min/median/p95/max of a list of timings"""
+    ordered = sorted(timings)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        'min_ms': round(ordered[0], 2),
+        'median_ms': round(statistics.median(ordered), 2),
+        'p95_ms': round(ordered[p95_index], 2),
+        'max_ms': round(ordered[-1], 2)
+    }
+
+def run_benchmark(repeats=5):
+    """
+    Time every benchmark query with the rowstore plan and with the current storage.
+
+    With the columnstore index present the rowstore runs use a hint that
+    ignores it, so one run gives a before/after comparison. Without the
+    index both modes use the same plan (the "before" baseline).
+
+    Args:
+        repeats (int): Timed runs per query and mode (after one warm-up run)
+
+    Returns:
+        dict: Storage status, date range and per-query timings for each mode
+    """
+    status = get_storage_status()
+    with get_sales_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MIN(order_date), DATEADD(DAY, 1, MAX(order_date)) FROM sales_orders")
+        first, last = cursor.fetchone()
+        params = (first, last)
+
+        results = {}
+        modes = {'rowstore': ROWSTORE_HINT, 'current': ''}
+        for name, sql in BENCHMARK_QUERIES.items():
+            results[name] = {}
+            for mode, hint in modes.items():
+                query = sql.rstrip() + hint
+                _time_query(cursor, query, params, 1)  # warm-up: plan compile and buffer pool
+                timings, rows = _time_query(cursor, query, params, repeats)
+                results[name][mode] = {**_summarize(timings), 'rows': rows}
+            rowstore = results[name]['rowstore']['median_ms']
+            current = results[name]['current']['median_ms']
+            results[name]['speedup'] = round(rowstore / current, 2) if current else None
+            print(f"{name:20s} rowstore {rowstore:10.2f} ms   current {current:10.2f} ms   "
+                  f"x{results[name]['speedup']}")
+
+    return {
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'storage': status,
+        'date_range': [str(first), str(last)],
+        'repeats': repeats,
+        'queries': results
+    }
+
+if __name__ == "__main__":
+    # python benchmark_storage.py [repeats] [output.json]
+    # Run before and after `python sales_storage.py migrate` and keep both JSON files.
+    repeat_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    report = run_benchmark(repeats=repeat_count)
+    output = json.dumps(report, indent=2, default=str)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as f:
+            f.write(output)
+        print(f"Benchmark written to {sys.argv[2]}")
+    else:
+        print(output)
@@ -1,3 +1,5 @@
+import os
+
 SECRET_KEY = 'your-secret-key'
 
 DB_CONNECTION_STRING = (
@@ -7,3 +9,49 @@ DB_CONNECTION_STRING = (
     "UID=sa;"
     "PWD=Aqeef123;"
 )
+
+# Invoice database engine: 'sqlserver' (DB_CONNECTION_STRING) or 'sqlite' (SQLITE_DB_PATH,
+# a file or ':memory:') for offline development and load testing
+DB_BACKEND = os.environ.get('INVOICE_DB_BACKEND', 'sqlserver')
+SQLITE_DB_PATH = os.environ.get('INVOICE_SQLITE_PATH', 'invoices.sqlite3')
+
+# Invoice PDF uploads: larger bodies are refused with 413 while streaming; bodies above the
+# spool threshold are written to a temp file (UPLOAD_SPOOL_DIR, None = system default) and parsed by path
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 50 * 1024 * 1024))
+UPLOAD_SPOOL_THRESHOLD = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 1024 * 1024))
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+
+# Invoice PDF parsing budget, enforced per document in a separate worker process
+PARSE_TIME_LIMIT = float(os.environ.get('PARSE_TIME_LIMIT', 30))  # Seconds before the worker is killed
+PARSE_PAGE_LIMIT = int(os.environ.get('PARSE_PAGE_LIMIT', 500))    # Larger documents are refused
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', 2))            # Worker processes per host, shared by all requests
+
+# Production WSGI server (wsgi.py / gunicorn.conf.py). PDF parsing runs in worker processes
+# (PARSE_WORKERS split across the server workers, at least one each), so server workers
+# mostly wait on I/O and can use threads.
+WSGI_BIND = os.environ.get('WSGI_BIND', '0.0.0.0:5001')
+WSGI_WORKERS = int(os.environ.get('WSGI_WORKERS', os.cpu_count() or 2))
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 8))
+WSGI_TIMEOUT = int(os.environ.get('WSGI_TIMEOUT', 120))             # Seconds before a stuck worker is restarted
+WSGI_GRACEFUL_TIMEOUT = int(os.environ.get('WSGI_GRACEFUL_TIMEOUT', 30))  # Seconds to finish requests on shutdown
+
+# Each open /api/dashboard-stream holds one server thread, so a worker serves at most this many;
+# more dashboards get 503 and retry. Streams also end after STREAM_MAX_LIFETIME seconds and reconnect.
+STREAM_MAX_CLIENTS = int(os.environ.get('STREAM_MAX_CLIENTS', max(WSGI_THREADS // 4, 1)))
+STREAM_MAX_LIFETIME = int(os.environ.get('STREAM_MAX_LIFETIME', 600))
+
+# Database maintenance (maintenance.py): orphan cleanup and index maintenance run only between
+# these local hours (start inclusive, end exclusive; may wrap midnight). With MAINTENANCE_IN_APP
+# each app process also runs the scheduler; otherwise run `python maintenance.py` as its own service.
+MAINTENANCE_WINDOW_START = int(os.environ.get('MAINTENANCE_WINDOW_START', 1))
+MAINTENANCE_WINDOW_END = int(os.environ.get('MAINTENANCE_WINDOW_END', 5))
+MAINTENANCE_IN_APP = os.environ.get('MAINTENANCE_IN_APP', '0') == '1'
+
+# Sales dashboard / forecasting database (sales_orders, regions, customers, ...)
+SALES_DB_CONNECTION_STRING = (
+    "Driver={ODBC Driver 17 for SQL Server};"
+    "Server=AQEEF\\SQLEXPRESS;"
+    "Database=sales_forecasting2;"
+    "UID=sa;"
+    "PWD=Aqeef123;"
+)
@@ -0,0 +1,547 @@
+import traceback
+from datetime import date, datetime, timedelta
+from forecast import DEFAULT_ENGINE, SNAPSHOT_ENGINE, format_period_label
+from result_cache import MISSING, current_data_version, get_cached, make_key, put_cached
+from sales_cube import rollup_source
+from sales_db import get_sales_db_connection
+
+# Every section /api/dashboard can return, in the order they are computed
+DASHBOARD_SECTIONS = (
+    'summary',
+    'unique_customers',
+    'sales_funnel',
+    'sales_by_region',
+    'sales_by_customer',
+    'sales_by_salesperson',
+    'sales_by_category',
+    'sales_growth_rate',
+    'repeat_vs_new',
+    'target_vs_achievement',
+    'top_performers',
+    'recent_activity',
+    'pending_orders',
+    'regions',
+    'sales_trend'
+)
+
+# Sections served by the single GROUPING SETS scan of the daily rollup
+BASE_SECTIONS = {
+    'summary', 'unique_customers', 'sales_funnel', 'sales_by_region',
+    'sales_by_customer', 'sales_by_salesperson', 'sales_by_category'
+}
+
+# Sections served by the per-period query
+PERIOD_SECTIONS = {'sales_growth_rate', 'repeat_vs_new'}
+
+# DATEADD/DATEDIFF unit used to truncate order_date to each period type
+PERIOD_UNITS = {
+    'MS': 'MONTH',
+    'QS': 'QUARTER',
+    'YS': 'YEAR',
+    'D': 'DAY'
+}
+
+# Order statuses counted at each funnel stage; None counts every order
+FUNNEL_STAGES = (
+    ('leads', None),
+    ('quotes', ('Quoted', 'Pending', 'Processing', 'Shipped', 'Delivered', 'Completed')),
+    ('orders', ('Processing', 'Shipped', 'Delivered', 'Completed')),
+    ('invoices', ('Delivered', 'Completed'))
+)
+
+ACTIVITY_FILTERS = ('today', 'yesterday', 'this-week', 'this-month')
+TOP_PERFORMERS_LIMIT = 5
+RECENT_ACTIVITY_LIMIT = 10
+PENDING_ORDERS_LIMIT = 50
+DASHBOARD_FORECAST_TIMEOUT = 5   # Seconds to wait for a live forecast before reporting it as pending
+
+# Distinct customers are counted with APPROX_COUNT_DISTINCT (SQL Server 2019+, ~2% error)
+# unless the request passes exact=1. Servers without it fall back to COUNT(DISTINCT).
+APPROX_DISTINCT_FUNCTION = 'APPROX_COUNT_DISTINCT'
+_approx_distinct_supported = True
+
+REGION_LABEL = "(r.country + ' - ' + r.state)"
+
+def _parse_date(value, name):
+    """Parse a YYYY-MM-DD query value into a date"""
+    try:
+        return datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value}")
+
+def _month_bounds(day):
+    """Return the first and last day of the month containing day"""
+    first = day.replace(day=1)
+    next_month = (first + timedelta(days=32)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+def _window_bounds(name, today=None):
+    """Return (start, end) dates for a recent-activity / top-performers window"""
+    today = today or date.today()
+    if name == 'today':
+        return today, today
+    if name == 'yesterday':
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    if name == 'this-week':
+        return today - timedelta(days=today.weekday()), today
+    return today.replace(day=1), today
+
+def normalize_filters(args):
+    """
+    Turn request arguments into the shared dashboard filter.
+
+    Args:
+        args (Mapping): Query arguments (period_type, start_date, end_date, region,
+                        selected_date, forecast_start, engine, activity_filter,
+                        performers_filter, sections, exact)
+
+    Returns:
+        dict: Normalized filters with ISO date strings and a validated section list
+
+    Raises:
+        ValueError: If a value is invalid
+    """
+    period_type = args.get('period_type') or 'MS'
+    if period_type not in PERIOD_UNITS:
+        raise ValueError(f"Invalid period_type: {period_type}")
+
+    end = _parse_date(args['end_date'], 'end_date') if args.get('end_date') else date.today()
+    if args.get('start_date'):
+        start = _parse_date(args['start_date'], 'start_date')
+    else:
+        start = end - timedelta(days=730)
+
+    # A chart's own date menu narrows the range to the selected month
+    selected_date = args.get('selected_date') or None
+    if selected_date and selected_date != 'all':
+        start, end = _month_bounds(_parse_date(selected_date, 'selected_date'))
+    if start > end:
+        raise ValueError("Start Date cannot be after End Date.")
+
+    region = args.get('region') or None
+    if region == 'all':
+        region = None
+
+    activity_filter = args.get('activity_filter') or 'this-week'
+    performers_filter = args.get('performers_filter') or 'this-month'
+    for name, value in (('activity_filter', activity_filter), ('performers_filter', performers_filter)):
+        if value not in ACTIVITY_FILTERS:
+            raise ValueError(f"Invalid {name}: {value}")
+
+    requested = args.get('sections')
+    if requested:
+        sections = [s.strip() for s in requested.split(',') if s.strip()]
+        unknown = [s for s in sections if s not in DASHBOARD_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown dashboard sections: {', '.join(unknown)}")
+    else:
+        sections = list(DASHBOARD_SECTIONS)
+
+    exact_counts = (args.get('exact') or '').lower() in ('1', 'true', 'yes')
+
+    return {
+        'period_type': period_type,
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'region': region,
+        'forecast_start': args.get('forecast_start') or None,
+        'engine': args.get('engine') or None,
+        'activity_filter': activity_filter,
+        'performers_filter': performers_filter,
+        'exact_counts': exact_counts,
+        'sections': sections
+    }
+
+def _region_clause(filters, params):
+    """Return the region predicate for the shared filter and append its parameter"""
+    if not filters['region']:
+        return ''
+    params.append(filters['region'])
+    return f" AND {REGION_LABEL} = ?"
+
+def _distinct_customers(cursor, filters):
+    """
+    Count distinct customers in range, approximately unless filters['exact_counts'] is set.
+
+    Kept out of the GROUPING SETS scan: COUNT(DISTINCT) there is evaluated
+    for every grouping set, while APPROX_COUNT_DISTINCT needs a few KB of
+    memory and no sort regardless of the range.
+    """
+    global _approx_distinct_supported
+    approximate = _approx_distinct_supported and not filters['exact_counts']
+    params = [filters['start_date'], filters['end_date']]
+    region_clause = _region_clause(filters, params)
+    query = f'''
+        SELECT {{aggregate}}
+        FROM {rollup_source(cursor)} cu
+        LEFT JOIN regions r ON cu.region_id = r.region_id
+        WHERE cu.order_day >= ? AND cu.order_day <= ?{region_clause}
+    '''
+    if approximate:
+        try:
+            cursor.execute(query.format(aggregate=f"{APPROX_DISTINCT_FUNCTION}(cu.customer_id)"), params)
+            return {'new_customers': int(cursor.fetchone()[0] or 0), 'approximate': True}
+        except Exception as e:
+            print(f"{APPROX_DISTINCT_FUNCTION} unavailable, using exact counts: {str(e)}")
+            _approx_distinct_supported = False
+    cursor.execute(query.format(aggregate='COUNT(DISTINCT cu.customer_id)'), params)
+    return {'new_customers': int(cursor.fetchone()[0] or 0), 'approximate': False}
+
+def _base_aggregates(cursor, filters):
+    """
+    Scan the daily rollup once and aggregate every breakdown with GROUPING SETS.
+
+    Returns:
+        dict: Section name -> payload for the sections in BASE_SECTIONS
+    """
+    params = [filters['start_date'], filters['end_date']]
+    region_clause = _region_clause(filters, params)
+    cursor.execute(f'''
+        SELECT
+            GROUPING(cu.region_id) AS g_region,
+            GROUPING(cu.customer_id) AS g_customer,
+            GROUPING(cu.salesperson_id) AS g_salesperson,
+            GROUPING(cu.category) AS g_category,
+            GROUPING(cu.status) AS g_status,
+            MAX({REGION_LABEL}) AS region_label,
+            MAX(c.customer_name) AS customer_name,
+            MAX(sp.salesperson_name) AS salesperson_name,
+            cu.category,
+            cu.status,
+            SUM(cu.total_sales) AS total_sales,
+            SUM(cu.order_count) AS order_count
+        FROM {rollup_source(cursor)} cu
+        LEFT JOIN regions r ON cu.region_id = r.region_id
+        LEFT JOIN customers c ON cu.customer_id = c.customer_id
+        LEFT JOIN salespersons sp ON cu.salesperson_id = sp.salesperson_id
+        WHERE cu.order_day >= ? AND cu.order_day <= ?{region_clause}
+        GROUP BY GROUPING SETS (
+            (),
+            (cu.region_id),
+            (cu.customer_id),
+            (cu.salesperson_id),
+            (cu.category),
+            (cu.status)
+        )
+        ORDER BY total_sales DESC
+    ''', params)
+
+    total = {'sales': 0.0, 'orders': 0}
+    regions, customers, salespersons, categories, statuses = [], [], [], [], {}
+    for row in cursor.fetchall():
+        sales = float(row.total_sales or 0)
+        flags = (row.g_region, row.g_customer, row.g_salesperson, row.g_category, row.g_status)
+        if all(flags):
+            total = {'sales': sales, 'orders': int(row.order_count or 0)}
+        elif not row.g_region:
+            regions.append((row.region_label or 'Unknown', sales))
+        elif not row.g_customer:
+            customers.append((row.customer_name or 'Unknown', sales))
+        elif not row.g_salesperson:
+            salespersons.append((row.salesperson_name or 'Unknown', sales))
+        elif not row.g_category:
+            categories.append((row.category or 'Uncategorized', sales))
+        else:
+            statuses[row.status] = int(row.order_count or 0)
+
+    # Rows arrive sorted by sales, so the Pareto line is a cumulative sum.
+    # NumPy is imported here so importing app.py does not load it.
+    import numpy as np
+    customer_sales = np.array([sales for _, sales in customers], dtype=float)
+    if total['sales']:
+        cumulative = np.round(np.cumsum(customer_sales) / total['sales'] * 100, 2).tolist()
+    else:
+        cumulative = [0] * len(customers)
+
+    funnel = {}
+    for stage, stage_statuses in FUNNEL_STAGES:
+        if stage_statuses is None:
+            funnel[stage] = total['orders']
+        else:
+            funnel[stage] = sum(statuses.get(status, 0) for status in stage_statuses)
+
+    return {
+        'summary': {
+            'total_sales': total['sales'],
+            'total_orders': total['orders'],
+            'avg_order_value': total['sales'] / total['orders'] if total['orders'] else 0
+        },
+        'unique_customers': _distinct_customers(cursor, filters),
+        'sales_funnel': funnel,
+        'sales_by_region': {'regions': [n for n, _ in regions], 'sales': [s for _, s in regions]},
+        'sales_by_customer': {
+            'customers': [n for n, _ in customers],
+            'revenues': [s for _, s in customers],
+            'cumulative_percentages': cumulative
+        },
+        'sales_by_salesperson': {'salespersons': [n for n, _ in salespersons], 'sales': [s for _, s in salespersons]},
+        'sales_by_category': {'categories': [n for n, _ in categories], 'sales': [s for _, s in categories]}
+    }
+
+def _columns(rows, width):
+    """Transpose fetched rows into width column tuples (empty tuples when there are no rows)"""
+    return list(zip(*rows)) if rows else [()] * width
+
+def _period_aggregates(cursor, filters):
+    """
+    Total, repeat-customer and new-customer sales and growth per period in one query.
+
+    Growth is computed with LAG over one extra period read before start_date,
+    so the first period in range is compared against its real predecessor;
+    the extra period is then filtered out in SQL.
+    """
+    unit = PERIOD_UNITS[filters['period_type']]
+    trunc = f"DATEADD({unit}, DATEDIFF({unit}, 0, cu.order_day), 0)"
+    params = [filters['start_date'], filters['end_date']]
+    region_clause = _region_clause(filters, params)
+    params.append(filters['start_date'])
+    cursor.execute(f'''
+        SELECT period, total_sales, repeat_sales, new_sales,
+            CASE WHEN previous_sales > 0
+                THEN ROUND((total_sales - previous_sales) * 100.0 / previous_sales, 2)
+                ELSE 0 END AS growth_rate
+        FROM (
+            SELECT
+                {trunc} AS period,
+                CAST(SUM(cu.total_sales) AS FLOAT) AS total_sales,
+                CAST(SUM(cu.total_sales - cu.new_customer_sales) AS FLOAT) AS repeat_sales,
+                CAST(SUM(cu.new_customer_sales) AS FLOAT) AS new_sales,
+                CAST(LAG(SUM(cu.total_sales)) OVER (ORDER BY {trunc}) AS FLOAT) AS previous_sales
+            FROM {rollup_source(cursor)} cu
+            LEFT JOIN regions r ON cu.region_id = r.region_id
+            WHERE cu.order_day >= DATEADD({unit}, DATEDIFF({unit}, 0, ?) - 1, 0)
+                AND cu.order_day <= ?{region_clause}
+            GROUP BY {trunc}
+        ) p
+        WHERE period >= DATEADD({unit}, DATEDIFF({unit}, 0, ?), 0)
+        ORDER BY period
+    ''', params)
+    period_starts, _, repeat_sales, new_sales, growth_rates = _columns(cursor.fetchall(), 5)
+
+    period_type = filters['period_type']
+    periods = [format_period_label(ds, period_type) for ds in period_starts]
+    return {
+        'sales_growth_rate': {'periods': periods, 'growth_rates': list(growth_rates), 'period_type': period_type},
+        'repeat_vs_new': {
+            'periods': periods,
+            'repeat_sales': list(repeat_sales),
+            'new_sales': list(new_sales),
+            'period_type': period_type
+        }
+    }
+
+def _target_vs_achievement(cursor, filters):
+    """
+    Monthly targets for the months from start_date to end_date with the sales and
+    attainment of each salesperson in that month.
+
+    With a region filter only sales in that region count, and only salespersons
+    who sold there that month are listed.
+    """
+    params = []
+    region_clause = ''
+    having = ''
+    if filters['region']:
+        params.append(filters['region'])
+        region_clause = f" AND cu.region_id IN (SELECT r.region_id FROM regions r WHERE {REGION_LABEL} = ?)"
+        having = 'HAVING COUNT(cu.order_day) > 0'
+    params += [filters['start_date'], filters['end_date']]
+    cursor.execute(f'''
+        SELECT
+            sp.salesperson_name + ' (' + CONVERT(CHAR(7), t.target_period, 120) + ')' AS label,
+            CAST(t.target_amount AS FLOAT) AS target,
+            CAST(COALESCE(SUM(cu.total_sales), 0) AS FLOAT) AS achieved,
+            CASE WHEN t.target_amount > 0
+                THEN CAST(COALESCE(SUM(cu.total_sales), 0) * 100.0 / t.target_amount AS FLOAT)
+                ELSE 0 END AS percentage
+        FROM sales_targets t
+        JOIN salespersons sp ON t.salesperson_id = sp.salesperson_id
+        LEFT JOIN {rollup_source(cursor)} cu ON cu.salesperson_id = t.salesperson_id
+            AND cu.order_day >= t.target_period
+            AND cu.order_day < DATEADD(MONTH, 1, t.target_period){region_clause}
+        WHERE t.target_period >= DATEADD(MONTH, DATEDIFF(MONTH, 0, ?), 0) AND t.target_period <= ?
+        GROUP BY t.salesperson_id, sp.salesperson_name, t.target_period, t.target_amount
+        {having}
+        ORDER BY t.target_period, sp.salesperson_name
+    ''', params)
+    labels, targets, achieved, percentages = _columns(cursor.fetchall(), 4)
+    return {
+        'labels': list(labels),
+        'targets': [target or 0 for target in targets],
+        'achieved': list(achieved),
+        'percentages': list(percentages)
+    }
+
+def _top_performers(cursor, filters):
+    """Best salespersons in the performers_filter window, as the Top Performers card expects"""
+    start, end = _window_bounds(filters['performers_filter'])
+    params = [start.isoformat(), end.isoformat()]
+    region_clause = _region_clause(filters, params)
+    cursor.execute(f'''
+        SELECT TOP {TOP_PERFORMERS_LIMIT} sp.salesperson_name, SUM(cu.total_sales) AS total_sales
+        FROM {rollup_source(cursor)} cu
+        JOIN salespersons sp ON cu.salesperson_id = sp.salesperson_id
+        LEFT JOIN regions r ON cu.region_id = r.region_id
+        WHERE cu.order_day >= ? AND cu.order_day <= ?{region_clause}
+        GROUP BY sp.salesperson_id, sp.salesperson_name
+        ORDER BY total_sales DESC
+    ''', params)
+    rows = cursor.fetchall()
+    best = float(rows[0].total_sales or 0) if rows else 0
+    return [{
+        'name': row.salesperson_name,
+        'sales': f"${float(row.total_sales or 0):,.2f} in sales",
+        'image': 'https://via.placeholder.com/48',
+        'progress': round(float(row.total_sales or 0) / best * 100) if best else 0
+    } for row in rows]
+
+def _recent_activity(cursor, filters):
+    """Latest orders in the activity_filter window"""
+    start, end = _window_bounds(filters['activity_filter'])
+    params = [start.isoformat(), end.isoformat()]
+    region_clause = _region_clause(filters, params)
+    cursor.execute(f'''
+        SELECT TOP {RECENT_ACTIVITY_LIMIT} so.order_id, so.order_date, so.total_amount, c.customer_name
+        FROM sales_orders so
+        LEFT JOIN customers c ON so.customer_id = c.customer_id
+        LEFT JOIN regions r ON so.region_id = r.region_id
+        WHERE so.order_date >= ? AND so.order_date < DATEADD(DAY, 1, CAST(? AS DATE)){region_clause}
+        ORDER BY so.order_date DESC, so.order_id DESC
+    ''', params)
+    return {'activities': [{
+        'type': 'order',
+        'description': f"New order #{row.order_id}",
+        'details': f"{row.customer_name or 'Unknown customer'} - ${float(row.total_amount or 0):,.2f}",
+        'time': row.order_date.strftime('%Y-%m-%d') if row.order_date else None
+    } for row in cursor.fetchall()]}
+
+def _pending_orders(cursor, filters):
+    """Orders still waiting to be processed, newest first"""
+    params = []
+    region_clause = _region_clause(filters, params)
+    cursor.execute(f'''
+        SELECT TOP {PENDING_ORDERS_LIMIT} so.order_id, c.customer_name, sp.salesperson_name,
+               so.order_date, so.total_amount
+        FROM sales_orders so
+        LEFT JOIN customers c ON so.customer_id = c.customer_id
+        LEFT JOIN salespersons sp ON so.salesperson_id = sp.salesperson_id
+        LEFT JOIN regions r ON so.region_id = r.region_id
+        WHERE so.status = 'Pending'{region_clause}
+        ORDER BY so.order_date DESC, so.order_id DESC
+    ''', params)
+    return [{
+        'order_id': row.order_id,
+        'customer_name': row.customer_name,
+        'salesperson_name': row.salesperson_name,
+        'order_date': row.order_date.strftime('%Y-%m-%d') if row.order_date else None,
+        'total_amount': float(row.total_amount or 0)
+    } for row in cursor.fetchall()]
+
+def _regions(cursor, filters):
+    """Region labels for the region filter dropdown"""
+    cursor.execute(f"SELECT DISTINCT {REGION_LABEL} AS region_label FROM regions r ORDER BY region_label")
+    return {'regions': [row.region_label for row in cursor.fetchall()]}
+
+def _sales_trend(filters):
+    """
+    Sales trend from the materialized snapshot, falling back to the forecast worker.
+
+    Without an engine filter the snapshot is the Prophet one and the live
+    fallback uses the fast DEFAULT_ENGINE baseline.
+    """
+    from forecast_service import get_forecast
+    from forecast_snapshots import get_forecast_snapshot
+
+    params = {
+        'period_type': filters['period_type'],
+        'start_date': filters['start_date'],
+        'end_date': filters['end_date'],
+        'forecast_start': filters['forecast_start']
+    }
+    snapshot = get_forecast_snapshot(engine=filters['engine'] or SNAPSHOT_ENGINE, **params)
+    if snapshot:
+        return snapshot
+    payload, status = get_forecast(timeout=DASHBOARD_FORECAST_TIMEOUT,
+                                   engine=filters['engine'] or DEFAULT_ENGINE, **params)
+    return {**payload, **status}
+
+# Single-query sections: name -> function(cursor, filters)
+SECTION_QUERIES = {
+    'target_vs_achievement': _target_vs_achievement,
+    'top_performers': _top_performers,
+    'recent_activity': _recent_activity,
+    'pending_orders': _pending_orders,
+    'regions': _regions
+}
+
+def get_dashboard_data(filters):
+    """
+    Compute every requested dashboard section on one sales database connection.
+
+    Aggregates read the daily rollup (sales_cube.py), or sales_orders until the
+    rollup has been built: the breakdowns share one
+    GROUPING SETS scan and the per-period charts share one grouped query.
+    Recent activity and pending orders list individual orders from sales_orders.
+    A failing section reports {'error': ...} without failing the others.
+
+    Sections are cached per normalized filter and sales data version (see
+    result_cache.py), so only sections missing from the cache are queried. The
+    sales trend is not cached here; forecast snapshots and the forecast worker
+    already cache it.
+
+    Args:
+        filters (dict): Output of normalize_filters
+
+    Returns:
+        dict: Section name -> chart payload, plus the applied filters
+    """
+    sections = filters['sections']
+    key_filters = {key: value for key, value in filters.items() if key != 'sections'}
+    data_version = current_data_version()
+    result = {}
+    for name in sections:
+        if name != 'sales_trend':
+            cached = get_cached(make_key('dashboard', key_filters, name), data_version)
+            if cached is not MISSING:
+                result[name] = cached
+    missing = [name for name in sections if name not in result]
+
+    def run(names, compute):
+        try:
+            payloads = compute()
+            for name in names:
+                result[name] = payloads[name]
+            # Grouped queries return sibling sections too; keep them for the next request
+            for name, payload in payloads.items():
+                if name != 'sales_trend':
+                    put_cached(make_key('dashboard', key_filters, name), data_version, payload)
+        except TimeoutError as e:
+            for name in names:
+                result[name] = {'error': f'{str(e)}, please retry shortly'}
+        except Exception as e:
+            print(f"Error computing dashboard sections {', '.join(names)}: {str(e)}")
+            traceback.print_exc()
+            for name in names:
+                result[name] = {'error': str(e)}
+
+    if any(name != 'sales_trend' for name in missing):
+        with get_sales_db_connection() as conn:
+            cursor = conn.cursor()
+            base = [name for name in missing if name in BASE_SECTIONS]
+            if base:
+                run(base, lambda: _base_aggregates(cursor, filters))
+            periods = [name for name in missing if name in PERIOD_SECTIONS]
+            if periods:
+                run(periods, lambda: _period_aggregates(cursor, filters))
+            for name in missing:
+                if name in SECTION_QUERIES:
+                    run([name], lambda: {name: SECTION_QUERIES[name](cursor, filters)})
+
+    if 'sales_trend' in missing:
+        run(['sales_trend'], lambda: {'sales_trend': _sales_trend(filters)})
+
+    ordered = {name: result[name] for name in sections if name in result}
+    ordered['filters'] = key_filters
+    ordered['data_version'] = data_version
+    return ordered
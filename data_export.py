@@ -0,0 +1,207 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from dashboard import PERIOD_UNITS, REGION_LABEL
+from db import get_db_connection
+from sales_cube import rollup_source
+from sales_db import get_sales_db_connection
+
+# Rows fetched per round trip; also one CSV chunk and one Parquet row group
+EXPORT_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+# One row per invoice line item with its invoice header repeated.
+# Invoices without line items are exported once with empty line columns.
+# (column name, arrow type name)
+INVOICE_EXPORT_COLUMNS = (
+    ('invoice_no', 'string'),
+    ('supplier_name', 'string'),
+    ('invoice_date', 'date'),
+    ('due_date', 'date'),
+    ('po_number', 'string'),
+    ('subtotal', 'float'),
+    ('discount', 'float'),
+    ('tax', 'float'),
+    ('total', 'float'),
+    ('line_number', 'int'),
+    ('item_no', 'string'),
+    ('description', 'string'),
+    ('unit', 'string'),
+    ('quantity', 'int'),
+    ('unit_price', 'float'),
+    ('total_price', 'float')
+)
+
+AGGREGATE_EXPORT_COLUMNS = (
+    ('period', 'date'),
+    ('region', 'string'),
+    ('category', 'string'),
+    ('salesperson', 'string'),
+    ('total_sales', 'float'),
+    ('order_count', 'int'),
+    ('new_customer_sales', 'float')
+)
+
+def iter_batches(connect, sql, params=()):
+    """
+    Execute a query and yield its rows in fetchmany batches.
+
+    The connection stays open until the generator is exhausted or closed,
+    so only one batch is held in memory at a time.
+    """
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.arraysize = EXPORT_BATCH_SIZE
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            yield rows
+
+def invoice_batches(start_date=None, end_date=None):
+    """Invoice and line item rows, optionally limited to an invoice_date range (inclusive)"""
+    conditions, params = [], []
+    if start_date:
+        conditions.append("i.invoice_date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("i.invoice_date <= ?")
+        params.append(end_date)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return iter_batches(get_db_connection, f'''
+        SELECT i.invoice_no, s.supplier_name, i.invoice_date, i.due_date, i.po_number,
+               i.subtotal, i.discount, i.tax, i.total,
+               li.line_number, it.item_no, it.description, it.unit,
+               li.quantity, li.unit_price, li.total_price
+        FROM invoices i
+        JOIN suppliers s ON i.key_code = s.key_code
+        LEFT JOIN invoice_line_items li ON li.invoice_no = i.invoice_no
+        LEFT JOIN items it ON li.item_code = it.item_code
+        {where}
+        ORDER BY i.invoice_date, i.invoice_no, li.line_number
+    ''', params)
+
+def aggregate_batches(filters):
+    """
+    Dashboard aggregates per period x region x category x salesperson from the daily rollup.
+
+    Args:
+        filters (dict): Normalized dashboard filters (period_type, start_date, end_date, region)
+    """
+    unit = PERIOD_UNITS[filters['period_type']]
+    trunc = f"DATEADD({unit}, DATEDIFF({unit}, 0, cu.order_day), 0)"
+    params = [filters['start_date'], filters['end_date']]
+    region_clause = ''
+    if filters.get('region'):
+        region_clause = f" AND {REGION_LABEL} = ?"
+        params.append(filters['region'])
+    return iter_batches(get_sales_db_connection, f'''
+        SELECT CAST({trunc} AS DATE) AS period,
+               MAX({REGION_LABEL}) AS region,
+               cu.category,
+               MAX(sp.salesperson_name) AS salesperson,
+               SUM(cu.total_sales), SUM(cu.order_count), SUM(cu.new_customer_sales)
+        FROM {rollup_source()} cu
+        LEFT JOIN regions r ON cu.region_id = r.region_id
+        LEFT JOIN salespersons sp ON cu.salesperson_id = sp.salesperson_id
+        WHERE cu.order_day >= ? AND cu.order_day <= ?{region_clause}
+        GROUP BY {trunc}, cu.region_id, cu.category, cu.salesperson_id
+        ORDER BY period, region, cu.category, salesperson
+    ''', params)
+
+def _csv_value(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return '' if value is None else value
+
+def stream_csv(columns, batches):
+    """Yield a CSV header and then one encoded chunk per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    yield buffer.getvalue().encode('utf-8')
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_available():
+    """Return True if pyarrow can be imported"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def _to_float(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+def stream_parquet(columns, batches):
+    """
+    Yield a Parquet file in chunks, writing one row group per batch.
+
+    Requires pyarrow (pip install pyarrow).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {'string': pa.string(), 'date': pa.date32(), 'float': pa.float64(), 'int': pa.int64()}
+    schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+    try:
+        for rows in batches:
+            values = list(zip(*rows))
+            arrays = []
+            for (_, kind), column in zip(columns, values):
+                if kind == 'float':
+                    column = [_to_float(value) for value in column]
+                arrays.append(pa.array(column, type=arrow_types[kind]))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def stream_export(export_format, columns, batches):
+    """Return the chunk generator for export_format ('csv' or 'parquet')"""
+    if export_format == 'parquet':
+        return stream_parquet(columns, batches)
+    return stream_csv(columns, batches)
@@ -0,0 +1,105 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+# Distinct date strings remembered by normalize_date (invoice and due dates repeat heavily)
+DATE_CACHE_SIZE = 4096
+
+# How each supplier writes ambiguous numeric dates such as 03/04/2025.
+# Unambiguous dates (day > 12, ISO, month names) parse the same for every supplier.
+# Every supplier starts on DMY, the order the original parser tried first; change an
+# entry only once that supplier's invoices are known to use another order.
+SUPPLIER_DATE_ORDER = {
+    'SUPPLIER1': 'DMY',
+    'SUPPLIER2': 'DMY',
+    'SUPPLIER3': 'DMY'
+}
+DEFAULT_DATE_ORDER = 'DMY'
+
+MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), start=1)}
+
+# One precompiled pattern per shape; the first character picks which ones are tried
+ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ].*)?$')
+NUMERIC_DATE = re.compile(r'(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})$')
+MONTH_NAME_DATE = re.compile(r'(\d{1,2})[\s-]+([A-Za-z]{3,9})\.?[\s,-]+(\d{4})$')
+
+def supplier_date_order(company_key):
+    """Return 'DMY' or 'MDY' for a supplier's ambiguous numeric dates"""
+    return SUPPLIER_DATE_ORDER.get(company_key, DEFAULT_DATE_ORDER)
+
+def _build(year, month, day):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse(text, order):
+    if len(text) >= 8 and text[4] == '-':
+        match = ISO_DATE.match(text)
+        return _build(int(match.group(1)), int(match.group(2)), int(match.group(3))) if match else None
+
+    match = NUMERIC_DATE.match(text)
+    if match:
+        first, second, year = int(match.group(1)), int(match.group(2)), int(match.group(3))
+        day, month = (second, first) if order == 'MDY' else (first, second)
+        # A field above 12 can only be the day, whichever order the supplier uses
+        return _build(year, month, day) or _build(year, day, month)
+
+    match = MONTH_NAME_DATE.match(text)
+    if match:
+        month = MONTHS.get(match.group(2)[:3].lower())
+        return _build(int(match.group(3)), month, int(match.group(1))) if month else None
+    return None
+
+def normalize_date(value, order=DEFAULT_DATE_ORDER):
+    """
+    Parse a date in any format the invoices and database use.
+
+    Args:
+        value (str, date or datetime): e.g. 15-01-2025, 01/15/2025, 2025-01-15, 15-Jan-2025, 15 January 2025
+        order (str): 'DMY' or 'MDY', used only when both numeric fields could be the month
+
+    Returns:
+        date: The parsed date, or None if value is empty or not a recognized date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value or not isinstance(value, str):
+        return None
+    return _parse(value.strip(), order)
+
+def format_date(value, fmt='%d-%m-%Y', order=DEFAULT_DATE_ORDER, default=''):
+    """Normalize value and format it with fmt; returns default if it is not a date"""
+    parsed = normalize_date(value, order)
+    return parsed.strftime(fmt) if parsed else default
+
+def normalize_date_column(values, order=DEFAULT_DATE_ORDER, fmt=None, default=None):
+    """
+    Normalize a whole column of dates, parsing each distinct value once.
+
+    Args:
+        values (iterable): Dates as strings, date objects or None
+        order (str): 'DMY' or 'MDY' for ambiguous numeric dates
+        fmt (str, optional): strftime format; date objects are returned when omitted
+        default: Value used for entries that are not dates
+
+    Returns:
+        list: One normalized entry per input value
+    """
+    values = list(values)
+    converted = {}
+    for value in set(values):
+        parsed = normalize_date(value, order)
+        if parsed is None:
+            converted[value] = default
+        else:
+            converted[value] = parsed.strftime(fmt) if fmt else parsed
+    return [converted[value] for value in values]
+
+def date_cache_info():
+    """Hit/miss counts of the normalize_date memo cache"""
+    return _parse.cache_info()._asdict()
@@ -1,17 +1,13 @@
-import pyodbc
-from config import DB_CONNECTION_STRING
 from contextlib import contextmanager
+from db_backend import get_dialect
 import time
 import traceback
 from datetime import datetime
 from decimal import Decimal
 
-# Enable pyodbc connection pooling
-pyodbc.pooling = True
-
 def get_connection():
-    """Get a SQL Server connection"""
-    return pyodbc.connect(DB_CONNECTION_STRING)
+    """Get a connection to the invoice database on the configured engine (SQL Server or SQLite)"""
+    return get_dialect().connect()
 
 @contextmanager
 def get_db_connection():
@@ -24,113 +20,118 @@ def get_db_connection():
 
 def create_tables():
     """Create necessary database tables with transaction handling"""
+    dialect = get_dialect()
     try:
         with get_db_connection() as conn:
             conn.autocommit = False
             cursor = conn.cursor()
             try:
                 # Create suppliers table (master table)
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'suppliers')
-                    CREATE TABLE suppliers (
-                        key_code INT IDENTITY(1,1) PRIMARY KEY,
-                        key_name NVARCHAR(50) NOT NULL,
-                        supplier_name NVARCHAR(255) NOT NULL,
-                        supplier_email NVARCHAR(255),
-                        supplier_phone NVARCHAR(20),
-                        contact_person NVARCHAR(100),
-                        supplier_country NVARCHAR(200),
-                        company_name NVARCHAR(510) NOT NULL,
-                        gst_number NVARCHAR(30) NOT NULL,
-                        street NVARCHAR(510) NOT NULL,
-                        city NVARCHAR(200) NOT NULL,
-                        state NVARCHAR(200) NOT NULL,
-                        zipcode NVARCHAR(40) NOT NULL,
-                        country NVARCHAR(200) NOT NULL,
-                        terms NVARCHAR(200) NOT NULL,
-                        shipping_method NVARCHAR(200) NOT NULL
-                    )
-                ''')
+                if not dialect.table_exists(cursor, 'suppliers'):
+                        cursor.execute(f'''
+                        CREATE TABLE suppliers (
+                            key_code {dialect.identity_column.format(start=1)},
+                            key_name NVARCHAR(50) NOT NULL,
+                            supplier_name NVARCHAR(255) NOT NULL,
+                            supplier_email NVARCHAR(255),
+                            supplier_phone NVARCHAR(20),
+                            contact_person NVARCHAR(100),
+                            supplier_country NVARCHAR(200),
+                            company_name NVARCHAR(510) NOT NULL,
+                            gst_number NVARCHAR(30) NOT NULL,
+                            street NVARCHAR(510) NOT NULL,
+                            city NVARCHAR(200) NOT NULL,
+                            state NVARCHAR(200) NOT NULL,
+                            zipcode NVARCHAR(40) NOT NULL,
+                            country NVARCHAR(200) NOT NULL,
+                            terms NVARCHAR(200) NOT NULL,
+                            shipping_method NVARCHAR(200) NOT NULL
+                        )
+                    ''')
 
                 # Create items table (master table for line items)
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'items')
-                    CREATE TABLE items (
-                        item_code INT IDENTITY(1000,1) PRIMARY KEY,
-                        CONSTRAINT CHK_item_code_4_digits CHECK (item_code BETWEEN 1000 AND 9999),
-                        item_no NVARCHAR(50) NOT NULL UNIQUE,
-                        description NVARCHAR(255) NOT NULL,
-                        unit NVARCHAR(50) NOT NULL,
-                        default_unit_price DECIMAL(18,2) NULL,
-                        category NVARCHAR(100) NULL
-                    )
-                ''')
+                if not dialect.table_exists(cursor, 'items'):
+                        cursor.execute(f'''
+                        CREATE TABLE items (
+                            item_code {dialect.identity_column.format(start=1000)},
+                                item_no NVARCHAR(50) NOT NULL UNIQUE,
+                            description NVARCHAR(255) NOT NULL,
+                            unit NVARCHAR(50) NOT NULL,
+                            default_unit_price DECIMAL(18,2) NULL,
+                            category NVARCHAR(100) NULL,
+                            CONSTRAINT CHK_item_code_4_digits CHECK (item_code BETWEEN 1000 AND 9999)
+                        )
+                    ''')
 
                 # Create invoices table
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'invoices')
-                    CREATE TABLE invoices (
-                        invoice_no NVARCHAR(50) PRIMARY KEY,
-                        key_code INT NOT NULL,
-                        invoice_date DATE NULL,
-                        due_date DATE NULL,
-                        po_number NVARCHAR(100) NOT NULL,
-                        subtotal DECIMAL(10,2) NULL,
-                        discount DECIMAL(10,2) NULL,
-                        tax DECIMAL(10,2) NULL,
-                        total DECIMAL(10,2) NULL,
-                        FOREIGN KEY (key_code) REFERENCES suppliers(key_code)
-                    )
-                ''')
+                if not dialect.table_exists(cursor, 'invoices'):
+                        cursor.execute(f'''
+                        CREATE TABLE invoices (
+                            invoice_no NVARCHAR(50) PRIMARY KEY,
+                            key_code INT NOT NULL,
+                            invoice_date DATE NULL,
+                            due_date DATE NULL,
+                            po_number NVARCHAR(100) NOT NULL,
+                            subtotal DECIMAL(10,2) NULL,
+                            discount DECIMAL(10,2) NULL,
+                            tax DECIMAL(10,2) NULL,
+                            total DECIMAL(10,2) NULL,
+                            FOREIGN KEY (key_code) REFERENCES suppliers(key_code)
+                        )
+                    ''')
 
                 # Create invoice_line_items table
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'invoice_line_items')
-                    CREATE TABLE invoice_line_items (
-                        key_code INT NOT NULL,
-                        invoice_no NVARCHAR(50) NOT NULL,
-                        item_code INT NOT NULL,
-                        quantity INT NOT NULL,
-                        unit_price DECIMAL(18,2) NOT NULL,
-                        total_price DECIMAL(18,2) NOT NULL,
-                        line_number INT NOT NULL,
-                        PRIMARY KEY (invoice_no, line_number),
-                        FOREIGN KEY (key_code) REFERENCES suppliers(key_code),
-                        FOREIGN KEY (invoice_no) REFERENCES invoices(invoice_no),
-                        FOREIGN KEY (item_code) REFERENCES items(item_code)
-                    )
-                ''')
+                if not dialect.table_exists(cursor, 'invoice_line_items'):
+                        cursor.execute(f'''
+                        CREATE TABLE invoice_line_items (
+                            key_code INT NOT NULL,
+                            invoice_no NVARCHAR(50) NOT NULL,
+                            item_code INT NOT NULL,
+                            quantity INT NOT NULL,
+                            unit_price DECIMAL(18,2) NOT NULL,
+                            total_price DECIMAL(18,2) NOT NULL,
+                            line_number INT NOT NULL,
+                            PRIMARY KEY (invoice_no, line_number),
+                            FOREIGN KEY (key_code) REFERENCES suppliers(key_code),
+                            FOREIGN KEY (invoice_no) REFERENCES invoices(invoice_no),
+                            FOREIGN KEY (item_code) REFERENCES items(item_code)
+                        )
+                    ''')
+
+                dialect.set_identity_start(cursor, 'items', 1000)
 
                 # Seed suppliers table
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM suppliers WHERE key_name = 'SUPPLIER1')
-                    INSERT INTO suppliers (
-                        key_name, supplier_name, supplier_email, supplier_phone, contact_person, supplier_country,
-                        company_name, gst_number, street, city, state, zipcode, country,
-                        terms, shipping_method
-                    )
-                    VALUES
-                        ('SUPPLIER1', 'Tech Solutions Pvt. Ltd.', 'contact@techsolutions.in', '+91-80-12345678', 'Amit Sharma', 'India',
-                        'Tech Solutions Pvt. Ltd.', '29AABC1234K1Z5', '123 Tech Street', 'Bangalore', 'Karnataka', '560001', 'India',
-                        'Net 30', 'Courier'),
-                        ('SUPPLIER2', 'Global Imports Inc.', 'info@globalimports.com', '+1-212-555-0101', 'John Doe', 'USA',
-                        'Global Imports Inc.', '19BBCD5678M1Z7', '456 Global Avenue', 'New York', 'NY', '10001', 'USA',
-                        'Net 30', 'Freight'),
-                        ('SUPPLIER3', 'NexGen Enterprises', 'support@nexgen.ca', '+1-416-555-0199', 'Sarah Lee', 'Canada',
-                        'NexGen Enterprises', '39CCDE9012N1Z3', '789 NexGen Road', 'Toronto', 'ON', 'M5V2T6', 'Canada',
-                        'Net 30', 'Air')
-                ''')
+                cursor.execute("SELECT 1 FROM suppliers WHERE key_name = 'SUPPLIER1'")
+                if not cursor.fetchone():
+                    cursor.execute('''
+                        INSERT INTO suppliers (
+                            key_name, supplier_name, supplier_email, supplier_phone, contact_person, supplier_country,
+                            company_name, gst_number, street, city, state, zipcode, country,
+                            terms, shipping_method
+                        )
+                        VALUES
+                            ('SUPPLIER1', 'Tech Solutions Pvt. Ltd.', 'contact@techsolutions.in', '+91-80-12345678', 'Amit Sharma', 'India',
+                            'Tech Solutions Pvt. Ltd.', '29AABC1234K1Z5', '123 Tech Street', 'Bangalore', 'Karnataka', '560001', 'India',
+                            'Net 30', 'Courier'),
+                            ('SUPPLIER2', 'Global Imports Inc.', 'info@globalimports.com', '+1-212-555-0101', 'John Doe', 'USA',
+                            'Global Imports Inc.', '19BBCD5678M1Z7', '456 Global Avenue', 'New York', 'NY', '10001', 'USA',
+                            'Net 30', 'Freight'),
+                            ('SUPPLIER3', 'NexGen Enterprises', 'support@nexgen.ca', '+1-416-555-0199', 'Sarah Lee', 'Canada',
+                            'NexGen Enterprises', '39CCDE9012N1Z3', '789 NexGen Road', 'Toronto', 'ON', 'M5V2T6', 'Canada',
+                            'Net 30', 'Air')
+                    ''')
 
                 # Seed items table
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM items WHERE item_no = 'ITEM-0001')
-                    INSERT INTO items (item_no, description, unit, default_unit_price, category)
-                    VALUES
-                        ('ITEM-0001', 'Premium Server Rack with Cooling', 'Piece', 1000.00, 'Electronics'),
-                        ('ITEM-0002', 'Server Rack with Cooling and Cable Management', 'Piece', 1200.00, 'Electronics'),
-                        ('ITEM-0003', 'Standard Widget', 'Piece', 50.00, 'Components'),
-                        ('ITEM-0004', 'High-Capacity Gadget', 'Piece', 200.00, 'Components')
-                ''')
+                cursor.execute("SELECT 1 FROM items WHERE item_no = 'ITEM-0001'")
+                if not cursor.fetchone():
+                    cursor.execute('''
+                        INSERT INTO items (item_no, description, unit, default_unit_price, category)
+                        VALUES
+                            ('ITEM-0001', 'Premium Server Rack with Cooling', 'Piece', 1000.00, 'Electronics'),
+                            ('ITEM-0002', 'Server Rack with Cooling and Cable Management', 'Piece', 1200.00, 'Electronics'),
+                            ('ITEM-0003', 'Standard Widget', 'Piece', 50.00, 'Components'),
+                            ('ITEM-0004', 'High-Capacity Gadget', 'Piece', 200.00, 'Components')
+                    ''')
 
                 conn.commit()
                 print("Tables created and seeded successfully")
@@ -151,22 +152,11 @@ def create_indexes():
             conn.autocommit = False
             cursor = conn.cursor()
             try:
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoice_line_items_invoice_no')
-                    CREATE NONCLUSTERED INDEX IX_invoice_line_items_invoice_no ON invoice_line_items (invoice_no)
-                ''')
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoice_line_items_item_code')
-                    CREATE NONCLUSTERED INDEX IX_invoice_line_items_item_code ON invoice_line_items (item_code)
-                ''')
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoices_key_code')
-                    CREATE NONCLUSTERED INDEX IX_invoices_key_code ON invoices (key_code)
-                ''')
-                cursor.execute('''
-                    IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = 'IX_invoice_line_items_key_code')
-                    CREATE NONCLUSTERED INDEX IX_invoice_line_items_key_code ON invoice_line_items (key_code)
-                ''')
+                dialect = get_dialect()
+                dialect.create_index(cursor, 'IX_invoice_line_items_invoice_no', 'invoice_line_items', 'invoice_no')
+                dialect.create_index(cursor, 'IX_invoice_line_items_item_code', 'invoice_line_items', 'item_code')
+                dialect.create_index(cursor, 'IX_invoices_key_code', 'invoices', 'key_code')
+                dialect.create_index(cursor, 'IX_invoice_line_items_key_code', 'invoice_line_items', 'key_code')
                 conn.commit()
                 print("Indexes created successfully")
             except Exception as e:
@@ -180,15 +170,13 @@ def create_indexes():
         traceback.print_exc()
 
 def optimize_connection_settings():
-    """Configure SQL Server-specific optimizations with transaction handling"""
+    """Configure engine-specific session settings with transaction handling"""
     try:
         with get_db_connection() as conn:
             conn.autocommit = False
             cursor = conn.cursor()
             try:
-                cursor.execute("SET ARITHABORT ON")
-                cursor.execute("SET NUMERIC_ROUNDABORT OFF")
-                cursor.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+                get_dialect().session_settings(cursor)
                 conn.commit()
                 print("Connection settings optimized successfully")
             except Exception as e:
@@ -201,15 +189,30 @@ def optimize_connection_settings():
         print(f"Failed to optimize connection settings: {str(e)}")
         traceback.print_exc()
 
+# Suppliers and items change rarely; each process keeps one copy for this many seconds.
+# Writes in this process invalidate it at once; other workers catch up within the TTL.
+REFERENCE_CACHE_TTL = 60
+_reference_cache = {}
+
+def _cached_reference(name, sql):
+    entry = _reference_cache.get(name)
+    if entry and time.time() - entry[0] < REFERENCE_CACHE_TTL:
+        return entry[1]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+    _reference_cache[name] = (time.time(), rows)
+    return rows
+
+def invalidate_reference_cache():
+    """Drop the cached suppliers and items, e.g. after inserting new items"""
+    _reference_cache.clear()
+
 def get_all_suppliers():
     """Retrieve all suppliers from the suppliers table"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT key_name, supplier_name FROM suppliers ORDER BY supplier_name")
-            suppliers = cursor.fetchall()
-            print(f"Retrieved {len(suppliers)} suppliers")
-            return suppliers
+        return _cached_reference('suppliers', "SELECT key_name, supplier_name FROM suppliers ORDER BY supplier_name")
     except Exception as e:
         print(f"Error retrieving suppliers: {str(e)}")
         traceback.print_exc()
@@ -218,12 +221,7 @@ def get_all_suppliers():
 def get_all_items():
     """Retrieve all items from the items table"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT item_code, item_no, description, unit, default_unit_price, category FROM items ORDER BY item_no")
-            items = cursor.fetchall()
-            print(f"Retrieved {len(items)} items")
-            return items
+        return _cached_reference('items', "SELECT item_code, item_no, description, unit, default_unit_price, category FROM items ORDER BY item_no")
     except Exception as e:
         print(f"Error retrieving items: {str(e)}")
         traceback.print_exc()
@@ -287,12 +285,10 @@ def insert_invoice_with_line_items(
                             WHERE item_code = ?
                         ''', (description, unit, default_unit_price, item_code))
                     else:
-                        cursor.execute('''
-                            INSERT INTO items (item_no, description, unit, default_unit_price)
-                            OUTPUT INSERTED.item_code
-                            VALUES (?, ?, ?, ?)
-                        ''', (item_no, description, unit, default_unit_price))
-                        item_code = cursor.fetchone()[0]
+                        item_code = get_dialect().insert_returning_id(
+                            cursor, 'items', ('item_no', 'description', 'unit', 'default_unit_price'),
+                            (item_no, description, unit, default_unit_price), 'item_code'
+                        )
 
                     cursor.execute('''
                         INSERT INTO invoice_line_items (
@@ -311,6 +307,7 @@ def insert_invoice_with_line_items(
                     print(f"Inserted line item {item_no} (item_code: {item_code}) for invoice {invoice_no}")
 
                 conn.commit()
+                invalidate_reference_cache()
                 print(f"Successfully saved invoice {invoice_no} with {len(line_items)} line items")
             except Exception as e:
                 conn.rollback()
@@ -411,11 +408,7 @@ def get_all_invoices():
                 GROUP BY i.invoice_no, s.supplier_name, i.total, i.invoice_date, i.due_date
                 ORDER BY i.invoice_no DESC
             """)
-            invoices = cursor.fetchall()
-            # Log the types of invoice_date and due_date
-            for invoice in invoices:
-                print(f"Invoice {invoice[0]}: invoice_date={invoice[4]}, type={type(invoice[4])}, due_date={invoice[5]}, type={type(invoice[5])}")
-            return invoices
+            return cursor.fetchall()
     except Exception as e:
         print(f"Error retrieving all invoices: {str(e)}")
         traceback.print_exc()
@@ -514,6 +507,9 @@ def test_connection():
     
 def check_for_hanging_transactions():
     """Check for and kill any hanging or blocking transactions"""
+    if not get_dialect().supports_dmvs:
+        print(f"Blocking transaction check is not available on {get_dialect().name}")
+        return
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -564,33 +560,39 @@ def check_for_hanging_transactions():
         print(f"Error checking for blocking transactions: {str(e)}")
         traceback.print_exc()
 
-def fix_orphaned_line_items():
-    """Find and fix orphaned line items (not associated with valid invoices)"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT li.invoice_no, COUNT(*) as orphaned_count
-                FROM invoice_line_items li
-                LEFT JOIN invoices i ON li.invoice_no = i.invoice_no
-                WHERE i.invoice_no IS NULL
-                GROUP BY li.invoice_no
-            ''')
-            
-            orphaned_items = cursor.fetchall()
-            if orphaned_items:
-                print(f"Found {len(orphaned_items)} invoices with orphaned line items")
-                for item in orphaned_items:
-                    print(f"Invoice {item.invoice_no} has {item.orphaned_count} orphaned items")
-                    cursor.execute("DELETE FROM invoice_line_items WHERE invoice_no = ?", (item.invoice_no,))
-                    deleted_count = cursor.rowcount
-                    print(f"Deleted {deleted_count} orphaned items for invoice {item.invoice_no}")
-                    conn.commit()
-            else:
-                print("No orphaned line items found")
-    except Exception as e:
-        print(f"Error fixing orphaned line items: {str(e)}")
-        traceback.print_exc()
+# Orphaned line items deleted per transaction, so each DELETE holds its locks only briefly
+ORPHAN_DELETE_BATCH = 1000
+
+def fix_orphaned_line_items(batch_size=ORPHAN_DELETE_BATCH, deadline=None, lock_timeout_ms=None):
+    """
+    Delete line items whose invoice no longer exists, batch_size rows per transaction.
+
+    Args:
+        batch_size (int): Rows deleted and committed per statement
+        deadline (float, optional): time.time() after which no new batch is started
+        lock_timeout_ms (int, optional): Give up on a batch that waits this long for a lock
+
+    Returns:
+        int: Number of line items deleted
+    """
+    dialect = get_dialect()
+    deleted = 0
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if lock_timeout_ms is not None:
+            dialect.set_lock_timeout(cursor, lock_timeout_ms)
+        while deadline is None or time.time() < deadline:
+            count = dialect.delete_batch(
+                cursor, 'invoice_line_items',
+                "NOT EXISTS (SELECT 1 FROM invoices i WHERE i.invoice_no = invoice_line_items.invoice_no)",
+                batch_size
+            )
+            conn.commit()
+            deleted += count
+            if count < batch_size:
+                break
+    print(f"Deleted {deleted} orphaned line items")
+    return deleted
 
 # Initialize database
 if __name__ == '__main__':
@@ -0,0 +1,255 @@
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from config import DB_BACKEND, DB_CONNECTION_STRING, SQLITE_DB_PATH
+
+class SqlServerDialect:
+    """The production invoice database: SQL Server through pyodbc"""
+
+    name = 'sqlserver'
+    identity_column = 'INT IDENTITY({start},1) PRIMARY KEY'
+    text_column = 'NVARCHAR(MAX)'
+    supports_dmvs = True
+
+    def __init__(self, connection_string=DB_CONNECTION_STRING):
+        import pyodbc
+        pyodbc.pooling = True
+        self.pyodbc = pyodbc
+        self.connection_string = connection_string
+
+    def connect(self):
+        return self.pyodbc.connect(self.connection_string)
+
+    def table_exists(self, cursor, table):
+        cursor.execute("SELECT 1 FROM sys.tables WHERE name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    def create_index(self, cursor, name, table, columns):
+        cursor.execute(f'''
+            IF NOT EXISTS (SELECT * FROM sys.indexes WHERE name = '{name}')
+            CREATE NONCLUSTERED INDEX {name} ON {table} ({columns})
+        ''')
+
+    def insert_returning_id(self, cursor, table, columns, values, id_column):
+        """INSERT one row and return its generated id column"""
+        placeholders = ', '.join('?' for _ in columns)
+        cursor.execute(f'''
+            INSERT INTO {table} ({', '.join(columns)})
+            OUTPUT INSERTED.{id_column}
+            VALUES ({placeholders})
+        ''', values)
+        return cursor.fetchone()[0]
+
+    def set_identity_start(self, cursor, table, start):
+        pass  # IDENTITY(start, 1) is part of the column definition
+
+    def set_lock_timeout(self, cursor, milliseconds):
+        """Fail a statement that waits on a lock longer than this instead of blocking"""
+        cursor.execute(f"SET LOCK_TIMEOUT {int(milliseconds)}")
+
+    def delete_batch(self, cursor, table, condition, batch_size):
+        """DELETE at most batch_size rows matching condition; returns the number deleted"""
+        cursor.execute(f"DELETE TOP ({int(batch_size)}) FROM {table} WHERE {condition}")
+        return cursor.rowcount
+
+    def session_settings(self, cursor):
+        cursor.execute("SET ARITHABORT ON")
+        cursor.execute("SET NUMERIC_ROUNDABORT OFF")
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
+
+class _SqliteConnection:
+    """sqlite3 connection with the pyodbc surface db.py and app.py use (autocommit, attribute rows)"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._autocommit = True
+
+    @property
+    def autocommit(self):
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        # Leaving a transaction with autocommit = True commits it, as pyodbc does
+        if value and not self._autocommit and self._conn.in_transaction:
+            self._conn.commit()
+        self._autocommit = value
+
+    def cursor(self):
+        return _SqliteCursor(self)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()
+        self._conn.close()
+
+class _SqliteCursor:
+    """Cursor that commits each statement when its connection is in autocommit mode"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+        self.arraysize = 1
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(sql, params)
+        if self.connection.autocommit and self.connection._conn.in_transaction \
+                and self._cursor.description is None:
+            self.connection._conn.commit()
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(sql, seq_of_params)
+        if self.connection.autocommit and self.connection._conn.in_transaction:
+            self.connection._conn.commit()
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+@lru_cache(maxsize=256)
+def _row_type(fields):
+    row_type = namedtuple('Row', fields, rename=True)
+    # pyodbc rows carry the cursor description; app.py reads column names from it
+    row_type.cursor_description = tuple((name, None, None, None, None, None, None) for name in fields)
+    return row_type
+
+def _row_factory(cursor, row):
+    """Rows support both row[0] and row.column access, like pyodbc rows"""
+    return _row_type(tuple(column[0] for column in cursor.description))(*row)
+
+class SqliteDialect:
+    """
+    Local SQLite engine for offline development and load testing.
+
+    path is a database file or ':memory:'. An in-memory database is shared
+    by every connection in the process and lives as long as the dialect.
+    """
+
+    name = 'sqlite'
+    identity_column = 'INTEGER PRIMARY KEY AUTOINCREMENT'
+    text_column = 'TEXT'
+    supports_dmvs = False
+
+    def __init__(self, path=SQLITE_DB_PATH):
+        self.path = path
+        self._keepalive = None
+        if path == ':memory:':
+            self.uri = f"file:invoices_{id(self)}?mode=memory&cache=shared"
+            self._keepalive = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        else:
+            self.uri = None
+
+    def connect(self):
+        if self.uri:
+            conn = sqlite3.connect(self.uri, uri=True, timeout=30, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        else:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.row_factory = _row_factory
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return _SqliteConnection(conn)
+
+    def table_exists(self, cursor, table):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+        return cursor.fetchone() is not None
+
+    def create_index(self, cursor, name, table, columns):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+
+    def insert_returning_id(self, cursor, table, columns, values, id_column):
+        placeholders = ', '.join('?' for _ in columns)
+        cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+        cursor.execute(f"SELECT {id_column} FROM {table} WHERE rowid = last_insert_rowid()")
+        return cursor.fetchone()[0]
+
+    def set_identity_start(self, cursor, table, start):
+        """Make the next AUTOINCREMENT id of an empty table equal start"""
+        cursor.execute("SELECT COUNT(*) FROM sqlite_sequence WHERE name = ?", (table,))
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, start - 1))
+
+    def set_lock_timeout(self, cursor, milliseconds):
+        cursor.execute(f"PRAGMA busy_timeout = {int(milliseconds)}")
+
+    def delete_batch(self, cursor, table, condition, batch_size):
+        cursor.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {condition} LIMIT {int(batch_size)})")
+        return cursor.rowcount
+
+    def session_settings(self, cursor):
+        # WAL lets readers run while a writer commits; NORMAL sync is safe with WAL
+        if not self.uri:
+            cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+
+# DECIMAL columns are stored as REAL and dates as ISO strings in SQLite
+sqlite3.register_adapter(Decimal, float)
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_adapter(datetime, datetime.isoformat)
+
+def _convert_date(value):
+    """Return DATE columns as date objects, or the stored text if it is not an ISO date"""
+    text = value.decode()
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+sqlite3.register_converter('DATE', _convert_date)
+
+DIALECTS = {
+    'sqlserver': SqlServerDialect,
+    'sqlite': SqliteDialect
+}
+
+_lock = threading.Lock()
+_dialect = None
+
+def get_dialect():
+    """Return the configured invoice database dialect (DB_BACKEND in config.py)"""
+    global _dialect
+    if _dialect is None:
+        with _lock:
+            if _dialect is None:
+                _dialect = DIALECTS[DB_BACKEND]()
+    return _dialect
+
+def set_dialect(dialect):
+    """
+    Switch the invoice database engine at runtime, e.g. for a benchmark run.
+
+    Args:
+        dialect (str or object): 'sqlserver', 'sqlite' or a dialect instance
+    """
+    global _dialect
+    with _lock:
+        _dialect = DIALECTS[dialect]() if isinstance(dialect, str) else dialect
+    return _dialect
@@ -1,63 +1,98 @@
-import pandas as pd
-import numpy as np
-from prophet import Prophet
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from joblib import Parallel, delayed
+import importlib
 import multiprocessing
-import pyodbc
+import logging
+import threading
 from datetime import datetime
+from sales_db import get_sales_connection
 
-# SQL Server connection configuration
-db_config = {
-    'server': 'AQEEF\SQLEXPRESS',  # Replace with your SQL Server instance, e.g., 'AQEEF\SQLEXPRESS\SQLEXPRESS'
-    'database': 'sales_forecasting2',
-    'user': 'sa',  # Replace with your SQL Server username
-    'password': 'Aqeef123',  # Replace with your SQL Server password
-    'driver': '{ODBC Driver 17 for SQL Server}'  # Adjust based on your installed ODBC driver
-}
+# Heavy dependencies are bound on first use by load_engine(), so importing this
+# module stays cheap for web workers that never forecast
+pd = None
+np = None
+forecast_baselines = None
+Prophet = None
+Parallel = None
+delayed = None
+
+_engine_lock = threading.Lock()
+
+# Engine used when callers do not pick one; the NumPy baselines in
+# forecast_baselines.ENGINES fit in milliseconds for interactive calls
+DEFAULT_ENGINE = 'holt_winters'
+
+# Engine for offline work (forecast snapshots, the report below), where fit time does not matter
+SNAPSHOT_ENGINE = 'prophet'
+
+def load_engine(include_prophet=False):
+    """
+    Import the forecasting dependencies into this module on first use.
+    
+    Args:
+        include_prophet (bool): Also import Prophet and joblib (seconds, loads cmdstan)
+    """
+    global pd, np, forecast_baselines, Prophet, Parallel, delayed
+    if np is not None and (Prophet is not None or not include_prophet):
+        return
+    with _engine_lock:
+        if np is None:
+            np = importlib.import_module('numpy')
+            pd = importlib.import_module('pandas')
+            forecast_baselines = importlib.import_module('forecast_baselines')
+        if include_prophet and Prophet is None:
+            joblib = importlib.import_module('joblib')
+            Parallel, delayed = joblib.Parallel, joblib.delayed
+            Prophet = importlib.import_module('prophet').Prophet
+
+def prewarm(engine=DEFAULT_ENGINE, fit=False):
+    """
+    Load the dependencies of one forecasting engine ahead of the first request.
+    
+    Meant for a dedicated forecast worker; web workers should not call it.
+    
+    Args:
+        engine (str): Engine to prepare; Prophet is only imported for 'prophet'
+        fit (bool): Also fit a tiny Prophet model so cmdstan is loaded and ready (Prophet only)
+    """
+    start = datetime.now()
+    load_engine(include_prophet=engine == 'prophet')
+    if fit and engine == 'prophet':
+        sample = pd.DataFrame({
+            'ds': pd.date_range('2024-01-01', periods=12, freq='MS'),
+            'y': np.linspace(1.0, 12.0, 12)
+        })
+        Prophet(yearly_seasonality=False, weekly_seasonality=False, daily_seasonality=False).fit(sample)
+    print(f"Forecast engine prewarmed in {(datetime.now() - start).total_seconds():.2f}s")
 
 def load_sales_data(period_type='MS'):
+    """Load total sales per period from the daily rollup (sales_orders until it is built, see sales_cube.py)"""
+    load_engine()
+    from sales_cube import rollup_source
     try:
-        conn_str = (
-            f"DRIVER={db_config['driver']};"
-            f"SERVER={db_config['server']};"
-            f"DATABASE={db_config['database']};"
-            f"UID={db_config['user']};"
-            f"PWD={db_config['password']}"
-        )
-        conn = pyodbc.connect(conn_str)
+        conn = get_sales_connection()
+        source = rollup_source(conn.cursor())
         
         if period_type == 'MS':
-            date_trunc = "DATEADD(MONTH, DATEDIFF(MONTH, 0, order_date), 0)"
+            date_trunc = "DATEADD(MONTH, DATEDIFF(MONTH, 0, order_day), 0)"
         elif period_type == 'QS':
-            date_trunc = "DATEADD(QUARTER, DATEDIFF(QUARTER, 0, order_date), 0)"
+            date_trunc = "DATEADD(QUARTER, DATEDIFF(QUARTER, 0, order_day), 0)"
         elif period_type == 'YS':
-            date_trunc = "DATEADD(YEAR, DATEDIFF(YEAR, 0, order_date), 0)"
+            date_trunc = "DATEADD(YEAR, DATEDIFF(YEAR, 0, order_day), 0)"
         else:
-            date_trunc = "CAST(order_date AS DATE)"
+            date_trunc = "order_day"
         
         query = f"""
             SELECT 
                 {date_trunc} AS ds,
-                SUM(total_amount) AS y
-            FROM sales_orders
-            WHERE order_date IS NOT NULL
-                AND total_amount IS NOT NULL
+                SUM(total_sales) AS y
+            FROM {source} cu
             GROUP BY {date_trunc}
             ORDER BY ds
         """
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        print("Query results:", results)  # Debug: Print raw results
-        print("Number of columns:", len(results[0]) if results else 0)
-        cursor.close()
-        
         df = pd.read_sql(query, conn)
         print("DataFrame shape:", df.shape)  # Debug: Print shape
-        print("DataFrame columns:", df.columns)
         
         df['ds'] = pd.to_datetime(df['ds'])
+        df['y'] = df['y'].astype(float)
         
         conn.close()
         
@@ -69,6 +104,61 @@ def load_sales_data(period_type='MS'):
     except Exception as e:
         raise Exception(f"Error loading sales data: {str(e)}")
 
+# Metric columns produced by calculate_accuracy_metrics_batch
+METRIC_COLUMNS = ['MAE', 'MSE', 'RMSE', 'MAPE', 'R2', 'AccuracyPercentage']
+
+def _batch_metric_arrays(actual_values, predicted_values):
+    """
+    Compute accuracy metrics row-wise over 2-D arrays in a single NumPy pass.
+
+    NaN in either array masks that cell. Rows with fewer than 2 valid cells
+    get NaN metrics.
+
+    Returns:
+        dict: Metric name -> 1-D array with one value per row, plus 'n' (valid cells)
+    """
+    actual = np.atleast_2d(np.asarray(actual_values, dtype=float))
+    predicted = np.atleast_2d(np.asarray(predicted_values, dtype=float))
+    if actual.shape != predicted.shape:
+        raise ValueError(f"Shape mismatch: actual {actual.shape} vs predicted {predicted.shape}")
+
+    mask = ~np.isnan(actual) & ~np.isnan(predicted)
+    n = mask.sum(axis=1)
+    valid = n >= 2
+    safe_n = np.where(n > 0, n, 1)
+
+    error = np.where(mask, actual - predicted, 0.0)
+    mae = np.abs(error).sum(axis=1) / safe_n
+    mse = (error ** 2).sum(axis=1) / safe_n
+    rmse = np.sqrt(mse)
+
+    # MAPE, with zero actuals replaced as in the single-series version
+    actual_safe = np.where(actual == 0, 0.0001, actual)
+    mape = np.where(mask, np.abs(error / np.where(mask, actual_safe, 1.0)), 0.0).sum(axis=1) / safe_n * 100
+
+    # R² matching sklearn's r2_score, including the constant-actuals case
+    actual_masked = np.where(mask, actual, 0.0)
+    actual_mean = actual_masked.sum(axis=1) / safe_n
+    ss_tot = (np.where(mask, actual - actual_mean[:, np.newaxis], 0.0) ** 2).sum(axis=1)
+    ss_res = (error ** 2).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.where(ss_res == 0, 1.0, 0.0))
+
+    accuracy = np.clip(100 - mape, 0, 100)
+
+    metrics = {
+        'MAE': mae,
+        'MSE': mse,
+        'RMSE': rmse,
+        'MAPE': mape,
+        'R2': r2,
+        'AccuracyPercentage': accuracy
+    }
+    for name in METRIC_COLUMNS:
+        metrics[name] = np.where(valid, metrics[name], np.nan)
+    metrics['n'] = n
+    return metrics
+
 def calculate_accuracy_metrics(actual_values, predicted_values):
     """
     Calculate accuracy metrics for the forecast model.
@@ -80,46 +170,115 @@ def calculate_accuracy_metrics(actual_values, predicted_values):
     Returns:
         dict: Dictionary containing various accuracy metrics
     """
-    # Remove any NaN values
-    mask = ~np.isnan(actual_values) & ~np.isnan(predicted_values)
-    actual = np.array(actual_values)[mask]
-    predicted = np.array(predicted_values)[mask]
+    load_engine()
+    metrics = _batch_metric_arrays(
+        np.asarray(actual_values, dtype=float).ravel(),
+        np.asarray(predicted_values, dtype=float).ravel()
+    )
     
     # If we don't have enough data, return None
-    if len(actual) < 2:
+    if metrics['n'][0] < 2:
         return None
     
-    # Calculate metrics
-    mae = mean_absolute_error(actual, predicted)
-    mse = mean_squared_error(actual, predicted)
-    rmse = np.sqrt(mse)
+    return {name: float(metrics[name][0]) for name in METRIC_COLUMNS}
+
+def calculate_accuracy_metrics_batch(actual_values, predicted_values, index=None):
+    """
+    Calculate accuracy metrics for many series or folds at once.
     
-    # Calculate MAPE (Mean Absolute Percentage Error)
-    actual_safe = np.where(actual == 0, 0.0001, actual)
-    mape = np.mean(np.abs((actual - predicted) / actual_safe)) * 100
+    Args:
+        actual_values (array-like): 2-D array (n_series, n_periods); NaN marks missing cells
+        predicted_values (array-like): 2-D array with the same shape as actual_values
+        index (array-like, optional): Labels for the rows of the result
     
-    # Calculate R² score
-    r2 = r2_score(actual, predicted)
+    Returns:
+        pd.DataFrame: One row per series with METRIC_COLUMNS and 'n' (valid points).
+                      Rows with fewer than 2 valid points have NaN metrics.
+    """
+    load_engine()
+    metrics = _batch_metric_arrays(actual_values, predicted_values)
+    return pd.DataFrame(metrics, index=index, columns=METRIC_COLUMNS + ['n'])
+
+def calculate_grouped_accuracy_metrics(data, group_col, actual_col='y', predicted_col='yhat', order_col='ds'):
+    """
+    Calculate accuracy metrics for long-format data with one row per (series, period).
     
-    # Calculate mean forecast accuracy percentage
-    accuracy = 100 - mape
-    accuracy = max(0, min(accuracy, 100))  # Clip between 0 and 100
+    Args:
+        data (pd.DataFrame): Long-format actual and predicted values
+        group_col (str or list): Column(s) identifying each series (e.g. fold or region)
+        actual_col (str): Column with actual values
+        predicted_col (str): Column with predicted values
+        order_col (str): Column giving the position within each series
     
-    return {
-        'MAE': float(mae),
-        'MSE': float(mse),
-        'RMSE': float(rmse),
-        'MAPE': float(mape),
-        'R2': float(r2),
-        'AccuracyPercentage': float(accuracy)
-    }
+    Returns:
+        pd.DataFrame: One row per group with METRIC_COLUMNS and 'n'
+    """
+    load_engine()
+    if data.empty:
+        return pd.DataFrame(columns=METRIC_COLUMNS + ['n'])
+    ordered = data.sort_values(order_col) if order_col in data.columns else data
+    position = ordered.groupby(group_col, sort=True).cumcount()
+    actual = ordered.pivot_table(index=group_col, columns=position, values=actual_col, aggfunc='first', dropna=False)
+    predicted = ordered.pivot_table(index=group_col, columns=position, values=predicted_col, aggfunc='first', dropna=False)
+    predicted = predicted.reindex(index=actual.index, columns=actual.columns)
+    return calculate_accuracy_metrics_batch(actual.values, predicted.values, index=actual.index)
 
-def generate_forecast(actual_data, forecast_start_date=None, period_type='MS'):
+def _future_dates(actual_data, forecast_start_date, period_type):
+    """Return the forecast start date and the 6 future period dates"""
+    if forecast_start_date:
+        start_date = pd.to_datetime(forecast_start_date)
+    else:
+        if period_type == 'MS':
+            start_date = actual_data['ds'].max() + pd.DateOffset(months=1)
+        elif period_type == 'QS':
+            start_date = actual_data['ds'].max() + pd.DateOffset(months=3)
+        elif period_type == 'YS':
+            start_date = actual_data['ds'].max() + pd.DateOffset(years=1)
+        else:
+            start_date = actual_data['ds'].max() + pd.DateOffset(days=1)
+
+    future_dates = pd.date_range(start=start_date, periods=6, freq=period_type)
+    return start_date, future_dates
+
+def _predict_baseline(engine, train_data, target_dates, period_type):
+    """
+    Fit a NumPy baseline engine on train_data and predict the given dates.
+
+    Returns:
+        tuple: (fitted values for train_data, pd.Series of predictions indexed by target_dates)
+    """
+    last_date = train_data['ds'].max()
+    target_dates = pd.DatetimeIndex(target_dates)
+    steps = pd.date_range(start=last_date, end=max(target_dates.max(), last_date), freq=period_type)
+    steps = steps[steps > last_date]
+
+    # Position of each training date on the continuous period calendar, so periods
+    # dropped by the outlier filter do not shift the seasonal lag
+    train_dates = pd.DatetimeIndex(train_data['ds'])
+    calendar = pd.date_range(start=train_dates.min(), end=last_date, freq=period_type)
+    positions = calendar.get_indexer(train_dates)
+    if (positions < 0).any() or not train_dates.is_monotonic_increasing:
+        positions = None
+
+    fitted, forecast = forecast_baselines.fit_predict(
+        engine, train_data['y'].values, len(steps), period_type, positions
+    )
+    known = pd.concat([
+        pd.Series(fitted[0], index=pd.DatetimeIndex(train_data['ds'])),
+        pd.Series(forecast[0], index=steps)
+    ])
+    known = known[~known.index.duplicated(keep='last')]
+    return fitted[0], known.reindex(target_dates)
+
+def generate_forecast(actual_data, forecast_start_date=None, period_type='MS', engine=DEFAULT_ENGINE):
     try:
+        load_engine(include_prophet=(engine == 'prophet'))
         if not {'ds', 'y'}.issubset(actual_data.columns):
             raise ValueError("actual_data must contain 'ds' and 'y' columns")
         if actual_data['ds'].isnull().any() or actual_data['y'].isnull().any():
             raise ValueError("actual_data contains null values in 'ds' or 'y'")
+        if engine != 'prophet' and engine not in forecast_baselines.ENGINES:
+            raise ValueError(f"Unknown forecast engine: {engine}")
 
         actual_data['ds'] = pd.to_datetime(actual_data['ds'])
         actual_data['y'] = actual_data['y'].astype(float)
@@ -132,39 +291,32 @@ def generate_forecast(actual_data, forecast_start_date=None, period_type='MS'):
         if actual_data.empty:
             raise ValueError("No valid data after filtering outliers")
 
-        model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=(period_type == 'D'),
-            daily_seasonality=False,
-            changepoint_prior_scale=0.05,
-            n_changepoints=10,
-            interval_width=0.95,
-            stan_backend='CMDSTANPY'
-        )
-        model.fit(actual_data)
+        start_date, future_dates = _future_dates(actual_data, forecast_start_date, period_type)
+
+        if engine == 'prophet':
+            model = Prophet(
+                yearly_seasonality=True,
+                weekly_seasonality=(period_type == 'D'),
+                daily_seasonality=False,
+                changepoint_prior_scale=0.05,
+                n_changepoints=10,
+                interval_width=0.95,
+                stan_backend='CMDSTANPY'
+            )
+            model.fit(actual_data)
 
-        if forecast_start_date:
-            start_date = pd.to_datetime(forecast_start_date)
+            all_dates = pd.DataFrame({
+                'ds': pd.concat([actual_data['ds'], pd.Series(future_dates)], ignore_index=True).sort_values().unique()
+            })
+
+            forecast = model.predict(all_dates)
+            predicted_data = forecast[forecast['ds'].isin(actual_data['ds'])][['ds', 'yhat']].copy()
+            forecast_data = forecast[forecast['ds'] >= start_date][['ds', 'yhat']].copy()
         else:
-            if period_type == 'MS':
-                start_date = actual_data['ds'].max() + pd.DateOffset(months=1)
-            elif period_type == 'QS':
-                start_date = actual_data['ds'].max() + pd.DateOffset(months=3)
-            elif period_type == 'YS':
-                start_date = actual_data['ds'].max() + pd.DateOffset(years=1)
-            else:
-                start_date = actual_data['ds'].max() + pd.DateOffset(days=1)
-
-        future_dates = pd.DataFrame({
-            'ds': pd.date_range(start=start_date, periods=6, freq=period_type)
-        })
-        all_dates = pd.DataFrame({
-            'ds': pd.concat([actual_data['ds'], future_dates['ds']], ignore_index=True).sort_values().unique()
-        })
+            fitted, future_values = _predict_baseline(engine, actual_data, future_dates, period_type)
+            predicted_data = pd.DataFrame({'ds': actual_data['ds'].values, 'yhat': fitted})
+            forecast_data = pd.DataFrame({'ds': future_values.index, 'yhat': future_values.values})
 
-        forecast = model.predict(all_dates)
-        predicted_data = forecast[forecast['ds'].isin(actual_data['ds'])][['ds', 'yhat']].copy()
-        forecast_data = forecast[forecast['ds'] >= start_date][['ds', 'yhat']].copy()
         forecast_data = forecast_data[forecast_data['yhat'] > 0]
 
         accuracy_metrics = calculate_accuracy_metrics(
@@ -178,7 +330,7 @@ def generate_forecast(actual_data, forecast_start_date=None, period_type='MS'):
         logging.error(f"Forecasting error: {str(e)}", exc_info=True)
         raise ValueError(f"Failed to generate forecast: {str(e)}")
     
-def _cross_validate_fold(i, actual_data, period_type):
+def _cross_validate_fold(i, actual_data, period_type, engine=DEFAULT_ENGINE):
     """
     Helper function for cross-validation in parallel.
     
@@ -186,11 +338,14 @@ def _cross_validate_fold(i, actual_data, period_type):
         i (int): Index for the fold
         actual_data (pd.DataFrame): DataFrame with 'ds' (date) and 'y' (sales) columns
         period_type (str): Frequency of the forecast periods
+        engine (str): 'prophet' or a NumPy baseline engine name
     
     Returns:
-        dict: Cross-validation metrics for the fold
+        dict: Fold boundaries with the fold's actual and predicted arrays
     """
     try:
+        # Folds may run in a fresh joblib worker process
+        load_engine(include_prophet=(engine == 'prophet'))
         # Cap the training data size to the most recent 24 periods
         train_data = actual_data.iloc[:i]
         if len(train_data) > 24:
@@ -201,43 +356,41 @@ def _cross_validate_fold(i, actual_data, period_type):
         if len(test_data) < 1:
             return None
         
-        # Train model
-        model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=(period_type == 'D'),
-            daily_seasonality=False,
-            changepoint_prior_scale=0.01,
-            n_changepoints=5,
-            mcmc_samples=0,
-            interval_width=0.95,
-            stan_backend='CMDSTANPY'
-        )
-        model.fit(train_data)
-        
-        # Make predictions
-        future = pd.DataFrame({'ds': test_data['ds']})
-        forecast = model.predict(future)
-        
-        # Calculate metrics
-        actual = test_data['y'].values
-        predicted = forecast['yhat'].values
+        if engine == 'prophet':
+            # Train model
+            model = Prophet(
+                yearly_seasonality=True,
+                weekly_seasonality=(period_type == 'D'),
+                daily_seasonality=False,
+                changepoint_prior_scale=0.01,
+                n_changepoints=5,
+                mcmc_samples=0,
+                interval_width=0.95,
+                stan_backend='CMDSTANPY'
+            )
+            model.fit(train_data)
+
+            # Make predictions
+            future = pd.DataFrame({'ds': test_data['ds']})
+            forecast = model.predict(future)
+            predicted = forecast['yhat'].values
+        else:
+            _, future_values = _predict_baseline(engine, train_data, test_data['ds'], period_type)
+            predicted = future_values.values
         
-        metrics = calculate_accuracy_metrics(actual, predicted)
-        if metrics:
-            return {
-                'train_end': train_data['ds'].max(),
-                'test_start': test_data['ds'].min(),
-                'test_end': test_data['ds'].max(),
-                'accuracy': metrics['AccuracyPercentage'],
-                'mae': metrics['MAE'],
-                'rmse': metrics['RMSE']
-            }
-        return None
+        # Metrics are computed for all folds at once in cross_validate_model
+        return {
+            'train_end': train_data['ds'].max(),
+            'test_start': test_data['ds'].min(),
+            'test_end': test_data['ds'].max(),
+            'actual': test_data['y'].values.astype(float),
+            'predicted': np.asarray(predicted, dtype=float)
+        }
     except Exception as e:
         print(f"Error in fold {i}: {str(e)}")
         return None
 
-def cross_validate_model(actual_data, initial_periods=12, period_type='MS'):
+def cross_validate_model(actual_data, initial_periods=12, period_type='MS', engine=DEFAULT_ENGINE):
     """
     Perform cross-validation on the forecast model.
     
@@ -245,16 +398,20 @@ def cross_validate_model(actual_data, initial_periods=12, period_type='MS'):
         actual_data (pd.DataFrame): DataFrame with 'ds' (date) and 'y' (sales) columns.
         initial_periods (int): Number of initial periods to use for training.
         period_type (str): Frequency of the forecast periods ('MS', 'QS', 'YS', 'D').
+        engine (str): 'prophet' or a NumPy baseline engine from forecast_baselines.ENGINES.
         
     Returns:
         pd.DataFrame: Cross-validation results with actual vs predicted values and metrics.
     """
     try:
+        load_engine(include_prophet=(engine == 'prophet'))
         # Validate input data
         if not {'ds', 'y'}.issubset(actual_data.columns):
             raise ValueError("actual_data must contain 'ds' and 'y' columns")
         if actual_data['ds'].isnull().any() or actual_data['y'].isnull().any():
             raise ValueError("actual_data contains null values in 'ds' or 'y'")
+        if engine != 'prophet' and engine not in forecast_baselines.ENGINES:
+            raise ValueError(f"Unknown forecast engine: {engine}")
         
         # Ensure we have enough data
         if len(actual_data) <= initial_periods + 6:
@@ -263,25 +420,100 @@ def cross_validate_model(actual_data, initial_periods=12, period_type='MS'):
         # Sort data by date
         actual_data = actual_data.sort_values('ds').reset_index(drop=True)
         
-        # Determine number of CPU cores for parallelization
-        num_cores = min(multiprocessing.cpu_count(), 4)  # Limit to 4 cores to avoid overuse
-        
-        # Run cross-validation in parallel with a step size of 4
-        cv_results = Parallel(n_jobs=num_cores)(
-            delayed(_cross_validate_fold)(i, actual_data, period_type)
-            for i in range(initial_periods, len(actual_data) - 5, 4)
-        )
+        folds = range(initial_periods, len(actual_data) - 5, 4)
+        if engine == 'prophet':
+            # Determine number of CPU cores for parallelization
+            num_cores = min(multiprocessing.cpu_count(), 4)  # Limit to 4 cores to avoid overuse
+
+            # Run cross-validation in parallel with a step size of 4
+            cv_results = Parallel(n_jobs=num_cores)(
+                delayed(_cross_validate_fold)(i, actual_data, period_type, engine)
+                for i in folds
+            )
+        else:
+            # Baseline engines fit in milliseconds; worker start-up would dominate
+            cv_results = [_cross_validate_fold(i, actual_data, period_type, engine) for i in folds]
         
-        # Filter out None results and convert to DataFrame
+        # Filter out failed folds and score the rest in one batch
         cv_results = [result for result in cv_results if result is not None]
         if not cv_results:
             raise ValueError("No valid cross-validation results obtained")
-        
-        return pd.DataFrame(cv_results)
+
+        actual = np.full((len(cv_results), 6), np.nan)
+        predicted = np.full((len(cv_results), 6), np.nan)
+        for row, result in enumerate(cv_results):
+            actual[row, :len(result['actual'])] = result['actual']
+            predicted[row, :len(result['predicted'])] = result['predicted']
+        metrics = _batch_metric_arrays(actual, predicted)
+
+        cv_df = pd.DataFrame({
+            'train_end': [result['train_end'] for result in cv_results],
+            'test_start': [result['test_start'] for result in cv_results],
+            'test_end': [result['test_end'] for result in cv_results],
+            'accuracy': metrics['AccuracyPercentage'],
+            'mae': metrics['MAE'],
+            'rmse': metrics['RMSE']
+        })
+        cv_df = cv_df[metrics['n'] >= 2].reset_index(drop=True)
+        if cv_df.empty:
+            raise ValueError("No valid cross-validation results obtained")
+
+        return cv_df
     
     except Exception as e:
         raise Exception(f"Cross-validation error: {str(e)}")
 
+def format_period_label(ds, period_type):
+    """Format a period start date the way chart.js formatChartLabels expects"""
+    if isinstance(ds, str):
+        ds = datetime.fromisoformat(ds[:10])
+    if period_type == 'MS':
+        return ds.strftime('%Y-%m')
+    if period_type == 'QS':
+        return f"{ds.year}-Q{(ds.month - 1) // 3 + 1}"
+    if period_type == 'YS':
+        return str(ds.year)
+    return ds.strftime('%Y-%m-%d')
+
+def build_sales_trend(period_type='MS', start_date=None, end_date=None, forecast_start=None, engine=DEFAULT_ENGINE):
+    """
+    Load sales history, run the forecast and return a JSON-ready sales trend payload.
+    
+    The model is fitted on the full history; start_date/end_date only limit the
+    actual and predicted periods that are returned.
+    
+    Returns:
+        dict: actual/predicted/forecast period and sales lists, accuracy metrics and period_type
+    """
+    load_engine(include_prophet=(engine == 'prophet'))
+    sales_data = load_sales_data(period_type=period_type)
+    predicted, forecast_data, metrics = generate_forecast(
+        sales_data.copy(), forecast_start_date=forecast_start, period_type=period_type, engine=engine
+    )
+
+    in_range = pd.Series(True, index=sales_data.index)
+    if start_date:
+        in_range &= sales_data['ds'] >= pd.to_datetime(start_date)
+    if end_date:
+        in_range &= sales_data['ds'] <= pd.to_datetime(end_date)
+    actual = sales_data[in_range]
+    predicted = predicted[predicted['ds'].isin(actual['ds'])]
+
+    def _series(frame, column):
+        return {
+            'periods': [format_period_label(ds, period_type) for ds in frame['ds']],
+            'sales': [round(float(value), 2) for value in frame[column]]
+        }
+
+    return {
+        'actual': _series(actual, 'y'),
+        'predicted': _series(predicted, 'yhat'),
+        'forecast': _series(forecast_data, 'yhat'),
+        'accuracy_metrics': metrics,
+        'period_type': period_type,
+        'engine': engine
+    }
+
 # Example usage
 if __name__ == "__main__":
     try:
@@ -291,7 +523,7 @@ if __name__ == "__main__":
         print(sales_data.head())
         
         # Generate forecast
-        predicted, forecast, metrics = generate_forecast(sales_data, period_type='MS')
+        predicted, forecast, metrics = generate_forecast(sales_data.copy(), period_type='MS', engine=SNAPSHOT_ENGINE)
         print("\nPredicted data (historical):")
         print(predicted.head())
         print("\nForecast data (future):")
@@ -300,9 +532,16 @@ if __name__ == "__main__":
         print(metrics)
         
         # Perform cross-validation
-        cv_results = cross_validate_model(sales_data, initial_periods=12, period_type='MS')
+        cv_results = cross_validate_model(sales_data, initial_periods=12, period_type='MS', engine=SNAPSHOT_ENGINE)
         print("\nCross-validation results:")
         print(cv_results)
+
+        # Compare the fast NumPy engines against Prophet
+        load_engine()
+        for engine in forecast_baselines.ENGINES:
+            _, _, engine_metrics = generate_forecast(sales_data.copy(), period_type='MS', engine=engine)
+            print(f"\n{engine} accuracy metrics:")
+            print(engine_metrics)
         
     except Exception as e:
         print(f"Error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,173 @@
+import numpy as np
+
+# Season length (periods per cycle) for each supported period type
+SEASON_LENGTHS = {
+    'MS': 12,
+    'QS': 4,
+    'YS': 1,
+    'D': 7
+}
+
+def _as_2d(values):
+    """Return values as a float array shaped (n_series, n_periods)"""
+    y = np.asarray(values, dtype=float)
+    if y.ndim == 1:
+        y = y[np.newaxis, :]
+    if y.ndim != 2:
+        raise ValueError("Series must be a 1-D array or a 2-D array of shape (n_series, n_periods)")
+    if y.shape[1] == 0:
+        raise ValueError("Series must contain at least one period")
+    return y
+
+def _effective_season(n_periods, season_length):
+    """Fall back to a non-seasonal model when there is less than one full cycle"""
+    return season_length if season_length > 1 and n_periods >= season_length else 1
+
+def seasonal_naive(values, horizon, season_length=12):
+    """
+    Seasonal naive forecast: every period repeats the value from one season earlier.
+
+    Args:
+        values (array-like): 1-D series or 2-D array (n_series, n_periods)
+        horizon (int): Number of future periods to forecast
+        season_length (int): Periods per seasonal cycle
+
+    Returns:
+        tuple: (fitted, forecast) arrays shaped (n_series, n_periods) and (n_series, horizon).
+               Fitted values for the first season are NaN.
+    """
+    y = _as_2d(values)
+    n = y.shape[1]
+    m = _effective_season(n, season_length)
+
+    fitted = np.full_like(y, np.nan)
+    fitted[:, m:] = y[:, :-m]
+
+    last_season = y[:, n - m:]
+    forecast = last_season[:, np.arange(horizon) % m]
+    return fitted, forecast
+
+def holt_winters(values, horizon, season_length=12, alpha=0.3, beta=0.1, gamma=0.1):
+    """
+    Additive Holt-Winters exponential smoothing, vectorized across series.
+
+    Only the time dimension is iterated; every step updates all series at once.
+
+    Args:
+        values (array-like): 1-D series or 2-D array (n_series, n_periods)
+        horizon (int): Number of future periods to forecast
+        season_length (int): Periods per seasonal cycle
+        alpha (float): Level smoothing factor
+        beta (float): Trend smoothing factor
+        gamma (float): Seasonal smoothing factor
+
+    Returns:
+        tuple: (fitted, forecast) arrays shaped (n_series, n_periods) and (n_series, horizon)
+    """
+    y = _as_2d(values)
+    n_series, n = y.shape
+    m = _effective_season(n, season_length)
+
+    # Initial level, trend and seasonal components from the first one or two cycles
+    level = y[:, :m].mean(axis=1)
+    if n >= 2 * m and m > 1:
+        trend = (y[:, m:2 * m].mean(axis=1) - level) / m
+    elif n > 1:
+        trend = y[:, 1] - y[:, 0] if m == 1 else np.zeros(n_series)
+    else:
+        trend = np.zeros(n_series)
+    season = y[:, :m] - level[:, np.newaxis] if m > 1 else np.zeros((n_series, 1))
+
+    fitted = np.empty_like(y)
+    for t in range(n):
+        s = season[:, t % m]
+        fitted[:, t] = level + trend + s
+        new_level = alpha * (y[:, t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+        if m > 1:
+            season[:, t % m] = gamma * (y[:, t] - level) + (1 - gamma) * s
+
+    steps = np.arange(1, horizon + 1)
+    forecast = (
+        level[:, np.newaxis]
+        + steps[np.newaxis, :] * trend[:, np.newaxis]
+        + season[:, (n + steps - 1) % m]
+    )
+    return fitted, forecast
+
+def _linear_seasonal_design(positions, season_length):
+    """Design matrix with intercept, linear trend and seasonal dummies"""
+    columns = [np.ones(len(positions)), positions.astype(float)]
+    for s in range(1, season_length):
+        columns.append((positions % season_length == s).astype(float))
+    return np.column_stack(columns)
+
+def linear_seasonal(values, horizon, season_length=12):
+    """
+    Linear trend plus seasonal dummies fitted by least squares.
+
+    All series share one design matrix, so a single lstsq call fits every series.
+
+    Args:
+        values (array-like): 1-D series or 2-D array (n_series, n_periods)
+        horizon (int): Number of future periods to forecast
+        season_length (int): Periods per seasonal cycle
+
+    Returns:
+        tuple: (fitted, forecast) arrays shaped (n_series, n_periods) and (n_series, horizon)
+    """
+    y = _as_2d(values)
+    n = y.shape[1]
+    # Seasonal dummies need more observations than parameters
+    m = season_length if season_length > 1 and n > season_length + 1 else 1
+
+    positions = np.arange(n)
+    X = _linear_seasonal_design(positions, m)
+    coef, _, _, _ = np.linalg.lstsq(X, y.T, rcond=None)
+
+    future_X = _linear_seasonal_design(np.arange(n, n + horizon), m)
+    fitted = (X @ coef).T
+    forecast = (future_X @ coef).T
+    return fitted, forecast
+
+# Registry of NumPy forecast engines, selectable by name
+ENGINES = {
+    'seasonal_naive': seasonal_naive,
+    'holt_winters': holt_winters,
+    'linear_seasonal': linear_seasonal
+}
+
+def fit_predict(engine, values, horizon, period_type='MS', positions=None):
+    """
+    Fit a baseline engine and forecast the next periods.
+
+    Args:
+        engine (str): Engine name from ENGINES
+        values (array-like): 1-D series or 2-D array (n_series, n_periods)
+        horizon (int): Number of future periods to forecast
+        period_type (str): Frequency of the periods ('MS', 'QS', 'YS', 'D')
+        positions (array-like, optional): Increasing period index of each value. Missing
+            periods are filled by linear interpolation before fitting, so seasonal lags
+            count calendar periods rather than observations.
+
+    Returns:
+        tuple: (fitted, forecast) arrays shaped (n_series, n_periods) and (n_series, horizon);
+               the forecast starts one period after the last position
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown forecast engine: {engine}")
+    season_length = SEASON_LENGTHS.get(period_type, 1)
+    y = _as_2d(values)
+    if positions is None:
+        return ENGINES[engine](y, horizon, season_length=season_length)
+
+    positions = np.asarray(positions, dtype=int)
+    if positions.shape != (y.shape[1],) or np.any(np.diff(positions) <= 0):
+        raise ValueError("positions must be increasing, one per period")
+    offsets = positions - positions[0]
+    calendar = np.arange(offsets[-1] + 1)
+    if len(calendar) != len(offsets):
+        y = np.vstack([np.interp(calendar, offsets, row) for row in y])
+    fitted, forecast = ENGINES[engine](y, horizon, season_length=season_length)
+    return fitted[:, offsets], forecast
@@ -0,0 +1,410 @@
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from forecast import DEFAULT_ENGINE
+from sales_cube import get_data_version
+
+# Forecast worker configuration
+FORECAST_QUEUE_SIZE = 8       # Pending requests before new ones are rejected
+FORECAST_CACHE_SIZE = 64      # Completed forecasts kept in memory (LRU); also bounds the last-good fallbacks
+FORECAST_TIMEOUT = 20         # Seconds the web tier waits before serving the last good forecast
+FORECAST_SERVICE_START_TIMEOUT = 60  # Seconds start_shared_service waits for the service to accept connections
+
+_lock = threading.Lock()
+_process = None
+_connection = None            # _ServiceConnection to the shared service, when this process uses it
+_request_queue = None
+_result_queue = None
+_collector = None
+# Set by start_shared_service in the gunicorn master; workers forked afterwards connect to it
+_service_address = None
+_service_authkey = None
+_shared_process = None
+_in_flight = {}               # request key -> Future shared by identical requests
+_cache = OrderedDict()        # request key -> forecast payload
+_last_good = OrderedDict()    # request key without data version -> (payload, data_version, computed_at)
+
+def _store(cache, key, value):
+    """Insert into an LRU OrderedDict, dropping the oldest entries beyond FORECAST_CACHE_SIZE"""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > FORECAST_CACHE_SIZE:
+        cache.popitem(last=False)
+
+def _normalize_date(value, name):
+    """Return a YYYY-MM-DD string for a date argument, or None when it is empty"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+
+def request_key(period_type='MS', start_date=None, end_date=None, forecast_start=None, engine=DEFAULT_ENGINE):
+    """
+    Normalized (period_type, start_date, end_date, forecast_start, engine) for the caches,
+    so equivalent requests share entries however their dates were written.
+
+    Raises:
+        ValueError: If a date is invalid
+    """
+    return (
+        period_type or 'MS',
+        _normalize_date(start_date, 'start_date'),
+        _normalize_date(end_date, 'end_date'),
+        _normalize_date(forecast_start, 'forecast_start'),
+        engine or DEFAULT_ENGINE
+    )
+
+def _run_request(forecast, key, params):
+    """Build one forecast; returns the (key, payload, error) result message"""
+    try:
+        return key, forecast.build_sales_trend(**params), None
+    except Exception as e:
+        traceback.print_exc()
+        return key, None, str(e)
+
+def _worker_main(request_queue, result_queue, prewarm):
+    """Forecast worker process: fit forecasts off the web workers' GIL"""
+    import forecast
+    if prewarm:
+        forecast.prewarm(DEFAULT_ENGINE)
+    while True:
+        request = request_queue.get()
+        if request is None:
+            break
+        key, params = request
+        result_queue.put(_run_request(forecast, key, params))
+
+def serve(address, authkey, prewarm=True):
+    """
+    Run the shared forecast service: one process fitting forecasts for every web worker.
+
+    Each worker holds one connection and sends (key, params) requests; identical
+    requests from several workers are fitted once and answered on each connection.
+
+    Args:
+        address (str): Listener address (a Unix socket path or Windows pipe name)
+        authkey (bytes): Key clients must present
+        prewarm (bool): Load DEFAULT_ENGINE's dependencies before the first request
+    """
+    import forecast
+    listener = Listener(address, authkey=authkey)
+    jobs = queue.Queue(maxsize=FORECAST_QUEUE_SIZE)
+    waiting = {}              # request key -> connections waiting for its result
+    waiting_lock = threading.Lock()
+    send_lock = threading.Lock()
+
+    def reply(conn, message):
+        with send_lock:
+            try:
+                conn.send(message)
+            except OSError:
+                pass          # The worker went away; its requests are simply dropped
+
+    def read_requests(conn):
+        while True:
+            try:
+                key, params = conn.recv()
+            except (EOFError, OSError):
+                break
+            with waiting_lock:
+                if key in waiting:
+                    waiting[key].append(conn)
+                    continue
+                try:
+                    jobs.put_nowait((key, params))
+                except queue.Full:
+                    reply(conn, (key, None, "Forecast queue is full"))
+                    continue
+                waiting[key] = [conn]
+        conn.close()
+
+    def accept_connections():
+        while True:
+            try:
+                conn = listener.accept()
+            except multiprocessing.AuthenticationError:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=read_requests, args=(conn,), name='forecast-client', daemon=True).start()
+
+    threading.Thread(target=accept_connections, name='forecast-listener', daemon=True).start()
+    print(f"Forecast service listening (pid {os.getpid()})")
+    if prewarm:
+        forecast.prewarm(DEFAULT_ENGINE)
+    while True:
+        key, params = jobs.get()
+        result = _run_request(forecast, key, params)
+        with waiting_lock:
+            conns = waiting.pop(key, [])
+        for conn in conns:
+            reply(conn, result)
+
+class _ServiceConnection:
+    """Client end of the shared service, with the queue methods submit_forecast and the collector use"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._send_lock = threading.Lock()
+        self.closed = False
+
+    def put_nowait(self, item):
+        with self._send_lock:
+            try:
+                self._conn.send(item)
+            except OSError as e:
+                self.closed = True
+                raise RuntimeError(f"Forecast service unavailable: {str(e)}")
+
+    def get(self):
+        try:
+            return self._conn.recv()
+        except (EOFError, OSError):
+            self.closed = True
+            raise
+
+    def close(self):
+        self.closed = True
+        self._conn.close()
+
+def _new_address():
+    """A fresh listener address for the shared service"""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\forecast-service-{uuid.uuid4().hex}'
+    return os.path.join(tempfile.mkdtemp(prefix='forecast-service-'), 'socket')
+
+def start_shared_service(prewarm=True, timeout=FORECAST_SERVICE_START_TIMEOUT):
+    """
+    Start one forecast service for all web workers forked after this call.
+
+    Meant for the gunicorn master (when_ready). The service runs as a plain
+    subprocess rather than a multiprocessing child, because forked workers
+    inherit multiprocessing's child list and would stop the service when they exit.
+
+    Raises:
+        RuntimeError: If the service exits or does not accept connections within timeout seconds
+    """
+    global _shared_process, _service_address, _service_authkey
+    address = _new_address()
+    authkey = os.urandom(32)
+    args = [sys.executable, os.path.abspath(__file__), 'serve', address]
+    if not prewarm:
+        args.append('--no-prewarm')
+    # The key goes through the environment so it does not show up in the process list
+    process = subprocess.Popen(args, env=dict(os.environ, FORECAST_SERVICE_AUTHKEY=authkey.hex()))
+    deadline = time.time() + timeout
+    while True:
+        try:
+            Client(address, authkey=authkey).close()
+            break
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"Forecast service exited with code {process.returncode}")
+            if time.time() > deadline:
+                process.terminate()
+                raise RuntimeError(f"Forecast service did not start within {timeout}s")
+            time.sleep(0.1)
+    _shared_process, _service_address, _service_authkey = process, address, authkey
+    print(f"Shared forecast service started (pid {process.pid})")
+
+def stop_shared_service(timeout=5):
+    """Stop the service started by start_shared_service (gunicorn on_exit)"""
+    global _shared_process, _service_address
+    process, address = _shared_process, _service_address
+    _shared_process = _service_address = None
+    if process is None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    if sys.platform != 'win32':
+        shutil.rmtree(os.path.dirname(address), ignore_errors=True)
+    print("Shared forecast service stopped")
+
+def _collect_results(result_queue):
+    """Resolve waiting futures and fill the caches as results arrive"""
+    while True:
+        try:
+            item = result_queue.get()
+        except (EOFError, OSError):
+            break
+        if item is None:
+            break
+        key, payload, error = item
+        with _lock:
+            future = _in_flight.pop(key, None)
+            if error is None:
+                _store(_cache, key, payload)
+                _store(_last_good, key[:-1], (payload, key[-1], time.time()))
+        if future is not None:
+            if error is None:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"Forecast failed: {error}"))
+
+def _running():
+    if _connection is not None:
+        return not _connection.closed
+    return _process is not None and _process.is_alive()
+
+def start_service(prewarm=True):
+    """
+    Connect to the shared forecast service, or start a forecast worker process for
+    this process when there is none, along with the result collector thread.
+    """
+    global _process, _connection, _request_queue, _result_queue, _collector
+    with _lock:
+        if _running():
+            return
+        # A dead worker cannot answer requests that were queued to it
+        for future in _in_flight.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Forecast worker restarted"))
+        _in_flight.clear()
+        _connection = None
+
+        if _service_address is not None:
+            try:
+                _connection = _ServiceConnection(Client(_service_address, authkey=_service_authkey))
+            except (OSError, multiprocessing.AuthenticationError) as e:
+                print(f"Shared forecast service unavailable ({str(e)}); starting a local forecast worker")
+            else:
+                _request_queue = _result_queue = _connection
+                _collector = threading.Thread(
+                    target=_collect_results, args=(_result_queue,), name='forecast-collector', daemon=True
+                )
+                _collector.start()
+                print("Connected to the shared forecast service")
+                return
+
+        ctx = multiprocessing.get_context('spawn')
+        _request_queue = ctx.Queue(maxsize=FORECAST_QUEUE_SIZE)
+        _result_queue = ctx.Queue()
+        _process = ctx.Process(
+            target=_worker_main,
+            args=(_request_queue, _result_queue, prewarm),
+            name='forecast-worker',
+            daemon=True
+        )
+        _process.start()
+        _collector = threading.Thread(
+            target=_collect_results, args=(_result_queue,), name='forecast-collector', daemon=True
+        )
+        _collector.start()
+        print(f"Forecast worker started (pid {_process.pid})")
+
+def stop_service(timeout=5):
+    """Ask this process's forecast worker to exit and wait for it, or leave the shared service"""
+    global _process, _connection
+    with _lock:
+        process, connection, request_queue, result_queue = _process, _connection, _request_queue, _result_queue
+        _process = _connection = None
+    if connection is not None:
+        connection.close()
+        print("Disconnected from the shared forecast service")
+    if process is None:
+        return
+    try:
+        request_queue.put(None, timeout=timeout)
+    except queue.Full:
+        pass
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+    result_queue.put(None)
+    print("Forecast worker stopped")
+
+def submit_forecast(period_type='MS', start_date=None, end_date=None, forecast_start=None,
+                    engine=DEFAULT_ENGINE, data_version=None):
+    """
+    Queue a forecast request, reusing cached results and identical in-flight requests.
+
+    Returns:
+        Future: Resolves to the sales trend payload
+
+    Raises:
+        RuntimeError: If the request queue is full
+    """
+    if not _running():
+        start_service()
+
+    base_key = request_key(period_type, start_date, end_date, forecast_start, engine)
+    key = base_key + (data_version,)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            future = Future()
+            future.set_result(_cache[key])
+            return future
+        if key in _in_flight:
+            return _in_flight[key]
+
+        future = Future()
+        params = dict(zip(('period_type', 'start_date', 'end_date', 'forecast_start', 'engine'), base_key))
+        try:
+            _request_queue.put_nowait((key, params))
+        except queue.Full:
+            raise RuntimeError("Forecast queue is full")
+        _in_flight[key] = future
+        return future
+
+def get_forecast(period_type='MS', start_date=None, end_date=None, forecast_start=None,
+                 engine=DEFAULT_ENGINE, timeout=FORECAST_TIMEOUT):
+    """
+    Get a forecast from the worker, falling back to the last good result.
+
+    If the fresh forecast is not ready within timeout seconds (or the queue is
+    full), the most recent successful forecast for the same parameters is
+    served instead while the refresh keeps running.
+
+    Returns:
+        tuple: (payload, status) where status has 'stale', 'data_version' and 'age_seconds'
+
+    Raises:
+        TimeoutError: If no fresh or previous forecast is available in time
+    """
+    base_key = request_key(period_type, start_date, end_date, forecast_start, engine)
+    data_version = get_data_version()
+
+    try:
+        future = submit_forecast(period_type, start_date, end_date, forecast_start, engine, data_version)
+        payload = future.result(timeout=timeout)
+        return payload, {'stale': False, 'data_version': data_version, 'age_seconds': 0}
+    except (FutureTimeoutError, RuntimeError) as e:
+        with _lock:
+            fallback = _last_good.get(base_key)
+            if fallback is not None:
+                _last_good.move_to_end(base_key)
+        if fallback is None:
+            if isinstance(e, FutureTimeoutError):
+                raise TimeoutError("Forecast is still being computed")
+            raise
+        payload, stale_version, computed_at = fallback
+        print(f"Serving last good forecast for {base_key}: {str(e) or 'timed out'}")
+        return payload, {
+            'stale': True,
+            'data_version': stale_version,
+            'age_seconds': round(time.time() - computed_at, 1)
+        }
+
+if __name__ == "__main__":
+    # Started by start_shared_service: python forecast_service.py serve ADDRESS [--no-prewarm]
+    if len(sys.argv) > 2 and sys.argv[1] == 'serve':
+        serve(sys.argv[2], bytes.fromhex(os.environ.pop('FORECAST_SERVICE_AUTHKEY')),
+              prewarm='--no-prewarm' not in sys.argv)
@@ -0,0 +1,203 @@
+import json
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from forecast import SNAPSHOT_ENGINE, format_period_label
+from sales_cube import create_rollup_tables, refresh_sales_rollup
+from sales_db import get_sales_db_connection, get_sales_data_version
+
+# Period types the dashboard shows; each gets its own snapshot
+SNAPSHOT_PERIOD_TYPES = ('MS', 'QS', 'YS', 'D')
+
+# Forecast start dates to materialize. None means the period after the latest
+# data; '2026-01-01' is the default forecastStart sent by chart.js.
+SNAPSHOT_FORECAST_STARTS = (None, '2026-01-01')
+
+# Recompute even without data changes once a snapshot is this old (seconds)
+SNAPSHOT_MAX_AGE = 24 * 60 * 60
+
+def create_snapshot_table():
+    """Create the forecast_snapshots table in the sales database"""
+    try:
+        with get_sales_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'forecast_snapshots')
+                CREATE TABLE forecast_snapshots (
+                    period_type NVARCHAR(4) NOT NULL,
+                    engine NVARCHAR(50) NOT NULL,
+                    forecast_start NVARCHAR(10) NOT NULL,
+                    data_version NVARCHAR(50) NULL,
+                    payload NVARCHAR(MAX) NOT NULL,
+                    computed_at DATETIME2 NOT NULL,
+                    duration_ms INT NOT NULL,
+                    PRIMARY KEY (period_type, engine, forecast_start)
+                )
+            ''')
+            conn.commit()
+            print("forecast_snapshots table ready")
+    except Exception as e:
+        print(f"Failed to create forecast_snapshots table: {str(e)}")
+        traceback.print_exc()
+
+def _snapshot_versions(cursor, engine):
+    """Return {(period_type, forecast_start): (data_version, computed_at)} for an engine"""
+    cursor.execute(
+        "SELECT period_type, forecast_start, data_version, computed_at FROM forecast_snapshots WHERE engine = ?",
+        (engine,)
+    )
+    return {(row[0], row[1]): (row[2], row[3]) for row in cursor.fetchall()}
+
+def materialize_snapshots(period_types=SNAPSHOT_PERIOD_TYPES, forecast_starts=SNAPSHOT_FORECAST_STARTS,
+                          engine=SNAPSHOT_ENGINE, force=False):
+    """
+    Recompute forecast snapshots whose data version changed or that are too old.
+
+    Args:
+        period_types (iterable): Period types to materialize
+        forecast_starts (iterable): Forecast start dates (None = after the latest data)
+        engine (str): Forecast engine to run
+        force (bool): Recompute every snapshot regardless of version and age
+
+    Returns:
+        int: Number of snapshots written
+    """
+    import forecast
+
+    written = 0
+    with get_sales_db_connection() as conn:
+        cursor = conn.cursor()
+        data_version = get_sales_data_version(cursor)
+        existing = {} if force else _snapshot_versions(cursor, engine)
+
+        for period_type in period_types:
+            for forecast_start in forecast_starts:
+                start_key = forecast_start or ''
+                previous = existing.get((period_type, start_key))
+                if previous and previous[0] == data_version and \
+                        (datetime.now() - previous[1]).total_seconds() < SNAPSHOT_MAX_AGE:
+                    continue
+
+                started = time.perf_counter()
+                try:
+                    payload = forecast.build_sales_trend(
+                        period_type=period_type, forecast_start=forecast_start, engine=engine
+                    )
+                except Exception as e:
+                    print(f"Snapshot {period_type}/{start_key or 'auto'} failed: {str(e)}")
+                    continue
+                duration_ms = int((time.perf_counter() - started) * 1000)
+
+                cursor.execute('''
+                    MERGE forecast_snapshots AS target
+                    USING (SELECT ? AS period_type, ? AS engine, ? AS forecast_start) AS source
+                    ON target.period_type = source.period_type
+                        AND target.engine = source.engine
+                        AND target.forecast_start = source.forecast_start
+                    WHEN MATCHED THEN
+                        UPDATE SET data_version = ?, payload = ?, computed_at = SYSDATETIME(), duration_ms = ?
+                    WHEN NOT MATCHED THEN
+                        INSERT (period_type, engine, forecast_start, data_version, payload, computed_at, duration_ms)
+                        VALUES (?, ?, ?, ?, ?, SYSDATETIME(), ?);
+                ''', (
+                    period_type, engine, start_key,
+                    data_version, json.dumps(payload), duration_ms,
+                    period_type, engine, start_key, data_version, json.dumps(payload), duration_ms
+                ))
+                conn.commit()
+                written += 1
+                print(f"Snapshot {period_type}/{start_key or 'auto'} ({engine}) written in {duration_ms} ms")
+
+    return written
+
+def _slice_series(series, start_label, end_label):
+    """Keep the periods of a {periods, sales} series that fall within the label range"""
+    pairs = [
+        (period, sales) for period, sales in zip(series['periods'], series['sales'])
+        if (start_label is None or period >= start_label) and (end_label is None or period <= end_label)
+    ]
+    return {'periods': [p for p, _ in pairs], 'sales': [s for _, s in pairs]}
+
+def get_forecast_snapshot(period_type='MS', start_date=None, end_date=None, forecast_start=None,
+                          engine=SNAPSHOT_ENGINE):
+    """
+    Read a materialized forecast with a single primary-key lookup.
+
+    Actual and predicted periods are trimmed to start_date/end_date.
+
+    Returns:
+        dict or None: Sales trend payload plus snapshot_data_version, snapshot_computed_at
+                      and snapshot_age_seconds; None if no snapshot exists
+    """
+    try:
+        with get_sales_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT payload, data_version, computed_at, DATEDIFF(SECOND, computed_at, SYSDATETIME())
+                FROM forecast_snapshots
+                WHERE period_type = ? AND engine = ? AND forecast_start = ?
+            ''', (period_type, engine, forecast_start or ''))
+            row = cursor.fetchone()
+    except Exception as e:
+        print(f"Error reading forecast snapshot: {str(e)}")
+        return None
+
+    if not row:
+        return None
+
+    payload = json.loads(row[0])
+    start_label = format_period_label(start_date, period_type) if start_date else None
+    end_label = format_period_label(end_date, period_type) if end_date else None
+    payload['actual'] = _slice_series(payload['actual'], start_label, end_label)
+    payload['predicted'] = _slice_series(payload['predicted'], start_label, end_label)
+    payload['snapshot_data_version'] = row[1]
+    payload['snapshot_computed_at'] = row[2].isoformat() if row[2] else None
+    payload['snapshot_age_seconds'] = row[3]
+    return payload
+
+def run_scheduler(interval=300, stop_event=None):
+    """
+    Every interval seconds, refresh the daily sales rollup and any stale snapshots.
+
+    The rollup is refreshed first because forecasts read their history from it.
+
+    Args:
+        interval (int): Seconds between checks
+        stop_event (threading.Event, optional): Set to stop the loop
+    """
+    stop_event = stop_event or threading.Event()
+    create_rollup_tables()
+    create_snapshot_table()
+    while not stop_event.is_set():
+        try:
+            refresh_sales_rollup()
+            materialize_snapshots()
+        except Exception as e:
+            print(f"Snapshot refresh failed: {str(e)}")
+            traceback.print_exc()
+        stop_event.wait(interval)
+
+def start_scheduler_thread(interval=300):
+    """Run the snapshot scheduler in a daemon thread; returns the stop event"""
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run_scheduler, args=(interval, stop_event), name='forecast-snapshots', daemon=True
+    )
+    thread.start()
+    return stop_event
+
+if __name__ == "__main__":
+    # Required in production: nothing in the web app builds the rollup or the snapshots.
+    # Until it has run, dashboards read sales_orders directly (slower) and forecasts are fitted live.
+    # python forecast_snapshots.py            -> refresh once (cron / Task Scheduler, every few minutes)
+    # python forecast_snapshots.py <seconds>  -> keep refreshing on data changes (as a service)
+    if len(sys.argv) > 1:
+        run_scheduler(interval=int(sys.argv[1]))
+    else:
+        create_rollup_tables()
+        create_snapshot_table()
+        refresh_sales_rollup()
+        count = materialize_snapshots(force=True)
+        print(f"Materialized {count} forecast snapshots")
@@ -0,0 +1,56 @@
+# gunicorn -c gunicorn.conf.py wsgi:application
+import signal
+from config import WSGI_BIND, WSGI_WORKERS, WSGI_THREADS, WSGI_TIMEOUT, WSGI_GRACEFUL_TIMEOUT
+
+bind = WSGI_BIND
+workers = WSGI_WORKERS
+threads = WSGI_THREADS
+worker_class = 'gthread'
+timeout = WSGI_TIMEOUT
+graceful_timeout = WSGI_GRACEFUL_TIMEOUT  # SIGTERM: stop accepting, finish in-flight requests, then exit
+keepalive = 5
+
+# Import wsgi.py (PyMuPDF, parsers, dashboard) once in the master; workers inherit it on fork.
+# Database connections and parse workers are opened per worker in post_worker_init, never before fork;
+# the one forecast service is started by the master in when_ready and shared by all workers.
+preload_app = True
+
+# Recycle workers now and then so slow leaks in native libraries cannot build up
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+def when_ready(server):
+    # One forecast process serves every worker; it starts here, before the workers are forked,
+    # so each of them can connect to it. If it cannot start, workers start forecast workers of their own.
+    from forecast_service import start_shared_service
+    try:
+        start_shared_service()
+    except Exception as e:
+        print(f"Shared forecast service not started: {str(e)}")
+
+def on_exit(server):
+    from forecast_service import stop_shared_service
+    stop_shared_service()
+
+def post_worker_init(worker):
+    # PARSE_WORKERS is per host: each server worker gets its share of parse processes
+    from parse_worker import share_pool
+    share_pool(workers)
+    from wsgi import warmup
+    warmup()
+
+    # On SIGTERM end the open dashboard streams first; otherwise each would hold its
+    # thread until graceful_timeout and the worker would be killed instead of exiting
+    handle_exit = worker.handle_exit
+    def stop_streams_then_exit(sig, frame):
+        from order_stream import stop_streams
+        stop_streams()
+        handle_exit(sig, frame)
+    signal.signal(signal.SIGTERM, stop_streams_then_exit)
+
+def worker_exit(server, worker):
+    from wsgi import shutdown
+    shutdown()
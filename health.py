@@ -0,0 +1,76 @@
+import threading
+import time
+from db import get_db_connection
+from sales_db import get_sales_db_connection
+
+# A database is probed with SELECT 1 at most once per interval per process;
+# load balancer checks in between are answered from the last result
+HEALTH_CHECK_INTERVAL = 5
+
+# Databases the app needs before it can take traffic
+READINESS_PROBES = {
+    'invoice': get_db_connection,
+    'sales': get_sales_db_connection
+}
+
+_started_at = time.time()
+_results = {}
+_locks = {name: threading.Lock() for name in READINESS_PROBES}
+
+def _probe(name):
+    started = time.perf_counter()
+    try:
+        with READINESS_PROBES[name]() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+        result = {'ok': True, 'error': None}
+    except Exception as e:
+        result = {'ok': False, 'error': str(e)}
+    result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    result['checked_at'] = time.time()
+    return result
+
+def check_database(name):
+    """
+    Return the latest SELECT 1 result for a database, probing only if it is older than HEALTH_CHECK_INTERVAL.
+
+    While one caller probes, concurrent callers get the previous result rather than
+    opening more connections; only the very first check waits.
+    """
+    result = _results.get(name)
+    if result and time.time() - result['checked_at'] < HEALTH_CHECK_INTERVAL:
+        return result
+    lock = _locks[name]
+    if not lock.acquire(blocking=result is None):
+        return result
+    try:
+        result = _results.get(name)
+        if not result or time.time() - result['checked_at'] >= HEALTH_CHECK_INTERVAL:
+            result = _results[name] = _probe(name)
+        return result
+    finally:
+        lock.release()
+
+def liveness():
+    """The process is up and serving requests; touches no database"""
+    return {'status': 'ok', 'uptime_s': round(time.time() - _started_at, 1)}
+
+def readiness():
+    """
+    Check every database in READINESS_PROBES (cached, see check_database).
+
+    Returns:
+        tuple: (ready, dict with per-database ok, latency_ms, error and age_s)
+    """
+    databases = {}
+    for name in READINESS_PROBES:
+        result = check_database(name)
+        databases[name] = {
+            'ok': result['ok'],
+            'latency_ms': result['latency_ms'],
+            'error': result['error'],
+            'age_s': round(time.time() - result['checked_at'], 1)
+        }
+    ready = all(database['ok'] for database in databases.values())
+    return ready, {'status': 'ready' if ready else 'unavailable', 'databases': databases}
@@ -0,0 +1,387 @@
+import json
+import sys
+import time
+import traceback
+from db import get_db_connection
+from db_backend import get_dialect
+from sales_db import get_sales_db_connection
+
+# Connection factories for the two databases the app queries
+DATABASES = {
+    'invoice': get_db_connection,
+    'sales': get_sales_db_connection
+}
+
+# Covering indexes for the hot queries. Each entry is applied with IF NOT EXISTS,
+# so apply_indexes() can be run on every deploy.
+#   keys:    seek/order columns (equality columns first, then the range column)
+#   include: extra columns the query reads, so it never looks up the base row
+#   unless:  skip when this index exists (it already serves the same queries)
+INDEX_DEFINITIONS = [
+    # Invoice list and debug dump ordered by invoice_date; supplier join on key_code
+    {
+        'database': 'invoice', 'table': 'invoices',
+        'name': 'IX_invoices_invoice_date',
+        'keys': ('invoice_date',),
+        'include': ('key_code', 'due_date', 'total')
+    },
+    # Line-item updates and deletes filter on (invoice_no, item_code)
+    {
+        'database': 'invoice', 'table': 'invoice_line_items',
+        'name': 'IX_invoice_line_items_invoice_item',
+        'keys': ('invoice_no', 'item_code'),
+        'include': ('line_number', 'quantity', 'unit_price', 'total_price')
+    },
+    # Date-range scans (rollup refresh, recent activity, benchmarks). Not needed once
+    # sales_storage has clustered sales_orders on order_date.
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_order_date',
+        'keys': ('order_date',),
+        'include': ('region_id', 'product_id', 'customer_id', 'salesperson_id', 'total_amount', 'status'),
+        'unless': 'CIX_sales_orders_order_date'
+    },
+    # Region-filtered aggregates and region joins
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_region_date',
+        'keys': ('region_id', 'order_date'),
+        'include': ('customer_id', 'total_amount', 'status')
+    },
+    # First-order-per-customer lookup in the rollup refresh, customer breakdowns
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_customer_date',
+        'keys': ('customer_id', 'order_date'),
+        'include': ('total_amount',)
+    },
+    # Salesperson performance and targets
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_salesperson_date',
+        'keys': ('salesperson_id', 'order_date'),
+        'include': ('total_amount',)
+    },
+    # Category breakdowns join products on product_id
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_product_date',
+        'keys': ('product_id', 'order_date'),
+        'include': ('total_amount',)
+    },
+    # Pending orders list: WHERE status = 'Pending' ORDER BY order_date DESC
+    {
+        'database': 'sales', 'table': 'sales_orders',
+        'name': 'IX_sales_orders_status_date',
+        'keys': ('status', 'order_date'),
+        'include': ('customer_id', 'salesperson_id', 'region_id', 'total_amount')
+    },
+    # Top performers and target vs achievement group the rollup by salesperson
+    {
+        'database': 'sales', 'table': 'sales_daily_rollup',
+        'name': 'IX_sales_daily_rollup_salesperson',
+        'keys': ('salesperson_id', 'order_day'),
+        'include': ('total_sales', 'order_count')
+    }
+]
+
+# Fragmentation thresholds (percent) and minimum size for index maintenance.
+# Small indexes fit in a few extents and fragmentation does not matter for them.
+REORGANIZE_THRESHOLD = 10
+REBUILD_THRESHOLD = 30
+MIN_PAGE_COUNT = 1000
+
+def _on_sql_server(database):
+    """The invoice database may run on SQLite, which has no DMVs or index options to manage"""
+    return database != 'invoice' or get_dialect().name == 'sqlserver'
+
+def _index_exists(cursor, table, name):
+    cursor.execute(
+        "SELECT 1 FROM sys.indexes WHERE object_id = OBJECT_ID(?) AND name = ?",
+        (table, name)
+    )
+    return cursor.fetchone() is not None
+
+def _table_exists(cursor, table):
+    cursor.execute("SELECT 1 FROM sys.tables WHERE name = ?", (table,))
+    return cursor.fetchone() is not None
+
+def index_ddl(definition):
+    """Return the CREATE INDEX statement for an INDEX_DEFINITIONS entry"""
+    ddl = (f"CREATE NONCLUSTERED INDEX {definition['name']} "
+           f"ON {definition['table']} ({', '.join(definition['keys'])})")
+    if definition.get('include'):
+        ddl += f" INCLUDE ({', '.join(definition['include'])})"
+    return ddl
+
+def apply_indexes(database=None, dry_run=False):
+    """
+    Create every declared covering index that does not exist yet.
+
+    Args:
+        database (str, optional): 'invoice' or 'sales'; both when omitted
+        dry_run (bool): Only print the statements that would run
+
+    Returns:
+        list: Names of the indexes created (or that would be created)
+    """
+    created = []
+    for db_name, connect in DATABASES.items():
+        if database and db_name != database:
+            continue
+        if not _on_sql_server(db_name):
+            print(f"Skipping {db_name} covering indexes on {get_dialect().name}")
+            continue
+        definitions = [d for d in INDEX_DEFINITIONS if d['database'] == db_name]
+        try:
+            with connect() as conn:
+                cursor = conn.cursor()
+                for definition in definitions:
+                    table, name = definition['table'], definition['name']
+                    if not _table_exists(cursor, table):
+                        print(f"Skipping {name}: table {table} does not exist")
+                        continue
+                    if _index_exists(cursor, table, name):
+                        continue
+                    if definition.get('unless') and _index_exists(cursor, table, definition['unless']):
+                        print(f"Skipping {name}: covered by {definition['unless']}")
+                        continue
+                    ddl = index_ddl(definition)
+                    if dry_run:
+                        print(f"Would run: {ddl}")
+                    else:
+                        print(f"Creating {name} on {table}")
+                        cursor.execute(ddl)
+                        conn.commit()
+                    created.append(name)
+        except Exception as e:
+            print(f"Error applying {db_name} indexes: {str(e)}")
+            traceback.print_exc()
+    return created
+
+def report_missing_indexes(database, limit=20):
+    """
+    Read the optimizer's missing-index suggestions for the current database.
+
+    Suggestions are reset when SQL Server restarts, so run this after the
+    app has served a representative workload.
+
+    Returns:
+        list: dicts with table, equality/inequality/included columns, seeks and
+              an improvement score (avg cost * impact * seeks), best first
+    """
+    with DATABASES[database]() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT TOP {int(limit)}
+                OBJECT_NAME(d.object_id, d.database_id) AS table_name,
+                d.equality_columns,
+                d.inequality_columns,
+                d.included_columns,
+                s.user_seeks,
+                s.user_scans,
+                s.avg_total_user_cost,
+                s.avg_user_impact,
+                s.avg_total_user_cost * (s.avg_user_impact / 100.0) * (s.user_seeks + s.user_scans) AS score
+            FROM sys.dm_db_missing_index_details d
+            JOIN sys.dm_db_missing_index_groups g ON d.index_handle = g.index_handle
+            JOIN sys.dm_db_missing_index_group_stats s ON g.index_group_handle = s.group_handle
+            WHERE d.database_id = DB_ID()
+            ORDER BY score DESC
+        ''')
+        return [{
+            'table': row.table_name,
+            'equality_columns': row.equality_columns,
+            'inequality_columns': row.inequality_columns,
+            'included_columns': row.included_columns,
+            'user_seeks': row.user_seeks,
+            'user_scans': row.user_scans,
+            'avg_user_impact': float(row.avg_user_impact or 0),
+            'score': round(float(row.score or 0), 2)
+        } for row in cursor.fetchall()]
+
+def report_index_usage(database):
+    """
+    Read reads and writes per nonclustered index since the last SQL Server restart.
+
+    An index with writes but no seeks, scans or lookups is flagged unused:
+    it costs every insert and update and serves no query. An index with
+    neither (e.g. on a table untouched since the restart) has no evidence
+    either way and is not flagged. Primary keys and unique constraints are
+    never flagged.
+
+    Returns:
+        list: dicts with table, index, reads, writes, size and an unused flag
+    """
+    with DATABASES[database]() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT
+                OBJECT_NAME(i.object_id) AS table_name,
+                i.name AS index_name,
+                i.type_desc,
+                i.is_primary_key,
+                i.is_unique_constraint,
+                ISNULL(u.user_seeks, 0) + ISNULL(u.user_scans, 0) + ISNULL(u.user_lookups, 0) AS reads,
+                ISNULL(u.user_updates, 0) AS writes,
+                u.last_user_seek,
+                u.last_user_scan,
+                (SELECT SUM(ps.used_page_count) FROM sys.dm_db_partition_stats ps
+                 WHERE ps.object_id = i.object_id AND ps.index_id = i.index_id) AS used_pages
+            FROM sys.indexes i
+            LEFT JOIN sys.dm_db_index_usage_stats u
+                ON u.object_id = i.object_id AND u.index_id = i.index_id AND u.database_id = DB_ID()
+            WHERE OBJECTPROPERTY(i.object_id, 'IsUserTable') = 1
+              AND i.index_id > 1
+            ORDER BY reads, writes DESC
+        ''')
+        return [{
+            'table': row.table_name,
+            'index': row.index_name,
+            'type': row.type_desc,
+            'reads': row.reads,
+            'writes': row.writes,
+            'last_read': str(max(filter(None, (row.last_user_seek, row.last_user_scan)), default='')) or None,
+            'size_mb': round((row.used_pages or 0) * 8 / 1024, 2),
+            'unused': row.reads == 0 and row.writes > 0 and not (row.is_primary_key or row.is_unique_constraint)
+        } for row in cursor.fetchall()]
+
+def report_fragmentation(database, min_page_count=MIN_PAGE_COUNT):
+    """
+    Return fragmentation for every index with at least min_page_count pages.
+
+    Uses LIMITED mode, which only reads the upper index levels and is cheap
+    enough to run during business hours.
+    """
+    with DATABASES[database]() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT
+                OBJECT_NAME(ps.object_id) AS table_name,
+                i.name AS index_name,
+                ps.partition_number,
+                ps.avg_fragmentation_in_percent,
+                ps.page_count
+            FROM sys.dm_db_index_physical_stats(DB_ID(), NULL, NULL, NULL, 'LIMITED') ps
+            JOIN sys.indexes i ON ps.object_id = i.object_id AND ps.index_id = i.index_id
+            WHERE i.name IS NOT NULL
+              AND i.type IN (1, 2)
+              AND ps.alloc_unit_type_desc = 'IN_ROW_DATA'
+              AND ps.page_count >= ?
+            ORDER BY ps.avg_fragmentation_in_percent DESC
+        ''', (min_page_count,))
+        return [{
+            'table': row.table_name,
+            'index': row.index_name,
+            'partition': row.partition_number,
+            'fragmentation': round(float(row.avg_fragmentation_in_percent or 0), 1),
+            'pages': row.page_count
+        } for row in cursor.fetchall()]
+
+def maintain_indexes(database, reorganize_threshold=REORGANIZE_THRESHOLD,
+                     rebuild_threshold=REBUILD_THRESHOLD, min_page_count=MIN_PAGE_COUNT, dry_run=False,
+                     deadline=None, lock_timeout_ms=None):
+    """
+    Reorganize or rebuild only the indexes that are fragmented enough to matter.
+
+    Indexes at or above rebuild_threshold percent are rebuilt (which also
+    refreshes their statistics); indexes between reorganize_threshold and
+    rebuild_threshold are reorganized, then their statistics are updated
+    with the default sample. Everything else is left alone.
+
+    Args:
+        database (str): 'invoice' or 'sales'
+        reorganize_threshold (float): Minimum fragmentation percent to reorganize
+        rebuild_threshold (float): Minimum fragmentation percent to rebuild
+        min_page_count (int): Ignore indexes smaller than this
+        dry_run (bool): Only print what would be done
+        deadline (float, optional): time.time() after which remaining indexes are skipped
+        lock_timeout_ms (int, optional): Skip an index whose table lock is not granted in time
+
+    Returns:
+        list: dicts with table, index, fragmentation and the action taken
+    """
+    actions = []
+    if not _on_sql_server(database):
+        print(f"Index maintenance is not needed on {get_dialect().name}")
+        return actions
+    candidates = report_fragmentation(database, min_page_count)
+    with DATABASES[database]() as conn:
+        cursor = conn.cursor()
+        if lock_timeout_ms is not None:
+            cursor.execute(f"SET LOCK_TIMEOUT {int(lock_timeout_ms)}")
+        partitioned = {}
+        for entry in candidates:
+            key = (entry['table'], entry['index'])
+            partitioned[key] = partitioned.get(key, 0) + 1
+
+        for entry in candidates:
+            if entry['fragmentation'] >= rebuild_threshold:
+                action = 'REBUILD'
+            elif entry['fragmentation'] >= reorganize_threshold:
+                action = 'REORGANIZE'
+            else:
+                continue
+
+            statement = f"ALTER INDEX [{entry['index']}] ON [{entry['table']}] {action}"
+            if partitioned[(entry['table'], entry['index'])] > 1 or entry['partition'] > 1:
+                statement += f" PARTITION = {entry['partition']}"
+            if deadline is not None and time.time() >= deadline:
+                actions.append({**entry, 'action': 'SKIPPED: time limit'})
+                continue
+            actions.append({**entry, 'action': action})
+            if dry_run:
+                print(f"Would run: {statement}")
+                continue
+
+            try:
+                print(f"{action} {entry['index']} on {entry['table']} ({entry['fragmentation']}% fragmented)")
+                cursor.execute(statement)
+                if action == 'REORGANIZE':
+                    cursor.execute(f"UPDATE STATISTICS [{entry['table']}] [{entry['index']}]")
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                actions[-1]['action'] = f"FAILED: {str(e)}"
+                print(f"Error maintaining {entry['index']}: {str(e)}")
+
+    if not actions:
+        print(f"No {database} indexes above {reorganize_threshold}% fragmentation")
+    return actions
+
+def index_report(database=None):
+    """Return missing, unused and fragmented indexes for one or both databases"""
+    report = {}
+    for db_name in DATABASES:
+        if database and db_name != database or not _on_sql_server(db_name):
+            continue
+        try:
+            usage = report_index_usage(db_name)
+            report[db_name] = {
+                'missing': report_missing_indexes(db_name),
+                'unused': [u for u in usage if u['unused']],
+                'fragmented': [f for f in report_fragmentation(db_name)
+                               if f['fragmentation'] >= REORGANIZE_THRESHOLD]
+            }
+        except Exception as e:
+            print(f"Error reading {db_name} index statistics: {str(e)}")
+            traceback.print_exc()
+            report[db_name] = {'error': str(e)}
+    return report
+
+if __name__ == "__main__":
+    # python index_manager.py apply [invoice|sales]     -> create missing covering indexes
+    # python index_manager.py dry-run [invoice|sales]   -> print the CREATE INDEX statements
+    # python index_manager.py report [invoice|sales]    -> missing, unused and fragmented indexes
+    # python index_manager.py maintain [invoice|sales]  -> reorganize/rebuild fragmented indexes
+    command = sys.argv[1] if len(sys.argv) > 1 else 'report'
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+    if command == 'apply':
+        apply_indexes(target)
+    elif command == 'dry-run':
+        apply_indexes(target, dry_run=True)
+    elif command == 'maintain':
+        for name in ([target] if target else DATABASES):
+            maintain_indexes(name)
+    else:
+        print(json.dumps(index_report(target), indent=2, default=str))
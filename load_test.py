@@ -0,0 +1,396 @@
+import contextlib
+import http.cookiejar
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from datetime import datetime
+from benchmark_parser import SUPPLIER_LAYOUTS, generate_invoice_pdf, _percentiles
+
+# Scenario used when no scenario file is given; `python load_test.py init FILE` saves it
+DEFAULT_SCENARIO = {
+    'name': 'default',
+    'users': 8,                  # Concurrent virtual users, each with its own session cookie
+    'duration': 30,              # Seconds to run; ignored when iterations is set
+    'iterations': None,          # Actions per user instead of a fixed duration
+    'think_time': 0.0,           # Seconds each user pauses between actions
+    'target': 'client',          # 'client' (Flask test client), 'wsgi' (local server) or a base URL
+    'backend': 'sqlite',         # Invoice database for client/wsgi runs; None keeps config.DB_BACKEND
+    'sqlite_path': 'load_test.sqlite3',  # A file in WAL mode; shared-cache :memory: locks whole tables
+    'suppliers': ['SUPPLIER1', 'SUPPLIER2', 'SUPPLIER3'],
+    'line_counts': [5, 20, 60],  # Line items per uploaded invoice, picked at random
+    'seed': 0,
+    'quiet': True,               # Send the app's debug prints to os.devnull during the run
+    'mix': {                     # Relative weight of each action
+        'upload': 20,
+        'save': 15,
+        'update': 10,
+        'list': 25,
+        'view': 20,
+        'items': 10
+    }
+}
+
+# Report key for each action; per-invoice URLs are grouped under their route rule
+ACTION_ROUTES = {
+    'upload': 'POST /',
+    'save': 'POST /api/save-invoice',
+    'update': 'POST /api/update-invoice',
+    'list': 'GET /invoices',
+    'view': 'GET /api/invoice/<invoice_no>',
+    'items': 'GET /api/items'
+}
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses, as the test client does, instead of following them"""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+class _TestClientTransport:
+    """One virtual user's session against app.app in this process"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        response = self.client.get(path)
+        return response.status_code, response.get_data()
+
+    def post_json(self, path, payload):
+        response = self.client.post(path, json=payload)
+        return response.status_code, response.get_data()
+
+    def post_file(self, path, fields, file_field, filename, content):
+        data = dict(fields)
+        data[file_field] = (_BytesFile(content), filename, 'application/pdf')
+        response = self.client.post(path, data=data, content_type='multipart/form-data')
+        return response.status_code, response.get_data()
+
+class _BytesFile:
+    """Minimal readable file object for the test client's multipart encoder"""
+
+    def __init__(self, content):
+        self.content = content
+        self.offset = 0
+
+    def read(self, size=-1):
+        end = len(self.content) if size is None or size < 0 else self.offset + size
+        chunk = self.content[self.offset:end]
+        self.offset += len(chunk)
+        return chunk
+
+class _HttpTransport:
+    """One virtual user's session against a running server, with its own cookie jar"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def _send(self, path, body=None, content_type=None):
+        request = urllib.request.Request(self.base_url + path, data=body)
+        if content_type:
+            request.add_header('Content-Type', content_type)
+        try:
+            with self.opener.open(request, timeout=120) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+    def get(self, path):
+        return self._send(path)
+
+    def post_json(self, path, payload):
+        return self._send(path, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def post_file(self, path, fields, file_field, filename, content):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8'))
+        parts.append((f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                      'Content-Type: application/pdf\r\n\r\n').encode('utf-8'))
+        parts.append(content)
+        parts.append(f'\r\n--{boundary}--\r\n'.encode('utf-8'))
+        return self._send(path, b''.join(parts), f'multipart/form-data; boundary={boundary}')
+
+def _invoice_number_label(company_key, number):
+    """The invoice_no the supplier's parser reads from a synthetic invoice, e.g. INV-1001"""
+    for line in SUPPLIER_LAYOUTS[company_key]['header']:
+        if '{number}' in line and 'PO' not in line:
+            return line.split(': ', 1)[1].format(number=number)
+    raise ValueError(f"No invoice number line in layout {company_key}")
+
+def _json_success(body):
+    """True unless a JSON body says success: false"""
+    try:
+        return json.loads(body).get('success', True) is not False
+    except (ValueError, AttributeError):
+        return True
+
+class VirtualUser:
+    """
+    One simulated clerk: uploads invoices, saves and edits them, and browses.
+
+    Actions that need an invoice the user does not have yet (save, update,
+    view) upload one first, so every mix is runnable from an empty database.
+    """
+
+    def __init__(self, transport, scenario, numbers, rng):
+        self.transport = transport
+        self.scenario = scenario
+        self.numbers = numbers
+        self.rng = rng
+        self.pending = []   # (invoice_no, generated items) held in this user's session
+        self.saved = []     # (invoice_no, generated items) saved to the database
+        self.samples = []   # (route, status, elapsed ms, error)
+
+    def _timed(self, action, call, *args):
+        start = time.perf_counter()
+        try:
+            status, body = call(*args)
+            # No action expects a redirect; /invoices answers one when it fails
+            error = status >= 300 or not _json_success(body)
+        except Exception:
+            status, body, error = 0, b'', True
+        self.samples.append((ACTION_ROUTES[action], status, (time.perf_counter() - start) * 1000, error))
+        return status, body, error
+
+    def upload(self):
+        company_key = self.rng.choice(self.scenario['suppliers'])
+        line_count = self.rng.choice(self.scenario['line_counts'])
+        number = next(self.numbers)
+        # The PDF is rendered before the clock starts; only the request is timed
+        pdf_bytes, _, items = generate_invoice_pdf(company_key, line_count, seed=number, invoice_number=number)
+        _, _, error = self._timed('upload', self.transport.post_file, '/', {'company_key': company_key},
+                                  'invoice_pdf', f"invoice_{number}.pdf", pdf_bytes)
+        if not error:
+            self.pending.append((_invoice_number_label(company_key, number), items))
+
+    def save(self):
+        if not self.pending:
+            self.upload()
+            if not self.pending:
+                return
+        invoice_no, items = self.pending.pop(0)
+        _, _, error = self._timed('save', self.transport.post_json, '/api/save-invoice', {'invoice_no': invoice_no})
+        if not error:
+            self.saved.append((invoice_no, items))
+
+    def update(self):
+        invoices = self.saved or self.pending
+        if not invoices:
+            self.upload()
+            invoices = self.pending
+            if not invoices:
+                return
+        invoice_no, items = self.rng.choice(invoices)
+        line_items = [{
+            'item_no': item_no,
+            'description': description,
+            'unit': unit,
+            'quantity': quantity + 1,
+            'unit_price': unit_price,
+            'total_price': round((quantity + 1) * unit_price, 2)
+        } for item_no, description, unit, quantity, unit_price, _ in items]
+        subtotal = round(sum(item['total_price'] for item in line_items), 2)
+        tax = round(subtotal * 0.18, 2)
+        self._timed('update', self.transport.post_json, '/api/update-invoice', {
+            'invoice_no': invoice_no,
+            'line_items': line_items,
+            'invoice_data': {'subtotal': subtotal, 'discount': 0, 'tax': tax, 'total': subtotal + tax}
+        })
+
+    def list(self):
+        self._timed('list', self.transport.get, '/invoices')
+
+    def view(self):
+        invoices = self.saved + self.pending
+        if not invoices:
+            self.upload()
+            invoices = self.pending
+            if not invoices:
+                return
+        invoice_no, _ = self.rng.choice(invoices)
+        self._timed('view', self.transport.get, f"/api/invoice/{invoice_no}")
+
+    def items(self):
+        self._timed('items', self.transport.get, '/api/items')
+
+    def run(self, deadline, iterations):
+        actions = list(self.scenario['mix'])
+        weights = [self.scenario['mix'][action] for action in actions]
+        count = 0
+        while (iterations is None and time.perf_counter() < deadline) or (iterations is not None and count < iterations):
+            getattr(self, self.rng.choices(actions, weights)[0])()
+            count += 1
+            if self.scenario['think_time']:
+                time.sleep(self.scenario['think_time'])
+
+def load_scenario(path=None):
+    """Return DEFAULT_SCENARIO updated with the settings in a JSON scenario file"""
+    scenario = json.loads(json.dumps(DEFAULT_SCENARIO))
+    if path:
+        with open(path) as f:
+            scenario.update(json.load(f))
+    unknown = set(scenario['mix']) - set(ACTION_ROUTES)
+    if unknown:
+        raise ValueError(f"Unknown actions in mix: {', '.join(sorted(unknown))}")
+    return scenario
+
+def save_scenario(scenario, path):
+    with open(path, 'w') as f:
+        json.dump(scenario, f, indent=2)
+
+def _prepare_backend(scenario):
+    """Point the invoice database at the scenario's backend and create its tables"""
+    if not scenario.get('backend'):
+        return None
+    from db_backend import SqliteDialect, set_dialect
+    from db import create_tables
+    if scenario['backend'] == 'sqlite':
+        dialect = set_dialect(SqliteDialect(scenario['sqlite_path']))
+    else:
+        dialect = set_dialect(scenario['backend'])
+    create_tables()
+    return dialect.name
+
+@contextlib.contextmanager
+def _local_server(app):
+    """Serve app on a free localhost port in a background thread; yields its base URL"""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, name='load-test-server', daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+def summarize(samples, elapsed):
+    """
+    Per-route latency percentiles, error and redirect counts and throughput.
+
+    Args:
+        samples (list): (route, status, elapsed ms, error) tuples
+        elapsed (float): Wall-clock seconds of the run
+
+    Returns:
+        dict: Route -> stats, plus an 'all' entry across routes
+    """
+    grouped = {}
+    for sample in samples:
+        grouped.setdefault(sample[0], []).append(sample)
+    grouped['all'] = samples
+
+    routes = {}
+    for route, route_samples in grouped.items():
+        if not route_samples:
+            continue
+        statuses = {}
+        for _, status, _, _ in route_samples:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        errors = sum(1 for sample in route_samples if sample[3])
+        routes[route] = {
+            'requests': len(route_samples),
+            'errors': errors,
+            'redirects': sum(1 for sample in route_samples if 300 <= sample[1] < 400),
+            'error_rate': round(errors / len(route_samples), 4),
+            'throughput_rps': round(len(route_samples) / elapsed, 2) if elapsed else 0.0,
+            'statuses': statuses,
+            **_percentiles([sample[2] for sample in route_samples])
+        }
+    return routes
+
+def run_scenario(scenario):
+    """
+    Run a load-test scenario against app.app (or a remote base URL).
+
+    Returns:
+        dict: Scenario, timing and per-route statistics from summarize()
+    """
+    target = scenario['target']
+    backend = None
+    if target in ('client', 'wsgi'):
+        backend = _prepare_backend(scenario)
+        from app import app
+    numbers = itertools.count(int(time.time()) * 10)  # Invoice numbers unique across runs on one database
+    master = random.Random(scenario['seed'])
+
+    def build_users(make_transport):
+        return [VirtualUser(make_transport(), scenario, numbers, random.Random(master.random()))
+                for _ in range(scenario['users'])]
+
+    with contextlib.ExitStack() as stack:
+        if target == 'client':
+            users = build_users(lambda: _TestClientTransport(app))
+        else:
+            base_url = stack.enter_context(_local_server(app)) if target == 'wsgi' else target
+            users = build_users(lambda: _HttpTransport(base_url))
+        if scenario['quiet']:
+            stack.enter_context(contextlib.redirect_stdout(open(os.devnull, 'w')))
+
+        deadline = time.perf_counter() + scenario['duration']
+        threads = [threading.Thread(target=user.run, args=(deadline, scenario['iterations']), name=f"vu-{index}")
+                   for index, user in enumerate(users)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+    samples = [sample for user in users for sample in user.samples]
+    return {
+        'scenario': scenario,
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'backend': backend,
+        'elapsed_s': round(elapsed, 3),
+        'routes': summarize(samples, elapsed)
+    }
+
+def print_report(report):
+    print(f"Scenario {report['scenario']['name']}: {report['scenario']['users']} users, "
+          f"target={report['scenario']['target']}, backend={report['backend']}, {report['elapsed_s']}s")
+    print(f"{'route':<32} {'reqs':>6} {'err':>5} {'redir':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<32} {stats['requests']:>6} {stats['errors']:>5} {stats.get('redirects', 0):>5} {stats['throughput_rps']:>8} "
+              f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+
+def compare_reports(before, after):
+    """Print p50/p95/p99 and throughput of two saved reports side by side, with the % change"""
+    print(f"{'route':<32} {'metric':<15} {'before':>10} {'after':>10} {'change':>8}")
+    for route, stats in after['routes'].items():
+        baseline = before['routes'].get(route)
+        if not baseline:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps', 'error_rate'):
+            old, new = baseline[metric], stats[metric]
+            change = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+            print(f"{route:<32} {metric:<15} {old:>10} {new:>10} {change:>8}")
+
+if __name__ == "__main__":
+    # Usage: python load_test.py [scenario.json] [report.json]
+    #        python load_test.py init scenario.json
+    #        python load_test.py compare before.json after.json
+    if len(sys.argv) > 2 and sys.argv[1] == 'init':
+        save_scenario(DEFAULT_SCENARIO, sys.argv[2])
+        print(f"Default scenario written to {sys.argv[2]}")
+    elif len(sys.argv) > 3 and sys.argv[1] == 'compare':
+        with open(sys.argv[2]) as f_before, open(sys.argv[3]) as f_after:
+            compare_reports(json.load(f_before), json.load(f_after))
+    else:
+        report = run_scenario(load_scenario(sys.argv[1] if len(sys.argv) > 1 else None))
+        print_report(report)
+        if len(sys.argv) > 2:
+            with open(sys.argv[2], 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Report written to {sys.argv[2]}")
@@ -0,0 +1,405 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from config import MAINTENANCE_WINDOW_START, MAINTENANCE_WINDOW_END, MAINTENANCE_IN_APP
+from db import get_db_connection, fix_orphaned_line_items
+from db_backend import get_dialect
+from index_manager import maintain_indexes
+
+# Seconds between diagnostics runs (one process runs them; every process serves the result)
+DIAGNOSTICS_INTERVAL = 300
+
+# Seconds between checks for due maintenance tasks
+SCHEDULER_TICK = 60
+
+# Extra seconds a claimed task stays locked beyond its time limit, in case its runner dies
+CLAIM_GRACE = 300
+
+# Runs returned by maintenance_status()
+RECENT_RUNS = 20
+
+# Sessions whose transaction has been open longer than this are reported
+HANGING_TRANSACTION_MINUTES = 5
+
+_lock = threading.Lock()
+_refresh_lock = threading.Lock()   # Held while an on-demand run_in_background task is running
+_runner = None
+_last_results = {}
+
+def _hanging_transactions(cursor):
+    """Transactions open for more than HANGING_TRANSACTION_MINUTES (SQL Server only)"""
+    if not get_dialect().supports_dmvs:
+        return None
+    cursor.execute(f'''
+        SELECT t.transaction_id, t.name, t.transaction_begin_time, s.session_id, s.host_name, s.program_name
+        FROM sys.dm_tran_active_transactions t
+        JOIN sys.dm_tran_session_transactions st ON t.transaction_id = st.transaction_id
+        LEFT JOIN sys.dm_exec_sessions s ON st.session_id = s.session_id
+        WHERE t.transaction_begin_time < DATEADD(MINUTE, -{HANGING_TRANSACTION_MINUTES}, GETDATE())
+    ''')
+    return [{
+        'transaction_id': row.transaction_id,
+        'name': row.name,
+        'started': str(row.transaction_begin_time),
+        'session_id': row.session_id,
+        'host_name': row.host_name,
+        'program_name': row.program_name
+    } for row in cursor.fetchall()]
+
+def _orphaned_line_item_count(cursor):
+    cursor.execute('''
+        SELECT COUNT(*) FROM invoice_line_items li
+        WHERE NOT EXISTS (SELECT 1 FROM invoices i WHERE i.invoice_no = li.invoice_no)
+    ''')
+    return cursor.fetchone()[0]
+
+def _table_counts(cursor):
+    counts = {}
+    for table in ('invoices', 'invoice_line_items', 'items', 'suppliers'):
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        counts[table] = cursor.fetchone()[0]
+    return counts
+
+# (name, function of a cursor) run in order by run_diagnostics on one connection
+DIAGNOSTICS = (
+    ('hanging_transactions', _hanging_transactions),
+    ('orphaned_line_items', _orphaned_line_item_count),
+    ('table_counts', _table_counts)
+)
+
+def run_diagnostics(lock_timeout_ms=None):
+    """
+    Run the invoice database diagnostics once, on a single connection, and store the result.
+
+    Checks only read; orphaned line items are cleaned up by the scheduled
+    orphaned_line_items task, off-peak and in batches.
+
+    Args:
+        lock_timeout_ms (int, optional): Fail a check that waits this long for a lock
+
+    Returns:
+        dict: ok, started_at, duration_ms and one entry per check (its value or error)
+    """
+    started = time.perf_counter()
+    result = {'ok': True, 'started_at': datetime.now().isoformat(timespec='seconds'), 'checks': {}}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            if lock_timeout_ms is not None:
+                get_dialect().set_lock_timeout(cursor, lock_timeout_ms)
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            result['checks']['connection'] = {'ok': True}
+            for name, check in DIAGNOSTICS:
+                try:
+                    value = check(cursor)
+                    result['checks'][name] = {'ok': True, 'value': value}
+                except Exception as e:
+                    result['ok'] = False
+                    result['checks'][name] = {'ok': False, 'error': str(e)}
+                    print(f"Diagnostic {name} failed: {str(e)}")
+    except Exception as e:
+        result['ok'] = False
+        result['checks']['connection'] = {'ok': False, 'error': str(e)}
+        print(f"Diagnostics could not connect: {str(e)}")
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    _last_results['diagnostics'] = result
+    return result
+
+def _diagnostics_task(deadline, lock_timeout_ms):
+    """Run diagnostics and publish the result to every process; returns the orphaned line item count"""
+    result = run_diagnostics(lock_timeout_ms)
+    _publish_result('diagnostics', result)
+    return result['checks'].get('orphaned_line_items', {}).get('value')
+
+def _index_maintenance(database):
+    def run(deadline, lock_timeout_ms):
+        actions = maintain_indexes(database, deadline=deadline, lock_timeout_ms=lock_timeout_ms)
+        return sum(1 for action in actions if not action['action'].startswith(('SKIPPED', 'FAILED')))
+    return run
+
+# Tasks shared by all processes: each runs at most once per interval, only inside the
+# maintenance window when off_peak, and is claimed in maintenance_schedule so only one
+# process runs it. function(deadline, lock_timeout_ms) returns the number of rows (or
+# indexes) affected and must start no new batch after deadline.
+MAINTENANCE_TASKS = {
+    'diagnostics': {
+        'function': _diagnostics_task,
+        'interval': DIAGNOSTICS_INTERVAL,
+        'time_limit': 60,
+        'lock_timeout_ms': 2000,
+        'off_peak': False
+    },
+    'orphaned_line_items': {
+        'function': lambda deadline, lock_timeout_ms: fix_orphaned_line_items(
+            deadline=deadline, lock_timeout_ms=lock_timeout_ms),
+        'interval': 3600,
+        'time_limit': 120,
+        'lock_timeout_ms': 2000,
+        'off_peak': True
+    },
+    'invoice_indexes': {
+        'function': _index_maintenance('invoice'),
+        'interval': 86400,
+        'time_limit': 1800,
+        'lock_timeout_ms': 5000,
+        'off_peak': True
+    },
+    'sales_indexes': {
+        'function': _index_maintenance('sales'),
+        'interval': 86400,
+        'time_limit': 1800,
+        'lock_timeout_ms': 5000,
+        'off_peak': True
+    }
+}
+
+_runner_id = f"{socket.gethostname()}:{os.getpid()}"
+
+def in_maintenance_window(now=None):
+    """True between MAINTENANCE_WINDOW_START and MAINTENANCE_WINDOW_END local time"""
+    hour = (now or datetime.now()).hour
+    if MAINTENANCE_WINDOW_START <= MAINTENANCE_WINDOW_END:
+        return MAINTENANCE_WINDOW_START <= hour < MAINTENANCE_WINDOW_END
+    return hour >= MAINTENANCE_WINDOW_START or hour < MAINTENANCE_WINDOW_END
+
+def _now():
+    return datetime.now().replace(microsecond=0)
+
+def ensure_maintenance_tables():
+    """Create maintenance_schedule and maintenance_runs if needed and add a row per task"""
+    dialect = get_dialect()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if not dialect.table_exists(cursor, 'maintenance_schedule'):
+            cursor.execute(f'''
+                CREATE TABLE maintenance_schedule (
+                    task_name NVARCHAR(50) PRIMARY KEY,
+                    next_run_at DATETIME NULL,
+                    locked_until DATETIME NULL,
+                    locked_by NVARCHAR(100) NULL,
+                    last_result {dialect.text_column} NULL
+                )
+            ''')
+        if not dialect.table_exists(cursor, 'maintenance_runs'):
+            cursor.execute(f'''
+                CREATE TABLE maintenance_runs (
+                    run_id {dialect.identity_column.format(start=1)},
+                    task_name NVARCHAR(50) NOT NULL,
+                    started_at DATETIME NOT NULL,
+                    duration_ms FLOAT NOT NULL,
+                    rows_affected INT NULL,
+                    status NVARCHAR(20) NOT NULL,
+                    error NVARCHAR(1000) NULL,
+                    runner NVARCHAR(100) NULL
+                )
+            ''')
+        for name in MAINTENANCE_TASKS:
+            cursor.execute("SELECT 1 FROM maintenance_schedule WHERE task_name = ?", (name,))
+            if cursor.fetchone() is None:
+                cursor.execute("INSERT INTO maintenance_schedule (task_name) VALUES (?)", (name,))
+        conn.commit()
+
+def _claim(name, now, force):
+    """Lock a task for this runner if it is due and not locked elsewhere; True if claimed"""
+    task = MAINTENANCE_TASKS[name]
+    due = "" if force else "AND (next_run_at IS NULL OR next_run_at <= ?)"
+    params = [now + timedelta(seconds=task['time_limit'] + CLAIM_GRACE), _runner_id, name, now]
+    if not force:
+        params.append(now)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE maintenance_schedule SET locked_until = ?, locked_by = ?
+            WHERE task_name = ? AND (locked_until IS NULL OR locked_until < ?) {due}
+        ''', params)
+        claimed = cursor.rowcount == 1
+        conn.commit()
+    return claimed
+
+def _finish(name, started_at, duration_ms, rows_affected, status, error):
+    """Release the claim, schedule the next run and record this one in maintenance_runs"""
+    next_run_at = started_at + timedelta(seconds=MAINTENANCE_TASKS[name]['interval'])
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE maintenance_schedule SET next_run_at = ?, locked_until = NULL, locked_by = NULL
+            WHERE task_name = ?
+        ''', (next_run_at, name))
+        cursor.execute('''
+            INSERT INTO maintenance_runs (task_name, started_at, duration_ms, rows_affected, status, error, runner)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (name, started_at, duration_ms, rows_affected, status, error and error[:1000], _runner_id))
+        conn.commit()
+
+def _publish_result(name, result):
+    """Keep a task's detailed result in this process and in maintenance_schedule for the others"""
+    _last_results[name] = result
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE maintenance_schedule SET last_result = ? WHERE task_name = ?",
+                       (json.dumps(result, default=str), name))
+        conn.commit()
+
+def run_task(name, force=False):
+    """
+    Run one maintenance task if it is due, within its time limit and lock timeout.
+
+    Args:
+        name (str): Key of MAINTENANCE_TASKS
+        force (bool): Run now even if not due or outside the maintenance window
+            (still skipped while another process holds the task)
+
+    Returns:
+        dict: task, status ('ok', 'failed' or 'skipped'), started_at, duration_ms,
+            rows_affected and error; 'skipped' runs are not recorded
+    """
+    task = MAINTENANCE_TASKS[name]
+    started_at = _now()
+    result = {'task': name, 'status': 'skipped', 'started_at': started_at.isoformat(),
+              'duration_ms': 0, 'rows_affected': None, 'error': None}
+    if not force and task['off_peak'] and not in_maintenance_window(started_at):
+        return result
+    if not _claim(name, started_at, force):
+        return result
+
+    started = time.perf_counter()
+    try:
+        result['rows_affected'] = task['function'](time.time() + task['time_limit'], task['lock_timeout_ms'])
+        result['status'] = 'ok'
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        print(f"Maintenance task {name} failed: {str(e)}")
+        traceback.print_exc()
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    _finish(name, started_at, result['duration_ms'], result['rows_affected'], result['status'], result['error'])
+    print(f"Maintenance task {name}: {result['status']}, {result['rows_affected']} affected "
+          f"in {result['duration_ms']} ms")
+    return result
+
+def run_in_background(name):
+    """
+    Run a task now (force=True) in a background thread unless an on-demand run
+    is already going in this process; other processes are kept out by the claim.
+
+    Returns:
+        bool: True if a run was started
+    """
+    if not _refresh_lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            run_task(name, force=True)
+        except Exception as e:
+            print(f"Background {name} run failed: {str(e)}")
+            traceback.print_exc()
+        finally:
+            _refresh_lock.release()
+
+    threading.Thread(target=run, name=f'{name}-refresh', daemon=True).start()
+    return True
+
+def run_due_tasks(names=None):
+    """Run every due task in names (default all of MAINTENANCE_TASKS) in turn; returns the runs that happened"""
+    return [result for result in (run_task(name) for name in names or MAINTENANCE_TASKS)
+            if result['status'] != 'skipped']
+
+def _runner_loop(scheduled):
+    names = list(MAINTENANCE_TASKS) if scheduled else ['diagnostics']
+    tables_ready = False
+    while True:
+        try:
+            if not tables_ready:
+                ensure_maintenance_tables()
+                tables_ready = True
+            run_due_tasks(names)
+        except Exception as e:
+            print(f"Maintenance runner error: {str(e)}")
+            traceback.print_exc()
+        time.sleep(SCHEDULER_TICK)
+
+def start_runner(scheduled=MAINTENANCE_IN_APP):
+    """
+    Start the background maintenance thread if it is not already running.
+
+    Every SCHEDULER_TICK it runs whichever tasks are due: diagnostics, plus the
+    rest of MAINTENANCE_TASKS when scheduled. Each run is claimed in
+    maintenance_schedule, so with several server workers (each with a runner)
+    a task still runs once per interval, in whichever worker claims it first.
+    """
+    global _runner
+    with _lock:
+        if _runner is None:
+            _runner = threading.Thread(target=_runner_loop, args=(scheduled,), name='maintenance-runner', daemon=True)
+            _runner.start()
+
+def last_result(name='diagnostics'):
+    """Most recent published result of a task from any process, or None before the first one finishes"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT last_result FROM maintenance_schedule WHERE task_name = ?", (name,))
+            row = cursor.fetchone()
+    except Exception as e:
+        print(f"Could not read the last {name} result: {str(e)}")
+        return _last_results.get(name)
+    return json.loads(row[0]) if row and row[0] else _last_results.get(name)
+
+def maintenance_status(limit=RECENT_RUNS):
+    """
+    Return each task's schedule and the most recent recorded runs. Only reads;
+    the tables are created by the runner (start_runner) or `python maintenance.py`.
+
+    Returns:
+        dict: in_window, tasks (next_run_at, locked_until, locked_by), recent runs
+            and error (set when the tables cannot be read, e.g. before the runner created them)
+    """
+    status = {'in_window': in_maintenance_window(), 'tasks': {}, 'runs': [], 'error': None}
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT task_name, next_run_at, locked_until, locked_by FROM maintenance_schedule")
+            status['tasks'] = {row[0]: {
+                'next_run_at': str(row[1]) if row[1] else None,
+                'locked_until': str(row[2]) if row[2] else None,
+                'locked_by': row[3]
+            } for row in cursor.fetchall()}
+            cursor.execute("SELECT task_name, started_at, duration_ms, rows_affected, status, error, runner "
+                           "FROM maintenance_runs ORDER BY run_id DESC")
+            status['runs'] = [{
+                'task': row[0],
+                'started_at': str(row[1]),
+                'duration_ms': row[2],
+                'rows_affected': row[3],
+                'status': row[4],
+                'error': row[5],
+                'runner': row[6]
+            } for row in cursor.fetchmany(limit)]
+    except Exception as e:
+        print(f"Error reading maintenance status: {str(e)}")
+        status['error'] = str(e)
+    return status
+
+if __name__ == "__main__":
+    # python maintenance.py            run the scheduler in the foreground (a standalone maintenance service)
+    # python maintenance.py once TASK  run one task now, ignoring its schedule and the window
+    # python maintenance.py status     print the schedule and recent runs
+    ensure_maintenance_tables()
+    if len(sys.argv) > 2 and sys.argv[1] == 'once':
+        if sys.argv[2] not in MAINTENANCE_TASKS:
+            print(f"Unknown task {sys.argv[2]}; choose from {', '.join(MAINTENANCE_TASKS)}")
+            sys.exit(1)
+        print(json.dumps(run_task(sys.argv[2], force=True), indent=2))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'status':
+        print(json.dumps(maintenance_status(), indent=2))
+    else:
+        print(f"Maintenance scheduler running as {_runner_id}; window "
+              f"{MAINTENANCE_WINDOW_START:02d}:00-{MAINTENANCE_WINDOW_END:02d}:00")
+        _runner_loop(True)
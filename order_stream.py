@@ -0,0 +1,215 @@
+import json
+import queue
+import threading
+import time
+import traceback
+from config import STREAM_MAX_CLIENTS, STREAM_MAX_LIFETIME
+from sales_db import get_sales_db_connection
+
+# Order stream configuration
+STREAM_POLL_INTERVAL = 5      # Seconds between polls of sales_orders (shared by every client)
+STREAM_HEARTBEAT = 15         # Seconds of silence before a keep-alive comment is sent
+STREAM_BATCH_LIMIT = 200      # New orders sent per poll; more than this triggers a resync
+SUBSCRIBER_QUEUE_SIZE = 50    # Undelivered events per client before it is told to resync
+
+_lock = threading.Lock()
+_subscribers = set()
+_poller = None
+_stopping = threading.Event()
+_state = {'high_water': None, 'row_count': None, 'polls': 0, 'last_poll': None, 'last_error': None, 'rejected': 0}
+
+def _format_event(event, data, event_id=None):
+    """Format one server-sent event; event_id comes back as Last-Event-ID when the browser reconnects"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ''
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _read_high_water(cursor):
+    cursor.execute("SELECT ISNULL(MAX(order_id), 0), COUNT_BIG(*) FROM sales_orders")
+    high_water, row_count = cursor.fetchone()
+    return int(high_water), int(row_count)
+
+def _read_new_orders(cursor, high_water):
+    """Orders above the high-water mark, oldest first"""
+    cursor.execute(f'''
+        SELECT TOP {STREAM_BATCH_LIMIT + 1}
+            so.order_id, so.order_date, so.total_amount, so.status,
+            c.customer_name, sp.salesperson_name,
+            (r.country + ' - ' + r.state) AS region
+        FROM sales_orders so
+        LEFT JOIN customers c ON so.customer_id = c.customer_id
+        LEFT JOIN salespersons sp ON so.salesperson_id = sp.salesperson_id
+        LEFT JOIN regions r ON so.region_id = r.region_id
+        WHERE so.order_id > ?
+        ORDER BY so.order_id
+    ''', (high_water,))
+    return [{
+        'order_id': row.order_id,
+        'order_date': row.order_date.strftime('%Y-%m-%d') if row.order_date else None,
+        'total_amount': float(row.total_amount or 0),
+        'status': row.status,
+        'customer_name': row.customer_name,
+        'salesperson_name': row.salesperson_name,
+        'region': row.region
+    } for row in cursor.fetchall()]
+
+def _drain(subscriber):
+    while True:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            break
+
+def _broadcast(message):
+    """Queue a formatted event for every subscriber; clients that fall behind get a resync"""
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        try:
+            subscriber.put_nowait(message)
+        except queue.Full:
+            # Drop the backlog and ask the browser to reload its cards once
+            _drain(subscriber)
+            subscriber.put_nowait(_format_event('resync', {'reason': 'client fell behind'}))
+
+def poll_once(cursor):
+    """
+    Read orders above the high-water mark and broadcast them as one delta.
+
+    The first poll only records the mark. If the row count moved by something
+    other than the new orders (deletes, or more than STREAM_BATCH_LIMIT new
+    rows) clients are told to resync instead of applying a partial delta.
+
+    Returns:
+        int: Number of new orders broadcast
+    """
+    high_water, row_count = _read_high_water(cursor)
+    with _lock:
+        previous_mark, previous_count = _state['high_water'], _state['row_count']
+        _state['polls'] += 1
+        _state['last_poll'] = time.time()
+        if previous_mark is None:
+            _state['high_water'], _state['row_count'] = high_water, row_count
+            return 0
+    if high_water == previous_mark and row_count == previous_count:
+        return 0
+
+    orders = _read_new_orders(cursor, previous_mark) if high_water > previous_mark else []
+    with _lock:
+        _state['high_water'], _state['row_count'] = high_water, row_count
+
+    if len(orders) > STREAM_BATCH_LIMIT or row_count - previous_count != len(orders):
+        _broadcast(_format_event('resync', {'high_water': high_water}))
+        return 0
+
+    _broadcast(_format_event('orders', {
+        'high_water': high_water,
+        'orders': orders,
+        'totals': {
+            'sales': sum(order['total_amount'] for order in orders),
+            'orders': len(orders),
+            'pending': sum(1 for order in orders if order['status'] == 'Pending')
+        }
+    }, event_id=high_water))
+    return len(orders)
+
+def _poll_loop():
+    """Shared poller: one sales database query per interval while anyone is listening"""
+    global _poller
+    while True:
+        with _lock:
+            if not _subscribers:
+                _poller = None
+                _state['high_water'] = _state['row_count'] = None
+                return
+        try:
+            with get_sales_db_connection() as conn:
+                poll_once(conn.cursor())
+            with _lock:
+                _state['last_error'] = None
+        except Exception as e:
+            with _lock:
+                _state['last_error'] = str(e)
+            print(f"Order stream poll failed: {str(e)}")
+            traceback.print_exc()
+        time.sleep(STREAM_POLL_INTERVAL)
+
+def subscribe():
+    """
+    Register a client and start the shared poller if it is not running.
+
+    Returns:
+        queue.Queue or None: The client's queue; None when STREAM_MAX_CLIENTS streams
+            are already open or the process is shutting down
+    """
+    global _poller
+    subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+    with _lock:
+        if _stopping.is_set() or len(_subscribers) >= STREAM_MAX_CLIENTS:
+            _state['rejected'] += 1
+            return None
+        _subscribers.add(subscriber)
+        if _poller is None:
+            _poller = threading.Thread(target=_poll_loop, name='order-stream-poller', daemon=True)
+            _poller.start()
+    return subscriber
+
+def unsubscribe(subscriber):
+    """Remove a client; the poller exits on its next pass once nobody is left"""
+    with _lock:
+        _subscribers.discard(subscriber)
+
+def event_stream(subscriber, last_event_id=None):
+    """
+    Yield server-sent events for one client until it disconnects, STREAM_MAX_LIFETIME
+    passes or stop_streams() is called. The browser then reconnects on its own.
+
+    Args:
+        subscriber (queue.Queue): Queue returned by subscribe()
+        last_event_id (str, optional): Last-Event-ID sent by a reconnecting browser; if orders
+            arrived while it was away it is told to resync
+    """
+    closes_at = time.time() + STREAM_MAX_LIFETIME
+    try:
+        yield f"retry: {STREAM_POLL_INTERVAL * 1000}\n\n"
+        yield _format_event('hello', {'poll_interval': STREAM_POLL_INTERVAL})
+        with _lock:
+            high_water = _state['high_water']
+        if last_event_id and str(high_water) != last_event_id:
+            yield _format_event('resync', {'reason': 'reconnected'})
+        while not _stopping.is_set():
+            remaining = closes_at - time.time()
+            if remaining <= 0:
+                break
+            try:
+                message = subscriber.get(timeout=min(STREAM_HEARTBEAT, remaining))
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+    finally:
+        unsubscribe(subscriber)
+
+def stop_streams():
+    """Refuse new streams and end the open ones so a shutting-down worker frees its threads"""
+    _stopping.set()
+    with _lock:
+        subscribers = list(_subscribers)
+    for subscriber in subscribers:
+        _drain(subscriber)
+        try:
+            subscriber.put_nowait(None)
+        except queue.Full:
+            pass
+    return len(subscribers)
+
+def stream_stats():
+    """Return subscriber count and poller state"""
+    with _lock:
+        return {
+            **_state,
+            'subscribers': len(_subscribers),
+            'max_subscribers': STREAM_MAX_CLIENTS,
+            'poller_running': _poller is not None
+        }
@@ -0,0 +1,226 @@
+import multiprocessing
+import threading
+import time
+import traceback
+from collections import deque
+from config import PARSE_TIME_LIMIT, PARSE_PAGE_LIMIT, PARSE_WORKERS
+from pdf_parser import (
+    ParseBudgetExceeded, extract_pdf_content, parse_invoice_data, parse_line_items, set_progress_hook
+)
+
+WORKER_START_TIMEOUT = 60  # Seconds a new worker may take to import the parser
+RECENT_OVERRUNS = 20       # Budget overruns kept for parse_stats()
+
+# spawn, not fork: the web server is multi-threaded and MuPDF state must not be shared
+_context = multiprocessing.get_context('spawn')
+_lock = threading.Lock()
+_pool_size = max(PARSE_WORKERS, 1)   # Worker processes this server process may run
+_slots = threading.BoundedSemaphore(_pool_size)
+_idle = []
+_stats = {'documents': 0, 'overruns': 0, 'page_limit_rejections': 0, 'worker_restarts': 0}
+_overruns = deque(maxlen=RECENT_OVERRUNS)
+
+def parse_document(source, company_key, max_pages=PARSE_PAGE_LIMIT, on_partial=None):
+    """
+    Extract and parse one invoice PDF: header fields and line items.
+
+    Args:
+        source (str, bytes or memoryview): Path of the PDF, or its contents
+        company_key (str): Supplier key selecting the parser
+        max_pages (int): Refuse documents with more pages than this
+        on_partial (callable, optional): Called with a dict of results as each stage completes
+
+    Returns:
+        dict: 'header' (parse_invoice_data tuple), 'line_items' and 'page_count'
+    """
+    text, page_words = extract_pdf_content(source, max_pages)
+    if on_partial:
+        on_partial({'page_count': len(page_words), 'text_length': len(text)})
+    header = parse_invoice_data(text, company_key)
+    if on_partial:
+        on_partial({'invoice_no': header[3], 'company': header[0], 'total': header[9]})
+    line_items = parse_line_items(text, header[3], company_key, page_words)
+    return {'header': header, 'line_items': line_items, 'page_count': len(page_words)}
+
+def _worker_main(conn):
+    """Worker process loop: parse each job received, streaming progress back to the parent"""
+    set_progress_hook(lambda stage, detail: conn.send(('progress', stage, detail)))
+    conn.send(('ready',))
+    while True:
+        try:
+            source, company_key, max_pages = conn.recv()
+        except EOFError:
+            return
+        try:
+            result = parse_document(source, company_key, max_pages,
+                                    on_partial=lambda values: conn.send(('partial', values)))
+            conn.send(('done', result))
+        except ParseBudgetExceeded as e:
+            conn.send(('budget', str(e), e.stage, e.detail, e.partial))
+        except Exception as e:
+            traceback.print_exc()
+            conn.send(('error', f"{type(e).__name__}: {str(e)}"))
+
+class _Worker:
+    """One parser process and the parent's end of its pipe"""
+
+    def __init__(self):
+        self.conn, child_conn = _context.Pipe()
+        self.process = _context.Process(target=_worker_main, args=(child_conn,), name='pdf-parse-worker', daemon=True)
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(WORKER_START_TIMEOUT):
+            self.kill()
+            raise RuntimeError("PDF parse worker did not start")
+        self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+def _checkout():
+    _slots.acquire()
+    try:
+        with _lock:
+            if _idle:
+                return _idle.pop()
+        return _Worker()
+    except Exception:
+        _slots.release()
+        raise
+
+def _checkin(worker):
+    if worker is not None:
+        with _lock:
+            _idle.append(worker)
+    _slots.release()
+
+def share_pool(server_processes):
+    """
+    Size this process's pool as its share of PARSE_WORKERS when server_processes
+    server processes run on the host (at least one worker each). Call before the
+    first parse, e.g. from gunicorn's post_worker_init.
+
+    Returns:
+        int: The pool size for this process
+    """
+    global _pool_size, _slots
+    _pool_size = max(PARSE_WORKERS // max(server_processes, 1), 1)
+    _slots = threading.BoundedSemaphore(_pool_size)
+    return _pool_size
+
+def start_workers(count=None):
+    """Spawn idle workers up to count (default the pool size) so the first uploads do not pay for process start-up"""
+    if count is None:
+        count = _pool_size if PARSE_WORKERS > 0 else 0
+    with _lock:
+        missing = count - len(_idle)
+    for _ in range(max(missing, 0)):
+        worker = _Worker()
+        with _lock:
+            _idle.append(worker)
+
+def stop_workers():
+    """Stop the idle workers; a worker still parsing is stopped when its request returns it"""
+    with _lock:
+        workers = _idle[:]
+        _idle.clear()
+    for worker in workers:
+        worker.kill()
+    return len(workers)
+
+def _record_overrun(company_key, stage, detail, elapsed):
+    _stats['overruns'] += 1
+    _overruns.append({
+        'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'company_key': company_key,
+        'stage': stage,
+        'detail': detail,
+        'elapsed_s': round(elapsed, 3)
+    })
+    print(f"PDF parse for {company_key} stopped after {elapsed:.1f}s during {stage}: {detail}")
+
+def parse_invoice_pdf(source, company_key, time_limit=PARSE_TIME_LIMIT, max_pages=PARSE_PAGE_LIMIT):
+    """
+    Parse an invoice PDF in a worker process within a page and wall-clock budget.
+
+    source is a file path, which the worker opens itself, or the PDF's bytes
+    or memoryview, which are copied to the worker.
+
+    A worker that overruns time_limit is killed and replaced, so a pathological
+    document costs one worker for time_limit seconds and nothing more. With
+    PARSE_WORKERS = 0 the document is parsed in this process with only the
+    page budget enforced.
+
+    Raises:
+        ParseBudgetExceeded: With the stage and page or pattern running when the budget ran out,
+            and whatever was parsed before that
+        ValueError: If the worker failed to parse the document
+
+    Returns:
+        dict: As parse_document
+    """
+    _stats['documents'] += 1
+    if PARSE_WORKERS <= 0:
+        try:
+            return parse_document(source, company_key, max_pages)
+        except ParseBudgetExceeded:
+            _stats['page_limit_rejections'] += 1
+            raise
+
+    worker = _checkout()
+    started = time.perf_counter()
+    stage, detail, partial = 'queued', '', {}
+    try:
+        # A memoryview cannot be pickled; paths cross the pipe as a few bytes
+        payload = bytes(source) if isinstance(source, memoryview) else source
+        worker.conn.send((payload, company_key, max_pages))
+        while True:
+            remaining = started + time_limit - time.perf_counter()
+            if remaining <= 0 or not worker.conn.poll(remaining):
+                elapsed = time.perf_counter() - started
+                worker.kill()
+                worker = None
+                _stats['worker_restarts'] += 1
+                _record_overrun(company_key, stage, detail, elapsed)
+                raise ParseBudgetExceeded(
+                    f"Parsing stopped after {elapsed:.1f}s (limit {time_limit:g}s) during {stage}: {detail}",
+                    stage=stage, detail=detail, elapsed=elapsed, partial=partial)
+
+            message = worker.conn.recv()
+            if message[0] == 'progress':
+                stage, detail = message[1], message[2]
+            elif message[0] == 'partial':
+                partial.update(message[1])
+            elif message[0] == 'done':
+                return message[1]
+            elif message[0] == 'budget':
+                _stats['page_limit_rejections'] += 1
+                raise ParseBudgetExceeded(message[1], stage=message[2], detail=message[3],
+                                          elapsed=time.perf_counter() - started, partial=message[4])
+            else:
+                raise ValueError(message[1])
+    except (EOFError, OSError) as e:
+        # The worker died (crash in MuPDF, out of memory); replace it
+        if worker is not None:
+            worker.kill()
+            worker = None
+            _stats['worker_restarts'] += 1
+        raise ValueError(f"PDF parse worker exited during {stage}: {str(e) or type(e).__name__}")
+    finally:
+        _checkin(worker)
+
+def parse_stats():
+    """Return document and overrun counts, worker pool state and the most recent overruns"""
+    with _lock:
+        idle = len(_idle)
+    return {
+        **_stats,
+        'time_limit_s': PARSE_TIME_LIMIT,
+        'page_limit': PARSE_PAGE_LIMIT,
+        'workers': _pool_size if PARSE_WORKERS > 0 else 0,
+        'host_workers': PARSE_WORKERS,
+        'idle_workers': idle,
+        'recent_overruns': list(_overruns)
+    }
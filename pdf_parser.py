@@ -1,10 +1,65 @@
 import fitz  # PyMuPDF
 import re
 import io
-from datetime import datetime
-
-def extract_text_from_pdf(file_stream):
-    """Extract text from a PDF file stream"""
+import os
+from date_normalizer import format_date, supplier_date_order
+
+# Column headers of each supplier's line-item table, by field. Column boundaries are
+# found from where these headers sit on the page, so descriptions can be anything.
+DEFAULT_TABLE_HEADERS = {
+    'item_no': 'Item No',
+    'description': 'Description',
+    'unit': 'Unit',
+    'quantity': 'Qty',
+    'unit_price': 'Unit Price',
+    'total_price': 'Amount'
+}
+SUPPLIER_TABLE_HEADERS = {
+    'SUPPLIER1': DEFAULT_TABLE_HEADERS,
+    'SUPPLIER2': DEFAULT_TABLE_HEADERS,
+    'SUPPLIER3': DEFAULT_TABLE_HEADERS
+}
+ROW_TOLERANCE = 0.5  # Words whose vertical centres differ by less than this x their height share a row
+COLUMN_GAP = 3       # Points left of a header where its column begins
+AMOUNT_CELL = re.compile(r'-?\d+(?:\.\d+)?')  # A quantity or price cell once currency symbols and commas are removed
+
+HEADER_SCAN_CHARS = 4000  # Free-text header patterns (company block, address) only scan this much of the text
+
+class ParseBudgetExceeded(ValueError):
+    """
+    A document went over its page or time budget.
+
+    Attributes:
+        stage (str): Pipeline stage running when parsing stopped ('pages', 'extract', 'header', 'line_items')
+        detail (str): Page or pattern being processed at that point
+        elapsed (float): Seconds spent on the document
+        partial (dict): What was parsed before the budget ran out
+    """
+
+    def __init__(self, message, stage='', detail='', elapsed=0.0, partial=None):
+        super().__init__(message)
+        self.stage = stage
+        self.detail = detail
+        self.elapsed = elapsed
+        self.partial = partial or {}
+
+_progress_hook = None
+
+def set_progress_hook(hook):
+    """Install hook(stage, detail), called as parsing moves between pages and patterns (None to remove)"""
+    global _progress_hook
+    _progress_hook = hook
+
+def _report(stage, detail=''):
+    if _progress_hook:
+        _progress_hook(stage, detail)
+
+def _search(pattern, text, flags=0):
+    """re.search that reports the pattern to the progress hook first"""
+    _report('header', pattern)
+    return re.search(pattern, text, flags)
+
+def _read_pdf_bytes(file_stream):
     if not hasattr(file_stream, 'read'):
         raise ValueError("Invalid file stream: must have a 'read' method")
 
@@ -18,37 +73,179 @@ def extract_text_from_pdf(file_stream):
     pdf_bytes = file_stream.read()
     if not pdf_bytes:
         raise ValueError("Failed to read PDF content")
+    return pdf_bytes
+
+def open_pdf(source):
+    """
+    Open a PDF from a file path, an in-memory buffer (bytes or memoryview) or a file stream.
+
+    Paths and buffers are handed to PyMuPDF as they are; only a stream is read into memory.
+    """
+    if isinstance(source, str):
+        if os.path.getsize(source) == 0:
+            raise ValueError("Uploaded PDF file is empty")
+        return fitz.open(source, filetype="pdf")
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if len(source) == 0:
+            raise ValueError("Uploaded PDF file is empty")
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open("pdf", _read_pdf_bytes(source))
 
-    doc = fitz.open("pdf", pdf_bytes)
+def extract_text_from_pdf(file_stream):
+    """Extract text from a PDF file stream"""
+    doc = fitz.open("pdf", _read_pdf_bytes(file_stream))
     text = ""
     for page in doc:
         text += page.get_text()
     doc.close()
     return text
 
+def extract_pdf_content(source, max_pages=None):
+    """
+    Extract text and word positions from a PDF in one pass over its pages.
+
+    Args:
+        source: File path, bytes/memoryview or readable stream (see open_pdf)
+        max_pages (int, optional): Refuse documents with more pages than this
+
+    Returns:
+        tuple: (text, list of per-page word tuples from page.get_text("words"))
+    """
+    doc = open_pdf(source)
+    if max_pages and doc.page_count > max_pages:
+        page_count = doc.page_count
+        doc.close()
+        raise ParseBudgetExceeded(f"PDF has {page_count} pages; the limit is {max_pages}",
+                                  stage='pages', detail=f"{page_count} pages", partial={'page_count': page_count})
+    text = ""
+    page_words = []
+    for number, page in enumerate(doc, start=1):
+        _report('extract', f"page {number}/{doc.page_count}")
+        text += page.get_text()
+        page_words.append(page.get_text("words"))
+    doc.close()
+    return text, page_words
+
+def _group_rows(words):
+    """Group (x0, y0, x1, y1, word, ...) tuples into rows of words, top to bottom, each left to right"""
+    rows = []
+    current, row_centre = [], None
+    for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+        centre, height = (word[1] + word[3]) / 2, word[3] - word[1]
+        if current and abs(centre - row_centre) > height * ROW_TOLERANCE:
+            rows.append(sorted(current))
+            current = []
+        if not current:
+            row_centre = centre
+        current.append(word)
+    if current:
+        rows.append(sorted(current))
+    return rows
+
+def _find_columns(row, headers):
+    """
+    Locate every header of the table in one row of words.
+
+    Returns:
+        list: (left boundary, field) per column sorted by position, or None if a header is missing
+    """
+    texts = [word[4].lower() for word in row]
+    claimed = set()
+    spans = []
+    # Longest headers first, so 'Unit Price' is matched before 'Unit' can take its first word
+    for field, header in sorted(headers.items(), key=lambda entry: -len(entry[1].split())):
+        tokens = header.lower().split()
+        for start in range(len(texts) - len(tokens) + 1):
+            positions = set(range(start, start + len(tokens)))
+            if texts[start:start + len(tokens)] == tokens and not positions & claimed:
+                claimed |= positions
+                spans.append((row[start][0], row[start + len(tokens) - 1][2], field))
+                break
+        else:
+            return None
+    spans.sort()
+    # A column starts just left of its header; words are placed by their centre
+    columns = [(float('-inf'), spans[0][2])]
+    for start, _, field in spans[1:]:
+        columns.append((start - COLUMN_GAP, field))
+    return columns
+
+def extract_table_line_items(page_words, company_key):
+    """
+    Extract line items by slicing each row of words at the table's column boundaries.
+
+    Boundaries come from the header row and carry over to following pages
+    that have no header of their own. A row is a line item when it has an
+    item number, an integer quantity and numeric prices.
+
+    Args:
+        page_words (list): Per-page word tuples from extract_pdf_content
+        company_key (str): Supplier key selecting the column headers
+
+    Returns:
+        list: Line item dicts, or None if no header row was found
+    """
+    headers = SUPPLIER_TABLE_HEADERS.get(company_key, DEFAULT_TABLE_HEADERS)
+    header_words = {header.split()[0].lower() for header in headers.values()}
+    columns = None
+    items = []
+    for words in page_words:
+        for row in _group_rows(words):
+            header_columns = None
+            if header_words <= {word[4].lower() for word in row}:
+                header_columns = _find_columns(row, headers)
+            if header_columns:
+                columns = header_columns
+                continue
+            if not columns:
+                continue
+
+            cells = {field: [] for _, field in columns}
+            index = 0
+            for word in row:
+                centre = (word[0] + word[2]) / 2
+                while index + 1 < len(columns) and centre >= columns[index + 1][0]:
+                    index += 1
+                cells[columns[index][1]].append(word[4])
+            values = {field: ' '.join(parts) for field, parts in cells.items()}
+            if items and values['description'] and not any(
+                    value for field, value in values.items() if field != 'description'):
+                # A description wrapped onto its own line belongs to the item above
+                items[-1]['description'] += ' ' + values['description']
+                continue
+            if not all(values[field] and AMOUNT_CELL.fullmatch(clean_amount(values[field]))
+                       for field in ('quantity', 'unit_price', 'total_price')):
+                # clean_amount('') is '0', so footers and notes would otherwise become zero-value items
+                continue
+            try:
+                item = {
+                    "item_no": values['item_no'],
+                    "description": values['description'],
+                    "unit": values['unit'],
+                    "quantity": int(clean_amount(values['quantity'])),
+                    "unit_price": float(clean_amount(values['unit_price'])),
+                    "total_price": float(clean_amount(values['total_price']))
+                }
+            except ValueError:
+                continue
+            if item['item_no'] and ' ' not in item['item_no']:
+                items.append(item)
+    return items if columns else None
+
 def clean_amount(amount):
     """Clean currency symbols and commas from amount"""
     if amount:
         return amount.replace('₹', '').replace('$', '').replace(',', '').strip()
     return '0'
 
-def parse_date(date_str):
-    """Convert various date formats to DD-MM-YYYY"""
+def parse_date(date_str, company_key=''):
+    """Convert various date formats to DD-MM-YYYY, reading ambiguous numeric dates in the supplier's order"""
     if not date_str:
         return ''
-    try:
-        for fmt in ('%d-%m-%Y', '%d/%m/%Y', '%m/%d/%Y', '%d-%b-%Y', '%Y-%m-%d', '%d %B %Y'):
-            try:
-                parsed_date = datetime.strptime(date_str, fmt)
-                print(f"Parsed date '{date_str}' as {parsed_date.strftime('%d-%m-%Y')} using format {fmt}")
-                return parsed_date.strftime('%d-%m-%Y')
-            except ValueError:
-                continue
+    parsed = format_date(date_str, '%d-%m-%Y', supplier_date_order(company_key))
+    if not parsed:
         print(f"Failed to parse date '{date_str}': no matching format")
-        return ''
-    except Exception as e:
-        print(f"Error parsing date '{date_str}': {e}")
-        return ''
+    return parsed
 
 def parse_invoice_data(text, company_key):
     """Parse invoice data based on supplier key"""
@@ -63,31 +260,31 @@ def parse_invoice_data(text, company_key):
 
 def parse_supplier1_invoice(text):
     """Parse invoice data for SUPPLIER1"""
-    gst_match = re.search(r'GSTIN\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
+    gst_match = _search(r'GSTIN\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
     gstin = gst_match.group(1).strip() if gst_match else ''
 
-    from_block_match = re.search(r'From\s*:?\s*(.*?)GSTIN', text, re.IGNORECASE | re.DOTALL)
+    from_block_match = _search(r'From\s*:?\s*(.*?)GSTIN', text[:HEADER_SCAN_CHARS], re.IGNORECASE | re.DOTALL)
     from_block = from_block_match.group(1).strip() if from_block_match else ''
     lines = [line.strip() for line in from_block.split('\n') if line.strip()]
     company = lines[0] if lines else ''
     address = ', '.join(lines[1:]) if len(lines) > 1 else ''
 
-    invoice_no_match = re.search(r'Invoice No\s*[:\-]?\s*(\w+\-?\d+)', text, re.IGNORECASE)
+    invoice_no_match = _search(r'Invoice No\s*[:\-]?\s*(\w+\-?\d+)', text, re.IGNORECASE)
     invoice_no = invoice_no_match.group(1).strip() if invoice_no_match else ''
 
     date_pattern = r'(\d{2}[/-]\d{2}[/-]\d{4}|\d{2}-[A-Za-z]{3}-\d{4}|\d{4}-\d{2}-\d{2})'
-    invoice_date_match = re.search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    due_date_match = re.search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    po_number_match = re.search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    terms_match = re.search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
-    shipping_method_match = re.search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
-    subtotal_match = re.search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    discount_match = re.search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    tax_match = re.search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    total_match = re.search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-
-    invoice_date = parse_date(invoice_date_match.group(1).strip()) if invoice_date_match else ''
-    due_date = parse_date(due_date_match.group(1).strip()) if due_date_match else ''
+    invoice_date_match = _search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    due_date_match = _search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    po_number_match = _search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    terms_match = _search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
+    shipping_method_match = _search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
+    subtotal_match = _search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    discount_match = _search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    tax_match = _search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    total_match = _search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+
+    invoice_date = parse_date(invoice_date_match.group(1).strip(), 'SUPPLIER1') if invoice_date_match else ''
+    due_date = parse_date(due_date_match.group(1).strip(), 'SUPPLIER1') if due_date_match else ''
     po_number = po_number_match.group(1).strip() if po_number_match else ''
     terms = terms_match.group(1).strip() if terms_match else 'Net 30'
     shipping_method = shipping_method_match.group(1).strip() if shipping_method_match else 'Courier'
@@ -100,30 +297,30 @@ def parse_supplier1_invoice(text):
 
 def parse_supplier2_invoice(text):
     """Parse invoice data for SUPPLIER2"""
-    gst_match = re.search(r'GST\s*ID\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
+    gst_match = _search(r'GST\s*ID\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
     gstin = gst_match.group(1).strip() if gst_match else ''
 
-    company_match = re.search(r'Global Imports Inc\.', text, re.IGNORECASE)
+    company_match = _search(r'Global Imports Inc\.', text, re.IGNORECASE)
     company = 'Global Imports Inc.' if company_match else ''
-    address_match = re.search(r'456 Global Avenue.*?(?=GST\s*ID|$)', text, re.IGNORECASE | re.DOTALL)
+    address_match = _search(r'456 Global Avenue.*?(?=GST\s*ID|$)', text[:HEADER_SCAN_CHARS], re.IGNORECASE | re.DOTALL)
     address = address_match.group(0).strip() if address_match else '456 Global Avenue, New York, NY, 10001, USA'
 
-    invoice_no_match = re.search(r'Invoice\s*#?\s*[:\-]?\s*(\S+)', text, re.IGNORECASE)
+    invoice_no_match = _search(r'Invoice\s*#?\s*[:\-]?\s*(\S+)', text, re.IGNORECASE)
     invoice_no = invoice_no_match.group(1).strip() if invoice_no_match else ''
 
     date_pattern = r'(\d{2}[/-]\d{2}[/-]\d{4}|\d{2}-[A-Za-z]{3}-\d{4}|\d{4}-\d{2}-\d{2})'
-    invoice_date_match = re.search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    due_date_match = re.search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    po_number_match = re.search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    terms_match = re.search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
-    shipping_method_match = re.search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
-    subtotal_match = re.search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    discount_match = re.search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    tax_match = re.search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    total_match = re.search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-
-    invoice_date = parse_date(invoice_date_match.group(1).strip()) if invoice_date_match else ''
-    due_date = parse_date(due_date_match.group(1).strip()) if due_date_match else ''
+    invoice_date_match = _search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    due_date_match = _search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    po_number_match = _search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    terms_match = _search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
+    shipping_method_match = _search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
+    subtotal_match = _search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    discount_match = _search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    tax_match = _search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    total_match = _search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+
+    invoice_date = parse_date(invoice_date_match.group(1).strip(), 'SUPPLIER2') if invoice_date_match else ''
+    due_date = parse_date(due_date_match.group(1).strip(), 'SUPPLIER2') if due_date_match else ''
     po_number = po_number_match.group(1).strip() if po_number_match else ''
     terms = terms_match.group(1).strip() if terms_match else 'Net 30'
     shipping_method = shipping_method_match.group(1).strip() if shipping_method_match else 'Freight'
@@ -136,30 +333,30 @@ def parse_supplier2_invoice(text):
 
 def parse_supplier3_invoice(text):
     """Parse invoice data for SUPPLIER3"""
-    gst_match = re.search(r'GSTIN\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
+    gst_match = _search(r'GSTIN\s*[:\-]?\s*([0-9A-Z]{15})', text, re.IGNORECASE)
     gstin = gst_match.group(1).strip() if gst_match else ''
 
-    company_match = re.search(r'NexGen Enterprises', text, re.IGNORECASE)
+    company_match = _search(r'NexGen Enterprises', text, re.IGNORECASE)
     company = 'NexGen Enterprises' if company_match else ''
-    address_match = re.search(r'789 NexGen Road.*?(?=GSTIN|$)', text, re.IGNORECASE | re.DOTALL)
+    address_match = _search(r'789 NexGen Road.*?(?=GSTIN|$)', text[:HEADER_SCAN_CHARS], re.IGNORECASE | re.DOTALL)
     address = address_match.group(0).strip() if address_match else '789 NexGen Road, Toronto, ON, M5V2T6, Canada'
 
-    invoice_no_match = re.search(r'Invoice\s*Number\s*[:\-]?\s*(\S+)', text, re.IGNORECASE)
+    invoice_no_match = _search(r'Invoice\s*Number\s*[:\-]?\s*(\S+)', text, re.IGNORECASE)
     invoice_no = invoice_no_match.group(1).strip() if invoice_no_match else ''
 
     date_pattern = r'(\d{2}[/-]\d{2}[/-]\d{4}|\d{2}-[A-Za-z]{3}-\d{4}|\d{4}-\d{2}-\d{2})'
-    invoice_date_match = re.search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    due_date_match = re.search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
-    po_number_match = re.search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
-    terms_match = re.search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
-    shipping_method_match = re.search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
-    subtotal_match = re.search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    discount_match = re.search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    tax_match = re.search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-    total_match = re.search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
-
-    invoice_date = parse_date(invoice_date_match.group(1).strip()) if invoice_date_match else ''
-    due_date = parse_date(due_date_match.group(1).strip()) if due_date_match else ''
+    invoice_date_match = _search(r'Invoice Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    due_date_match = _search(r'Due Date\s*[:\-]?\s*' + date_pattern, text, re.IGNORECASE)
+    po_number_match = _search(r'PO Number\s*[:\-]?\s*(.+?)(?:\n|$)', text, re.IGNORECASE)
+    terms_match = _search(r'Terms\s*[:\-]?\s*(Net\s*\d+)', text, re.IGNORECASE)
+    shipping_method_match = _search(r'Shipping\s*Method\s*[:\-]?\s*(.*)', text, re.IGNORECASE)
+    subtotal_match = _search(r'Subtotal\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    discount_match = _search(r'Discount\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    tax_match = _search(r'Tax.*?\(\d+% GST\)?\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+    total_match = _search(r'Total\s*[:\-]?\s*INR\s*([\-\d,]+\.?\d*)', text, re.IGNORECASE)
+
+    invoice_date = parse_date(invoice_date_match.group(1).strip(), 'SUPPLIER3') if invoice_date_match else ''
+    due_date = parse_date(due_date_match.group(1).strip(), 'SUPPLIER3') if due_date_match else ''
     po_number = po_number_match.group(1).strip() if po_number_match else ''
     terms = terms_match.group(1).strip() if terms_match else 'Net 30'
     shipping_method = shipping_method_match.group(1).strip() if shipping_method_match else 'Air'
@@ -185,8 +382,21 @@ def parse_address(full_address):
         print(f"Error parsing address: {e}")
         return "", "", "", "", ""
 
-def parse_line_items(text, invoice_no="", company_key=""):
-    """Parse line items based on supplier key"""
+def parse_line_items(text, invoice_no="", company_key="", page_words=None):
+    """
+    Parse line items based on supplier key.
+
+    With page_words from extract_pdf_content the table is read by column
+    position; the supplier regexes below are the fallback for PDFs without
+    a recognizable header row.
+    """
+    if page_words is not None:
+        _report('line_items', 'column table')
+        items = extract_table_line_items(page_words, company_key)
+        if items is not None:
+            print(f"Table extraction found {len(items)} line items for invoice {invoice_no}")
+            return items
+
     print(f"\n=== DEBUG: Parsing line items for invoice {invoice_no}, company_key {company_key} ===")
     print(f"Text length: {len(text)} characters")
     print("Raw PDF text:")
@@ -210,6 +420,7 @@ def parse_line_items(text, invoice_no="", company_key=""):
             re.IGNORECASE
         )
         
+        _report('line_items', pattern.pattern)
         matches = list(pattern.finditer(text))
         print(f"Pattern for SUPPLIER1 found {len(matches)} matches")
         print("Matches:", [(match.group(0), match.groups()) for match in matches])
@@ -251,6 +462,7 @@ def parse_line_items(text, invoice_no="", company_key=""):
             re.IGNORECASE
         )
         
+        _report('line_items', pattern.pattern)
         matches = list(pattern.finditer(text))
         print(f"Pattern for SUPPLIER2 found {len(matches)} matches")
         print("Matches:", [(match.group(0), match.groups()) for match in matches])
@@ -288,6 +500,7 @@ def parse_line_items(text, invoice_no="", company_key=""):
             re.IGNORECASE
         )
         
+        _report('line_items', pattern.pattern)
         matches = list(pattern.finditer(text))
         print(f"Pattern for SUPPLIER3 found {len(matches)} matches")
         print("Matches:", [(match.group(0), match.groups()) for match in matches])
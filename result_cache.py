@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from sales_cube import get_data_version
+
+# Result cache configuration
+RESULT_CACHE_SIZE = 256       # Entries kept before the least recently used is evicted
+RESULT_CACHE_TTL = 300        # Seconds an entry is served even if the data version is unchanged
+DATA_VERSION_TTL = 5          # Seconds the sales data version is reused before it is read again
+
+_lock = threading.Lock()
+_cache = OrderedDict()        # key -> (value, data_version, stored_at)
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_data_version = (None, 0.0)   # (version, read_at)
+
+MISSING = object()
+
+def make_key(endpoint, filters, *parts):
+    """
+    Build a cache key from an endpoint name and its normalized filters.
+
+    Args:
+        endpoint (str): Endpoint or section name
+        filters (dict): Normalized filter values (lists are frozen to tuples)
+        *parts: Extra key components, e.g. a section name
+
+    Returns:
+        tuple: Hashable cache key
+    """
+    items = tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in filters.items()
+    ))
+    return (endpoint,) + parts + (items,)
+
+def current_data_version():
+    """
+    Return the sales data version (sales_cube.get_data_version: orders plus rollup refresh),
+    reading it at most once every DATA_VERSION_TTL seconds
+    """
+    global _data_version
+    version, read_at = _data_version
+    if version is not None and time.time() - read_at < DATA_VERSION_TTL:
+        return version
+    version = get_data_version()
+    _data_version = (version, time.time())
+    return version
+
+def get_cached(key, data_version):
+    """
+    Look up a cached result.
+
+    Returns:
+        The cached value, or MISSING if absent, expired or from another data version
+    """
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            value, version, stored_at = entry
+            if version == data_version and data_version is not None \
+                    and time.time() - stored_at < RESULT_CACHE_TTL:
+                _cache.move_to_end(key)
+                _stats['hits'] += 1
+                return value
+            del _cache[key]
+        _stats['misses'] += 1
+        return MISSING
+
+def put_cached(key, data_version, value):
+    """Store a result, evicting the least recently used entries beyond RESULT_CACHE_SIZE"""
+    if data_version is None:
+        return
+    with _lock:
+        _cache[key] = (value, data_version, time.time())
+        _cache.move_to_end(key)
+        while len(_cache) > RESULT_CACHE_SIZE:
+            _cache.popitem(last=False)
+            _stats['evictions'] += 1
+
+def clear_cache():
+    """Drop every cached result"""
+    global _data_version
+    with _lock:
+        _cache.clear()
+        _data_version = (None, 0.0)
+
+def cache_stats():
+    """Return hit/miss/eviction counters and the current entry count"""
+    with _lock:
+        return {**_stats, 'entries': len(_cache), 'data_version': _data_version[0]}
@@ -0,0 +1,244 @@
+import sys
+import time
+import traceback
+from datetime import timedelta
+from sales_db import get_sales_db_connection, get_sales_data_version
+
+# Daily rollup of sales_orders that every dashboard aggregate reads instead of raw orders.
+# It is built and refreshed only by refresh_sales_rollup(): schedule `python forecast_snapshots.py`
+# (cron / Task Scheduler, every few minutes) or run `python forecast_snapshots.py 300` as a service.
+ROLLUP_TABLE = 'sales_daily_rollup'
+
+# The rollup's columns computed from sales_orders at query time. Readers use it (through
+# rollup_source) until the first refresh has run, so a fresh install still shows data.
+ORDERS_AS_ROLLUP = '''(
+    SELECT CAST(so.order_date AS DATE) AS order_day,
+        so.region_id,
+        p.category,
+        so.customer_id,
+        so.salesperson_id,
+        so.status,
+        ISNULL(so.total_amount, 0) AS total_sales,
+        1 AS order_count,
+        CASE WHEN ROW_NUMBER() OVER (PARTITION BY so.customer_id ORDER BY so.order_date, so.order_id) = 1
+            THEN ISNULL(so.total_amount, 0) ELSE 0 END AS new_customer_sales
+    FROM sales_orders so
+    LEFT JOIN products p ON so.product_id = p.product_id
+)'''
+
+# Seconds before a missing rollup is checked for again
+ROLLUP_STATE_TTL = 60
+
+_rollup_ready = (False, 0.0)   # (built, checked_at)
+
+# Days before the high-water mark that each refresh re-aggregates, so orders
+# entered a little late (back-dated) are still picked up
+REFRESH_OVERLAP_DAYS = 1
+
+def create_rollup_tables():
+    """
+    Create the daily rollup table and its high-water mark table.
+
+    Grain is day x region x product category x customer x salesperson x status.
+    Customer is part of the grain, so distinct-customer counts over any filter
+    are exact COUNT(DISTINCT customer_id) over rollup rows.
+    """
+    try:
+        with get_sales_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = '{ROLLUP_TABLE}')
+                BEGIN
+                    CREATE TABLE {ROLLUP_TABLE} (
+                        order_day DATE NOT NULL,
+                        region_id INT NULL,
+                        category NVARCHAR(100) NULL,
+                        customer_id INT NULL,
+                        salesperson_id INT NULL,
+                        status NVARCHAR(50) NULL,
+                        total_sales DECIMAL(18, 2) NOT NULL,
+                        order_count INT NOT NULL,
+                        new_customer_sales DECIMAL(18, 2) NOT NULL
+                    );
+                    CREATE CLUSTERED INDEX IX_{ROLLUP_TABLE}_day
+                        ON {ROLLUP_TABLE} (order_day, region_id, salesperson_id);
+                END
+            ''')
+            cursor.execute('''
+                IF NOT EXISTS (SELECT * FROM sys.tables WHERE name = 'rollup_state')
+                CREATE TABLE rollup_state (
+                    rollup_name NVARCHAR(100) PRIMARY KEY,
+                    high_water DATE NULL,
+                    refreshed_at DATETIME2 NULL,
+                    rows_written INT NULL,
+                    duration_ms INT NULL
+                )
+            ''')
+            conn.commit()
+            print(f"{ROLLUP_TABLE} and rollup_state tables ready")
+    except Exception as e:
+        print(f"Failed to create rollup tables: {str(e)}")
+        traceback.print_exc()
+
+def get_rollup_high_water(cursor):
+    """Return the last order day the rollup has aggregated, or None before the first build"""
+    cursor.execute("SELECT high_water FROM rollup_state WHERE rollup_name = ?", (ROLLUP_TABLE,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_data_version(cursor=None):
+    """
+    Stamp for results computed from the rollup: the sales_orders version plus
+    the rollup's last refresh time.
+
+    New orders change it straight away and the rollup refresh that picks them up
+    changes it again, so results cached in between are not served once the
+    rollup has caught up.
+
+    Returns:
+        str or None: None if the sales database cannot be read
+    """
+    if cursor is None:
+        try:
+            with get_sales_db_connection() as conn:
+                return get_data_version(conn.cursor())
+        except Exception as e:
+            print(f"Error reading sales data version: {str(e)}")
+            return None
+    orders_version = get_sales_data_version(cursor)
+    if orders_version is None:
+        return None
+    try:
+        cursor.execute("SELECT refreshed_at FROM rollup_state WHERE rollup_name = ?", (ROLLUP_TABLE,))
+        row = cursor.fetchone()
+    except Exception:
+        # Not built yet: readers use sales_orders, which orders_version covers
+        row = None
+    return f"{orders_version}:{row[0] if row and row[0] else '-'}"
+
+def rollup_source(cursor=None):
+    """
+    Return what aggregate queries should read FROM (always aliased by the caller):
+    ROLLUP_TABLE once it has been built, otherwise ORDERS_AS_ROLLUP.
+
+    Once the rollup exists the answer never changes, so it is not checked again.
+
+    Args:
+        cursor (optional): Open sales database cursor; a connection is opened if omitted
+    """
+    global _rollup_ready
+    built, checked_at = _rollup_ready
+    if built or time.time() - checked_at < ROLLUP_STATE_TTL:
+        return ROLLUP_TABLE if built else ORDERS_AS_ROLLUP
+    try:
+        if cursor is not None:
+            built = get_rollup_high_water(cursor) is not None
+        else:
+            with get_sales_db_connection() as conn:
+                built = get_rollup_high_water(conn.cursor()) is not None
+    except Exception as e:
+        # rollup_state does not exist before create_rollup_tables() has run
+        print(f"{ROLLUP_TABLE} not available, reading sales_orders: {str(e)}")
+        built = False
+    if not built:
+        print(f"{ROLLUP_TABLE} has not been built yet; run forecast_snapshots.py to build it")
+    _rollup_ready = (built, time.time())
+    return ROLLUP_TABLE if built else ORDERS_AS_ROLLUP
+
+def refresh_sales_rollup(full=False):
+    """
+    Re-aggregate sales_orders into the daily rollup from the high-water mark on.
+
+    Days from (high-water - REFRESH_OVERLAP_DAYS) onward are deleted and
+    rebuilt in one transaction; older days are left untouched. new_customer_sales
+    holds the amount of each customer's first order (ROW_NUMBER by order_date,
+    order_id), for repeat vs new charts.
+
+    Args:
+        full (bool): Rebuild every day instead of refreshing incrementally
+
+    Returns:
+        int: Rollup rows written
+    """
+    started = time.perf_counter()
+    with get_sales_db_connection() as conn:
+        cursor = conn.cursor()
+        high_water = None if full else get_rollup_high_water(cursor)
+        if high_water is None:
+            from_day = '1900-01-01'
+        else:
+            from_day = (high_water - timedelta(days=REFRESH_OVERLAP_DAYS)).isoformat()
+
+        try:
+            cursor.execute(f'''
+                SET NOCOUNT ON;
+                DECLARE @from_day DATE = ?;
+
+                DELETE FROM {ROLLUP_TABLE} WHERE order_day >= @from_day;
+
+                WITH first_orders AS (
+                    SELECT order_id
+                    FROM (
+                        SELECT order_id, order_date,
+                               ROW_NUMBER() OVER (PARTITION BY customer_id ORDER BY order_date, order_id) AS order_rank
+                        FROM sales_orders
+                        WHERE customer_id IN (
+                            SELECT customer_id FROM sales_orders WHERE order_date >= @from_day
+                        )
+                    ) ranked
+                    WHERE order_rank = 1 AND order_date >= @from_day
+                )
+                INSERT INTO {ROLLUP_TABLE} (
+                    order_day, region_id, category, customer_id, salesperson_id, status,
+                    total_sales, order_count, new_customer_sales
+                )
+                SELECT
+                    CAST(so.order_date AS DATE),
+                    so.region_id,
+                    p.category,
+                    so.customer_id,
+                    so.salesperson_id,
+                    so.status,
+                    SUM(ISNULL(so.total_amount, 0)),
+                    COUNT(*),
+                    SUM(CASE WHEN f.order_id IS NOT NULL THEN ISNULL(so.total_amount, 0) ELSE 0 END)
+                FROM sales_orders so
+                LEFT JOIN products p ON so.product_id = p.product_id
+                LEFT JOIN first_orders f ON so.order_id = f.order_id
+                WHERE so.order_date >= @from_day
+                GROUP BY CAST(so.order_date AS DATE), so.region_id, p.category,
+                         so.customer_id, so.salesperson_id, so.status;
+
+                SELECT @@ROWCOUNT;
+            ''', (from_day,))
+            rows_written = cursor.fetchone()[0]
+
+            cursor.execute(f"SELECT MAX(order_day) FROM {ROLLUP_TABLE}")
+            new_high_water = cursor.fetchone()[0]
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            cursor.execute('''
+                MERGE rollup_state AS target
+                USING (SELECT ? AS rollup_name) AS source
+                ON target.rollup_name = source.rollup_name
+                WHEN MATCHED THEN
+                    UPDATE SET high_water = ?, refreshed_at = SYSDATETIME(), rows_written = ?, duration_ms = ?
+                WHEN NOT MATCHED THEN
+                    INSERT (rollup_name, high_water, refreshed_at, rows_written, duration_ms)
+                    VALUES (?, ?, SYSDATETIME(), ?, ?);
+            ''', (
+                ROLLUP_TABLE, new_high_water, rows_written, duration_ms,
+                ROLLUP_TABLE, new_high_water, rows_written, duration_ms
+            ))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    print(f"{ROLLUP_TABLE} refreshed from {from_day}: {rows_written} rows in {duration_ms} ms")
+    return rows_written
+
+if __name__ == "__main__":
+    # python sales_cube.py          -> incremental refresh
+    # python sales_cube.py rebuild  -> full rebuild
+    create_rollup_tables()
+    refresh_sales_rollup(full=len(sys.argv) > 1 and sys.argv[1] == 'rebuild')
@@ -0,0 +1,43 @@
+import pyodbc
+from config import SALES_DB_CONNECTION_STRING
+from contextlib import contextmanager
+import traceback
+
+# Enable pyodbc connection pooling
+pyodbc.pooling = True
+
+def get_sales_connection():
+    """Get a connection to the sales forecasting database"""
+    return pyodbc.connect(SALES_DB_CONNECTION_STRING)
+
+@contextmanager
+def get_sales_db_connection():
+    """Context manager for sales database connections"""
+    conn = get_sales_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def get_sales_data_version(cursor=None):
+    """
+    Return a cheap stamp that changes whenever sales_orders changes.
+
+    Uses MAX(order_id) and COUNT(*), so inserts and deletes both bump it.
+    Pass an open cursor to reuse an existing connection.
+    """
+    query = "SELECT MAX(order_id), COUNT_BIG(*) FROM sales_orders"
+    try:
+        if cursor is not None:
+            cursor.execute(query)
+            max_id, row_count = cursor.fetchone()
+        else:
+            with get_sales_db_connection() as conn:
+                cur = conn.cursor()
+                cur.execute(query)
+                max_id, row_count = cur.fetchone()
+        return f"{max_id or 0}:{row_count or 0}"
+    except Exception as e:
+        print(f"Error reading sales data version: {str(e)}")
+        traceback.print_exc()
+        return None
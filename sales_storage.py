@@ -0,0 +1,253 @@
+import sys
+import traceback
+from datetime import date
+from sales_db import get_sales_db_connection
+
+# Monthly partitioning objects for sales_orders
+PARTITION_FUNCTION = 'pf_sales_orders_month'
+PARTITION_SCHEME = 'ps_sales_orders_month'
+CLUSTERED_INDEX = 'CIX_sales_orders_order_date'
+COLUMNSTORE_INDEX = 'NCCI_sales_orders_analytics'
+
+# Columns the dashboard, rollup and forecast queries scan and aggregate
+COLUMNSTORE_COLUMNS = (
+    'order_date', 'region_id', 'product_id', 'customer_id',
+    'salesperson_id', 'total_amount', 'status'
+)
+
+# Empty monthly partitions kept ahead of today so new orders never land in the last one
+MONTHS_AHEAD = 12
+
+def _add_months(day, months):
+    """Return the first day of the month that is months after day"""
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def month_boundaries(first_month, last_month):
+    """
+    Return the first day of every month from first_month to last_month inclusive.
+
+    Args:
+        first_month (date): Any day in the first month
+        last_month (date): Any day in the last month
+
+    Returns:
+        list: date objects, one per month
+    """
+    boundaries = []
+    current = first_month.replace(day=1)
+    while current <= last_month:
+        boundaries.append(current)
+        current = _add_months(current, 1)
+    return boundaries
+
+def _order_date_type(cursor):
+    """Return the declared SQL type of sales_orders.order_date, e.g. 'date' or 'datetime2(7)'"""
+    cursor.execute('''
+        SELECT t.name, c.scale
+        FROM sys.columns c
+        JOIN sys.types t ON c.user_type_id = t.user_type_id
+        WHERE c.object_id = OBJECT_ID('sales_orders') AND c.name = 'order_date'
+    ''')
+    row = cursor.fetchone()
+    if not row:
+        raise RuntimeError("sales_orders.order_date not found")
+    type_name, scale = row
+    return f"{type_name}({scale})" if type_name in ('datetime2', 'datetimeoffset', 'time') else type_name
+
+def get_storage_status():
+    """
+    Describe how sales_orders is stored.
+
+    Returns:
+        dict: partitioned, partition_count, columnstore, clustered_index and row count
+    """
+    with get_sales_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT
+                MAX(CASE WHEN ps.name IS NOT NULL THEN 1 ELSE 0 END),
+                (SELECT COUNT(*) FROM sys.partitions p
+                 WHERE p.object_id = OBJECT_ID('sales_orders') AND p.index_id IN (0, 1)),
+                MAX(CASE WHEN i.type = 6 THEN 1 ELSE 0 END),
+                MAX(CASE WHEN i.type = 1 THEN i.name END),
+                (SELECT SUM(p.rows) FROM sys.partitions p
+                 WHERE p.object_id = OBJECT_ID('sales_orders') AND p.index_id IN (0, 1))
+            FROM sys.indexes i
+            LEFT JOIN sys.partition_schemes ps ON i.data_space_id = ps.data_space_id
+            WHERE i.object_id = OBJECT_ID('sales_orders')
+        ''')
+        partitioned, partition_count, columnstore, clustered_index, row_count = cursor.fetchone()
+    return {
+        'partitioned': bool(partitioned),
+        'partition_count': partition_count or 0,
+        'columnstore': bool(columnstore),
+        'clustered_index': clustered_index,
+        'rows': row_count or 0
+    }
+
+def create_partition_objects(cursor, first_month, last_month):
+    """Create the monthly partition function and scheme if they do not exist"""
+    cursor.execute("SELECT 1 FROM sys.partition_functions WHERE name = ?", (PARTITION_FUNCTION,))
+    if cursor.fetchone():
+        print(f"{PARTITION_FUNCTION} already exists")
+        return
+
+    column_type = _order_date_type(cursor)
+    boundaries = ', '.join(f"'{day.isoformat()}'" for day in month_boundaries(first_month, last_month))
+    cursor.execute(f'''
+        CREATE PARTITION FUNCTION {PARTITION_FUNCTION} ({column_type})
+        AS RANGE RIGHT FOR VALUES ({boundaries})
+    ''')
+    cursor.execute(f'''
+        CREATE PARTITION SCHEME {PARTITION_SCHEME}
+        AS PARTITION {PARTITION_FUNCTION} ALL TO ([PRIMARY])
+    ''')
+    print(f"Created {PARTITION_FUNCTION} ({column_type}) from {first_month:%Y-%m} to {last_month:%Y-%m}")
+
+def _primary_key(cursor):
+    """Return (name, is_clustered, referencing_foreign_keys) for the sales_orders primary key"""
+    cursor.execute('''
+        SELECT i.name, CASE WHEN i.type = 1 THEN 1 ELSE 0 END,
+               (SELECT COUNT(*) FROM sys.foreign_keys fk
+                WHERE fk.referenced_object_id = OBJECT_ID('sales_orders'))
+        FROM sys.indexes i
+        WHERE i.object_id = OBJECT_ID('sales_orders') AND i.is_primary_key = 1
+    ''')
+    row = cursor.fetchone()
+    return (row[0], bool(row[1]), row[2]) if row else (None, False, 0)
+
+def migrate_sales_orders_storage(first_month=None, months_ahead=MONTHS_AHEAD, dry_run=False):
+    """
+    Move sales_orders onto monthly partitions and add the analytic columnstore index.
+
+    Steps (each skipped when already done):
+      1. Create the partition function/scheme from the earliest order month to
+         months_ahead months past today.
+      2. Turn a clustered primary key on order_id into a nonclustered one.
+      3. Build the clustered index (order_date, order_id) on the partition scheme,
+         which physically moves the rows into monthly partitions.
+      4. Create a partition-aligned nonclustered columnstore index on COLUMNSTORE_COLUMNS.
+
+    Args:
+        first_month (date, optional): First partition boundary; defaults to the earliest order
+        months_ahead (int): Empty monthly partitions to create past today
+        dry_run (bool): Only print what would be done
+
+    Returns:
+        bool: True if the migration completed (or nothing was left to do)
+    """
+    with get_sales_db_connection() as conn:
+        conn.autocommit = False
+        cursor = conn.cursor()
+        try:
+            if first_month is None:
+                cursor.execute("SELECT MIN(order_date) FROM sales_orders")
+                earliest = cursor.fetchone()[0]
+                first_month = (earliest.date() if hasattr(earliest, 'date') else earliest) if earliest else date.today()
+            last_month = _add_months(date.today(), months_ahead)
+
+            status = get_storage_status()
+            pk_name, pk_clustered, referencing_fks = _primary_key(cursor)
+            print(f"Current storage: {status}")
+
+            if dry_run:
+                print(f"Would partition {first_month:%Y-%m}..{last_month:%Y-%m} by month")
+                if pk_clustered and not status['partitioned']:
+                    print(f"Would recreate primary key {pk_name} as NONCLUSTERED")
+                if not status['partitioned']:
+                    print(f"Would create {CLUSTERED_INDEX} on {PARTITION_SCHEME}(order_date)")
+                if not status['columnstore']:
+                    print(f"Would create {COLUMNSTORE_INDEX} on ({', '.join(COLUMNSTORE_COLUMNS)})")
+                conn.rollback()
+                return True
+
+            create_partition_objects(cursor, first_month, last_month)
+
+            if not status['partitioned']:
+                if status['clustered_index'] and not pk_clustered:
+                    raise RuntimeError(
+                        f"sales_orders already has clustered index {status['clustered_index']}; drop it first"
+                    )
+                if pk_clustered:
+                    if referencing_fks:
+                        raise RuntimeError(
+                            f"{referencing_fks} foreign key(s) reference {pk_name}; "
+                            "drop them before moving sales_orders to partitions"
+                        )
+                    print(f"Recreating primary key {pk_name} as NONCLUSTERED")
+                    cursor.execute(f"ALTER TABLE sales_orders DROP CONSTRAINT {pk_name}")
+                    cursor.execute(f"ALTER TABLE sales_orders ADD CONSTRAINT {pk_name} PRIMARY KEY NONCLUSTERED (order_id)")
+
+                print(f"Building {CLUSTERED_INDEX} on {PARTITION_SCHEME}(order_date)")
+                cursor.execute(f'''
+                    CREATE CLUSTERED INDEX {CLUSTERED_INDEX}
+                    ON sales_orders (order_date, order_id)
+                    ON {PARTITION_SCHEME}(order_date)
+                ''')
+
+            if not status['columnstore']:
+                print(f"Building {COLUMNSTORE_INDEX}")
+                cursor.execute(f'''
+                    CREATE NONCLUSTERED COLUMNSTORE INDEX {COLUMNSTORE_INDEX}
+                    ON sales_orders ({', '.join(COLUMNSTORE_COLUMNS)})
+                    ON {PARTITION_SCHEME}(order_date)
+                ''')
+
+            conn.commit()
+            print(f"Migration complete: {get_storage_status()}")
+            return True
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Storage migration failed, rolled back: {str(e)}")
+            traceback.print_exc()
+            return False
+
+def extend_partitions(months_ahead=MONTHS_AHEAD):
+    """
+    Split new monthly partitions so there are always months_ahead empty months past today.
+
+    Run monthly (e.g. from the maintenance scheduler). Splitting empty
+    partitions is a metadata-only operation.
+
+    Returns:
+        int: Number of partitions added
+    """
+    with get_sales_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MAX(CAST(prv.value AS DATE))
+            FROM sys.partition_range_values prv
+            JOIN sys.partition_functions pf ON prv.function_id = pf.function_id
+            WHERE pf.name = ?
+        ''', (PARTITION_FUNCTION,))
+        last_boundary = cursor.fetchone()[0]
+        if last_boundary is None:
+            print(f"{PARTITION_FUNCTION} does not exist; run the migration first")
+            return 0
+
+        added = 0
+        target = _add_months(date.today(), months_ahead)
+        for boundary in month_boundaries(_add_months(last_boundary, 1), target):
+            cursor.execute(f"ALTER PARTITION SCHEME {PARTITION_SCHEME} NEXT USED [PRIMARY]")
+            cursor.execute(f"ALTER PARTITION FUNCTION {PARTITION_FUNCTION}() SPLIT RANGE ('{boundary.isoformat()}')")
+            added += 1
+        conn.commit()
+        print(f"Added {added} monthly partitions up to {target:%Y-%m}")
+        return added
+
+if __name__ == "__main__":
+    # python sales_storage.py status    -> show how sales_orders is stored
+    # python sales_storage.py dry-run   -> print the migration plan
+    # python sales_storage.py migrate   -> partition by month and add the columnstore index
+    # python sales_storage.py extend    -> add future monthly partitions
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'migrate':
+        migrate_sales_orders_storage()
+    elif command == 'dry-run':
+        migrate_sales_orders_storage(dry_run=True)
+    elif command == 'extend':
+        extend_partitions()
+    else:
+        print(get_storage_status())
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import os
+import tempfile
+from flask import Request
+from config import UPLOAD_SPOOL_THRESHOLD, UPLOAD_SPOOL_DIR
+
+class UploadRequest(Request):
+    """
+    Request that spools large uploads to a named temporary file.
+
+    Uploads up to UPLOAD_SPOOL_THRESHOLD bytes stay in memory. Larger ones go
+    to a file on disk that PyMuPDF can open by path, so the PDF is never
+    held in memory as a bytes object. MAX_CONTENT_LENGTH is enforced by
+    werkzeug while the body streams in.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_THRESHOLD:
+            return io.BytesIO()
+        # delete=False so the parse worker can reopen the path on Windows; close() removes it
+        spool = tempfile.NamedTemporaryFile('wb+', suffix='.upload', dir=UPLOAD_SPOOL_DIR, delete=False)
+        self._spooled_paths = getattr(self, '_spooled_paths', []) + [spool.name]
+        return spool
+
+    def close(self):
+        """Close the uploads, then delete any files they were spooled to"""
+        try:
+            super().close()
+        finally:
+            paths, self._spooled_paths = getattr(self, '_spooled_paths', []), []
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    print(f"Could not remove spooled upload {path}: {str(e)}")
+
+def upload_size(file_storage):
+    """Size in bytes of an uploaded file, without reading it"""
+    stream = file_storage.stream
+    position = stream.tell()
+    stream.seek(0, 2)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
+@contextlib.contextmanager
+def pdf_source(file_storage):
+    """
+    Yield the cheapest handle PyMuPDF can open an upload from.
+
+    A spooled upload is yielded as its file path and an in-memory one as a
+    memoryview of its buffer; neither copies the PDF. Any other stream is read.
+    """
+    stream = file_storage.stream
+    if isinstance(stream, io.BytesIO):
+        view = stream.getbuffer()
+        try:
+            yield view
+        finally:
+            view.release()  # The BytesIO cannot be closed while a view is exported
+    elif isinstance(getattr(stream, 'name', None), str):
+        stream.flush()
+        yield stream.name
+    else:
+        stream.seek(0)
+        yield stream.read()
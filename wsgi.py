@@ -0,0 +1,84 @@
+# Production entry point:
+#     gunicorn -c gunicorn.conf.py wsgi:application   (Linux: WSGI_WORKERS processes x WSGI_THREADS threads)
+#     python wsgi.py                                   (Windows or anywhere: waitress, WSGI_THREADS threads)
+# Importing this module preloads PyMuPDF, the parsers and the dashboard code so a
+# pre-forking server loads them once; warmup() runs in each server worker.
+import sys
+import time
+import traceback
+import fitz  # noqa: F401  PyMuPDF, loaded before fork
+from config import WSGI_BIND, WSGI_THREADS, WSGI_TIMEOUT
+from app import app
+from db import get_all_suppliers, get_all_items, get_db_connection
+from sales_db import get_sales_db_connection
+from dashboard import normalize_filters, get_dashboard_data
+from parse_worker import start_workers, stop_workers
+from order_stream import stop_streams
+from maintenance import start_runner
+
+def create_app():
+    """Return the configured Flask app with its modules already imported"""
+    return app
+
+def _ping(connect):
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
+# (name, callable) run by warmup() in order; a failing step is logged and skipped
+WARMUP_STEPS = (
+    ('invoice_db', lambda: _ping(get_db_connection)),
+    ('sales_db', lambda: _ping(get_sales_db_connection)),
+    ('suppliers', get_all_suppliers),
+    ('items', get_all_items),
+    ('parse_workers', start_workers),
+    ('dashboard', lambda: get_dashboard_data(normalize_filters({}))),
+    ('maintenance', start_runner)   # claims each task in the database, so one run per interval across workers
+)
+
+def warmup():
+    """
+    Prime connection pools, reference caches, parse workers and the default dashboard.
+
+    Returns:
+        dict: Step name -> milliseconds taken, or the error it raised
+    """
+    results = {}
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+            results[name] = round((time.perf_counter() - started) * 1000, 1)
+        except Exception as e:
+            results[name] = f"failed: {str(e)}"
+            print(f"Warmup step {name} failed: {str(e)}")
+            traceback.print_exc()
+    print(f"Warmup complete: {results}")
+    return results
+
+def shutdown():
+    """End open dashboard streams and release the PDF parse workers; called when a server worker exits"""
+    try:
+        print(f"Shutdown: closed {stop_streams()} dashboard streams")
+        stopped = stop_workers()
+        print(f"Shutdown: stopped {stopped} PDF parse workers")
+    except Exception as e:
+        print(f"Error during shutdown: {str(e)}")
+        traceback.print_exc()
+
+application = create_app()
+
+if __name__ == "__main__":
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress is not installed (pip install waitress); on Linux run: gunicorn -c gunicorn.conf.py wsgi:application")
+        sys.exit(1)
+
+    warmup()
+    try:
+        # waitress stops accepting on Ctrl+C and lets in-flight requests finish
+        serve(application, listen=WSGI_BIND, threads=WSGI_THREADS, channel_timeout=WSGI_TIMEOUT)
+    finally:
+        shutdown()